@@ -82,8 +82,14 @@ const deserializeFile = (serialized: any): File | number | null => {
 const descargarPDF = async (pdfUrl: string, filename: string): Promise<boolean> => {
   try {
     const fullUrl = pdfUrl.startsWith('http') ? pdfUrl : `${window.location.origin}${pdfUrl}`;
-    const response = await fetch(fullUrl);
-    if (!response.ok) throw new Error(`Error ${response.status}`);
+    let response = await fetch(fullUrl);
+    // 202: el comprobante todavía se está generando en el servidor
+    for (let intento = 0; response.status === 202 && intento < 30; intento++) {
+      const espera = Number(response.headers.get('Retry-After') || '2') * 1000;
+      await new Promise((resolve) => setTimeout(resolve, espera));
+      response = await fetch(fullUrl);
+    }
+    if (!response.ok || response.status === 202) throw new Error(`Error ${response.status}`);
     const blob = await response.blob();
     if (blob.size < 1000) throw new Error('Archivo PDF inválido');
     const url = window.URL.createObjectURL(blob);
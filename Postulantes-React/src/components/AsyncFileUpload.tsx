@@ -13,6 +13,113 @@ interface AsyncFileUploadProps {
     error?: string;
 }
 
+const API_SUBIDAS = '/api/postulantes/upload/sesiones/';
+const MAX_REINTENTOS = 5;
+
+const esperar = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+const SHA256_K = new Uint32Array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+]);
+
+// SHA-256 en JavaScript para cuando crypto.subtle no está disponible
+const sha256Software = (datos: Uint8Array): Uint8Array => {
+    const rotr = (x: number, n: number) => (x >>> n) | (x << (32 - n));
+    // Relleno: 0x80, ceros y la longitud en bits (big endian) hasta múltiplo de 64 bytes
+    const largo = Math.ceil((datos.length + 9) / 64) * 64;
+    const bloque = new Uint8Array(largo);
+    bloque.set(datos);
+    bloque[datos.length] = 0x80;
+    const vista = new DataView(bloque.buffer);
+    vista.setUint32(largo - 8, Math.floor(datos.length / 0x20000000));
+    vista.setUint32(largo - 4, (datos.length * 8) >>> 0);
+
+    const h = new Uint32Array([
+        0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+    ]);
+    const w = new Uint32Array(64);
+    for (let inicio = 0; inicio < largo; inicio += 64) {
+        for (let i = 0; i < 16; i++) w[i] = vista.getUint32(inicio + i * 4);
+        for (let i = 16; i < 64; i++) {
+            const s0 = rotr(w[i - 15], 7) ^ rotr(w[i - 15], 18) ^ (w[i - 15] >>> 3);
+            const s1 = rotr(w[i - 2], 17) ^ rotr(w[i - 2], 19) ^ (w[i - 2] >>> 10);
+            w[i] = w[i - 16] + s0 + w[i - 7] + s1;
+        }
+        let [a, b, c, d, e, f, g, hh] = h;
+        for (let i = 0; i < 64; i++) {
+            const t1 = hh + (rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25)) + ((e & f) ^ (~e & g)) + SHA256_K[i] + w[i];
+            const t2 = (rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22)) + ((a & b) ^ (a & c) ^ (b & c));
+            hh = g; g = f; f = e; e = (d + t1) >>> 0;
+            d = c; c = b; b = a; a = (t1 + t2) >>> 0;
+        }
+        h[0] += a; h[1] += b; h[2] += c; h[3] += d; h[4] += e; h[5] += f; h[6] += g; h[7] += hh;
+    }
+    const digest = new Uint8Array(32);
+    const salida = new DataView(digest.buffer);
+    h.forEach((valor, i) => salida.setUint32(i * 4, valor));
+    return digest;
+};
+
+const sha256Hex = async (file: File): Promise<string> => {
+    const contenido = await file.arrayBuffer();
+    // crypto.subtle solo existe en contextos seguros (HTTPS o localhost)
+    const digest = window.crypto?.subtle
+        ? new Uint8Array(await window.crypto.subtle.digest('SHA-256', contenido))
+        : sha256Software(new Uint8Array(contenido));
+    return Array.from(digest).map(b => b.toString(16).padStart(2, '0')).join('');
+};
+
+// Sube el archivo por fragmentos: si la conexión se corta, se reanuda desde el
+// último offset confirmado por el servidor en vez de empezar de nuevo.
+const subirPorFragmentos = async (file: File, onProgress: (enviados: number) => void): Promise<number> => {
+    const inicio = await fetch(API_SUBIDAS, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ nombre: file.name, tamano: file.size, sha256: await sha256Hex(file) }),
+    });
+    if (!inicio.ok) throw new Error('Error al subir el archivo');
+    const sesion = await inicio.json();
+    // El servidor ya tiene un archivo idéntico: se reutiliza sin volver a subirlo
+    if (sesion.archivo) {
+        onProgress(file.size);
+        return sesion.archivo;
+    }
+    const url = `${API_SUBIDAS}${sesion.id}/`;
+
+    let offset = 0;
+    let fallos = 0;
+    while (offset < file.size) {
+        try {
+            const response = await fetch(url, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset) },
+                body: file.slice(offset, offset + sesion.fragmento),
+            });
+            if (!response.ok && response.status !== 409) throw new Error('Error al subir el archivo');
+            // En 409 el servidor informa el offset correcto
+            offset = (await response.json()).offset;
+            fallos = 0;
+            onProgress(offset);
+        } catch (err) {
+            if (++fallos > MAX_REINTENTOS) throw err;
+            await esperar(1000 * fallos);
+            const estado = await fetch(url).then(r => r.json()).catch(() => null);
+            if (estado) offset = estado.offset;
+        }
+    }
+
+    const fin = await fetch(`${url}completar/`, { method: 'POST' });
+    if (!fin.ok) throw new Error('Error al verificar el archivo subido');
+    return (await fin.json()).id;
+};
+
 const AsyncFileUpload: React.FC<AsyncFileUploadProps> = ({
     label,
     description,
@@ -36,24 +143,13 @@ const AsyncFileUpload: React.FC<AsyncFileUploadProps> = ({
         setStatus('uploading');
         setProgress(10);
 
-        const formData = new FormData();
-        formData.append('file', file);
-
         try {
-            // Simulate progress or use real XHR
-            setProgress(30);
-
-            const response = await fetch('/api/postulantes/upload/', {
-                method: 'POST',
-                body: formData,
+            const fileId = await subirPorFragmentos(file, (enviados) => {
+                setProgress(Math.max(10, Math.round((enviados / file.size) * 100)));
             });
-
-            if (!response.ok) throw new Error('Error al subir el archivo');
-
-            const data = await response.json();
             setProgress(100);
             setStatus('success');
-            onUploadSuccess(data.id);
+            onUploadSuccess(fileId);
         } catch (err: any) {
             setStatus('error');
             setError(err.message || 'Error de conexión');
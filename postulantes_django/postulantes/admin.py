@@ -1,9 +1,28 @@
-from django.http import HttpResponse
+import tempfile
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.urls import path, reverse
 from openpyxl import Workbook
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.contrib import admin
-from .models import Postulante, Recinto, RevisionPostulante, ConfiguracionSistema
+from .models import Postulante, Recinto, RevisionPostulante, ConfiguracionSistema, CupoCargo, TareaComprobante, UploadedFile
+from .previews import admite_preview, es_pdf, obtener_preview
+
+def queryset_exportacion(queryset):
+    """Postulantes con recintos y última revisión resueltos en una sola consulta.
+
+    El total y la última revisión vienen del resumen desnormalizado del
+    postulante, así que basta con select_related: la exportación hace un
+    número fijo de consultas sin importar cuántas filas tenga.
+    """
+    return (
+        queryset
+        .select_related(
+            'recinto_primera_opcion', 'recinto_segunda_opcion',
+            'ultima_revision__revisado_por',
+        )
+        .order_by('id')
+    )
 
 class RevisionPostulanteInline(admin.TabularInline):
     model = RevisionPostulante
@@ -28,17 +47,19 @@ class PostulanteAdmin(admin.ModelAdmin):
     )
     search_fields = ('nombre', 'apellido_paterno', 'apellido_materno', 'cedula_identidad')
     list_filter = (
+        'estado_revision',
         'fecha_registro', 
         'expedicion'
     )
-    readonly_fields = ('fecha_registro', 'ver_archivo_ci', 'ver_archivo_no_militancia', 'ver_archivo_hoja_de_vida', 'ver_archivo_certificado_ofimatica')
+    readonly_fields = ('fecha_registro', 'ver_archivo_ci', 'ver_archivo_no_militancia', 'ver_archivo_hoja_de_vida', 'ver_archivo_certificado_ofimatica', 'vista_previa')
     inlines = [RevisionPostulanteInline]
     actions = ['exportar_a_excel']
 
     def exportar_a_excel(self, request, queryset):
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Postulantes y Revisiones"
+        # Libro en modo "write-only": las filas se vuelcan a disco a medida que
+        # se agregan, así la memoria no crece con el número de postulantes.
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title="Postulantes y Revisiones")
 
         # Encabezados
         headers = [
@@ -51,8 +72,8 @@ class PostulanteAdmin(admin.ModelAdmin):
         ]
         ws.append(headers)
 
-        for obj in queryset:
-            last_rev = obj.revisiones.first()
+        for obj in queryset_exportacion(queryset).iterator(chunk_size=2000):
+            last_rev = obj.ultima_revision
             
             # Determinar estado
             estado = "Sin revisión"
@@ -63,12 +84,7 @@ class PostulanteAdmin(admin.ModelAdmin):
             fecha_rev = "-"
 
             if last_rev:
-                cumple_all = (
-                    last_rev.cumple_experiencia_especifica == 'CUMPLE' and 
-                    last_rev.cumple_no_militancia == 'CUMPLE' and 
-                    last_rev.cumple_bachiller_o_superior == 'CUMPLE'
-                )
-                estado = "CUMPLE TODO" if cumple_all else "CON OBSERVACIONES"
+                estado = obj.get_estado_revision_display()
                 cumple_exp = last_rev.get_cumple_experiencia_especifica_display()
                 cumple_mil = last_rev.get_cumple_no_militancia_display()
                 cumple_bac = last_rev.get_cumple_bachiller_o_superior_display()
@@ -80,17 +96,25 @@ class PostulanteAdmin(admin.ModelAdmin):
                 obj.celular, obj.email, obj.cargo_postulacion, obj.fecha_registro.strftime('%d/%m/%Y %H:%M'),
                 str(obj.recinto_primera_opcion) if obj.recinto_primera_opcion else "N/A",
                 str(obj.recinto_segunda_opcion) if obj.recinto_segunda_opcion else "N/A",
-                obj.revisiones.count(),
+                obj.total_revisiones,
                 estado,
                 cumple_exp, cumple_mil, cumple_bac,
                 revisado_por, fecha_rev
             ]
             ws.append(row)
 
+        # El archivo temporal se borra del directorio de inmediato; FileResponse
+        # lo envía por bloques y el descriptor se cierra al terminar la respuesta.
+        tmp = tempfile.TemporaryFile(suffix='.xlsx')
+        wb.save(tmp)
+        tmp.seek(0)
 
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-        response['Content-Disposition'] = 'attachment; filename=postulantes_revisiones.xlsx'
-        wb.save(response)
+        response = FileResponse(
+            tmp,
+            as_attachment=True,
+            filename='postulantes_revisiones.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
         return response
 
     exportar_a_excel.short_description = "Exportar seleccionados a Excel"
@@ -130,6 +154,9 @@ class PostulanteAdmin(admin.ModelAdmin):
                 ('archivo_certificado_ofimatica', 'ver_archivo_certificado_ofimatica'),
             )
         }),
+        ('Vista Previa', {
+            'fields': ('vista_previa',),
+        }),
         ('Metadatos', {
             'fields': ('fecha_registro',),
             'classes': ('collapse',),
@@ -148,52 +175,124 @@ class PostulanteAdmin(admin.ModelAdmin):
         return f"{obj.nombre} {obj.apellido_paterno or ''} {obj.apellido_materno or ''}"
     nombre_completo.short_description = 'Nombre Completo'
 
-    def total_revisiones(self, obj):
-        return obj.revisiones.count()
-    total_revisiones.short_description = 'Revisiones'
-
     def estado_revision(self, obj):
-        last = obj.revisiones.first()
-        if not last:
-            return mark_safe('<span style="color: grey;">⚪ Sin revisión</span>')
-
-        
-        cumple_all = (
-            last.cumple_experiencia_especifica == 'CUMPLE' and 
-            last.cumple_no_militancia == 'CUMPLE' and 
-            last.cumple_bachiller_o_superior == 'CUMPLE'
-        )
-        
-        if cumple_all:
+        # Se lee del resumen desnormalizado: ninguna consulta extra por fila
+        if obj.estado_revision == 'CUMPLE_TODO':
             return mark_safe('<span style="color: green;">✅ CUMPLE TODO</span>')
 
-        
-        return mark_safe('<span style="color: orange;">⚠️ CON OBSERVACIONES</span>')
+        if obj.estado_revision == 'CON_OBSERVACIONES':
+            return mark_safe('<span style="color: orange;">⚠️ CON OBSERVACIONES</span>')
+
+        return mark_safe('<span style="color: grey;">⚪ Sin revisión</span>')
 
     estado_revision.short_description = 'Estado Actual'
+    estado_revision.admin_order_field = 'estado_revision'
+
+    def _subidas(self, obj):
+        # Versiones optimizadas de los archivos del postulante, en una sola consulta
+        if not hasattr(obj, '_subidas_cache'):
+            nombres = [f.name for f in (obj.archivo_ci, obj.archivo_no_militancia,
+                                        obj.archivo_hoja_de_vida, obj.archivo_certificado_ofimatica) if f]
+            obj._subidas_cache = {
+                u.file.name: u for u in UploadedFile.objects.filter(file__in=nombres, estado_imagen='LISTO')
+            }
+        return obj._subidas_cache
+
+    def _enlace_archivo(self, obj, archivo, etiqueta):
+        if not archivo:
+            return "No cargado"
+        subida = self._subidas(obj).get(archivo.name)
+        if subida and subida.archivo_optimizado:
+            return format_html(
+                '<a href="{}" target="_blank">📄 {}</a> ({} KB · <a href="{}" target="_blank">original</a> {} KB)',
+                subida.archivo_optimizado.url, etiqueta, (subida.tamano_optimizado or 0) // 1024,
+                archivo.url, (subida.tamano or 0) // 1024,
+            )
+        return format_html('<a href="{}" target="_blank">📄 {}</a>', archivo.url, etiqueta)
+
+    # ─── Vista previa de documentos ──────────────────────────────────────────
+    CAMPOS_PREVIEW = (
+        ('archivo_ci', 'CI'),
+        ('archivo_no_militancia', 'No Militancia'),
+        ('archivo_hoja_de_vida', 'CV'),
+        ('archivo_certificado_ofimatica', 'Certificado'),
+    )
+
+    def get_urls(self):
+        propias = [
+            path(
+                '<path:object_id>/preview/<str:campo>/',
+                self.admin_site.admin_view(self.preview_view),
+                name='postulantes_postulante_preview',
+            ),
+        ]
+        return propias + super().get_urls()
+
+    def preview_view(self, request, object_id, campo):
+        if campo not in dict(self.CAMPOS_PREVIEW):
+            raise Http404
+        obj = self.get_object(request, object_id)
+        if obj is None or not self.has_view_permission(request, obj):
+            raise Http404
+        resultado = obtener_preview(getattr(obj, campo))
+        if resultado is None:
+            raise Http404
+        ruta, sha = resultado
+
+        # El contenido no cambia para un mismo hash: el navegador puede guardarla
+        etag = f'"{sha}"'
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(open(ruta, 'rb'), content_type='image/jpeg')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=86400'
+        return response
+
+    def vista_previa(self, obj):
+        # Solo se emiten las etiquetas <img>: cada vista previa se genera
+        # cuando el navegador la pide (loading="lazy"), no al abrir el formulario
+        if not obj or not obj.pk:
+            return "-"
+        celdas = []
+        for campo, etiqueta in self.CAMPOS_PREVIEW:
+            archivo = getattr(obj, campo)
+            if not archivo:
+                continue
+            if admite_preview(archivo.name):
+                url = reverse('admin:postulantes_postulante_preview', args=[obj.pk, campo])
+                contenido = format_html(
+                    '<img src="{}" loading="lazy" decoding="async" alt="{}" '
+                    'style="max-width: 240px; max-height: 240px; border: 1px solid #ddd;">',
+                    url, etiqueta,
+                )
+            else:
+                # Un PDF sin vista previa indica qué falta en el servidor
+                aviso = 'Vista previa de PDF no disponible (instale pypdfium2)' if es_pdf(archivo.name) else 'Sin vista previa'
+                contenido = format_html('<div style="width: 160px; padding: 40px 0; border: 1px dashed #ccc;">{}</div>', aviso)
+            celdas.append(format_html(
+                '<a href="{}" target="_blank" style="display: inline-block; margin: 0 12px 12px 0; text-align: center;">{}<br>{}</a>',
+                archivo.url, contenido, etiqueta,
+            ))
+        if not celdas:
+            return "Sin documentos"
+        return format_html('<div>{}</div>', mark_safe(''.join(celdas)))
+    vista_previa.short_description = 'Documentos'
 
     def ver_archivo_ci(self, obj):
-        if obj.archivo_ci:
-            return format_html('<a href="{}" target="_blank">📄 Ver CI</a>', obj.archivo_ci.url)
-        return "No cargado"
+        return self._enlace_archivo(obj, obj.archivo_ci, 'Ver CI')
     ver_archivo_ci.short_description = 'Enlace CI'
 
     def ver_archivo_no_militancia(self, obj):
-        if obj.archivo_no_militancia:
-            return format_html('<a href="{}" target="_blank">📄 Ver No Militancia</a>', obj.archivo_no_militancia.url)
-        return "No cargado"
+        return self._enlace_archivo(obj, obj.archivo_no_militancia, 'Ver No Militancia')
     ver_archivo_no_militancia.short_description = 'Enlace No Militancia'
 
     def ver_archivo_hoja_de_vida(self, obj):
-        if obj.archivo_hoja_de_vida:
-            return format_html('<a href="{}" target="_blank">📄 Ver CV</a>', obj.archivo_hoja_de_vida.url)
-        return "No cargado"
+        return self._enlace_archivo(obj, obj.archivo_hoja_de_vida, 'Ver CV')
     ver_archivo_hoja_de_vida.short_description = 'Enlace CV'
 
     def ver_archivo_certificado_ofimatica(self, obj):
-        if obj.archivo_certificado_ofimatica:
-            return format_html('<a href="{}" target="_blank">📄 Ver Certificado</a>', obj.archivo_certificado_ofimatica.url)
-        return "No cargado"
+        return self._enlace_archivo(obj, obj.archivo_certificado_ofimatica, 'Ver Certificado')
     ver_archivo_certificado_ofimatica.short_description = 'Enlace Certificado'
 
 @admin.register(RevisionPostulante)
@@ -209,10 +308,27 @@ class RecintoAdmin(admin.ModelAdmin):
 
 @admin.register(ConfiguracionSistema)
 class ConfiguracionSistemaAdmin(admin.ModelAdmin):
-    list_display = ('__str__', 'sistema_activo', 'mensaje')
+    list_display = ('__str__', 'sistema_activo', 'fecha_apertura', 'fecha_cierre', 'mensaje')
     
     def has_add_permission(self, request):
         # Limitar a una sola instancia
         if self.model.objects.exists():
             return False
         return True
+
+@admin.register(CupoCargo)
+class CupoCargoAdmin(admin.ModelAdmin):
+    list_display = ('cargo_postulacion', 'limite', 'ocupados')
+    readonly_fields = ('ocupados',)
+
+    def save_model(self, request, obj, form, change):
+        # Al crear o editar el cupo se recuenta a partir de los postulantes registrados
+        obj.ocupados = Postulante.objects.filter(cargo_postulacion=obj.cargo_postulacion).count()
+        super().save_model(request, obj, form, change)
+
+@admin.register(TareaComprobante)
+class TareaComprobanteAdmin(admin.ModelAdmin):
+    list_display = ('cedula_identidad', 'estado', 'intentos', 'fecha_creacion', 'fecha_actualizacion')
+    list_filter = ('estado',)
+    search_fields = ('cedula_identidad',)
+    readonly_fields = ('postulante', 'fecha_creacion', 'fecha_actualizacion', 'error')
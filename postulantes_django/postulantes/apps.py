@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PostulantesConfig(AppConfig):
     name = 'postulantes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
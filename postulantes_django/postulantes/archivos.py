@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+
+def write_atomic(path, data):
+    """Escribe en un temporal del mismo directorio y lo renombra.
+
+    os.replace es atómico, así que nunca se sirve un archivo a medio escribir
+    y una interrupción deja intacta la versión anterior.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp",
+                                    dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,229 @@
+import gzip
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional; sin él se sirve gzip
+    brotli = None
+
+RECINTOS_VERSION_KEY = 'recintos:version'
+
+
+class PayloadComprimido:
+    """Cuerpo JSON ya serializado, con sus variantes comprimidas y su ETag."""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.variantes = {
+            'identity': body,
+            'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            self.variantes['br'] = brotli.compress(body, quality=11)
+
+    def etag_para(self, encoding):
+        # Cada codificación es una representación distinta: ETag fuerte propio
+        sufijo = '' if encoding == 'identity' else f'-{encoding}'
+        return f'"{self.etag}{sufijo}"'
+
+
+def _aceptadas(accept_encoding):
+    aceptadas = set()
+    for parte in accept_encoding.split(','):
+        partes = [p.strip() for p in parte.split(';')]
+        nombre = partes[0].lower()
+        q = 1.0
+        for param in partes[1:]:
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if nombre and q > 0:
+            aceptadas.add(nombre)
+    return aceptadas
+
+
+def respuesta_comprimida(request, payload, max_age=None, content_type='application/json'):
+    """Sirve el payload con la mejor codificación aceptada y soporte de 304."""
+    aceptadas = _aceptadas(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    encoding = 'identity'
+    for candidata in ('br', 'gzip'):
+        if candidata in payload.variantes and (candidata in aceptadas or '*' in aceptadas):
+            encoding = candidata
+            break
+
+    etag = payload.etag_para(encoding)
+    if max_age is None:
+        max_age = getattr(settings, 'RECINTOS_CACHE_MAX_AGE', 60)
+    cache_control = f'public, max-age={max_age}'
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        # Un cliente puede revalidar con el ETag de cualquier codificación
+        if '*' in etags or any(e.strip('"').split('-')[0] == payload.etag for e in etags):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            response['Cache-Control'] = cache_control
+            response['Vary'] = 'Accept-Encoding'
+            return response
+
+    response = HttpResponse(payload.variantes[encoding], content_type=content_type)
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    response['Vary'] = 'Accept-Encoding'
+    return response
+
+
+# ─── Recintos ────────────────────────────────────────────────────────────────
+_memo = {}
+
+
+def _timeout():
+    # Cota para cambios hechos por fuera del ORM (SQL directo, otra app)
+    return getattr(settings, 'RECINTOS_CACHE_TIMEOUT', 60 * 60)
+
+
+def version_recintos():
+    version = cache.get(RECINTOS_VERSION_KEY)
+    if version is None:
+        cache.add(RECINTOS_VERSION_KEY, int(time.time() * 1000), timeout=_timeout())
+        version = cache.get(RECINTOS_VERSION_KEY)
+    return version
+
+
+def invalidar_recintos():
+    """Cambia la versión: todos los procesos reconstruyen el payload en la próxima petición."""
+    try:
+        cache.incr(RECINTOS_VERSION_KEY)
+    except ValueError:
+        cache.set(RECINTOS_VERSION_KEY, int(time.time() * 1000), timeout=_timeout())
+
+
+def _payload_versionado(nombre, construir):
+    """Payload derivado de los recintos, guardado por versión.
+
+    Se guarda en la caché de Django (compartida entre procesos si el backend
+    lo es) y además en memoria del proceso, de modo que una petición normal
+    solo lee la clave de versión.
+    """
+    version = version_recintos()
+    memo = _memo.get(nombre)
+    if memo and memo[0] == version:
+        return memo[1]
+
+    key = f'recintos:{nombre}:{version}'
+    payload = cache.get(key)
+    if payload is None:
+        payload = PayloadComprimido(JSONRenderer().render(construir()))
+        cache.set(key, payload, timeout=_timeout())
+
+    _memo[nombre] = (version, payload)
+    return payload
+
+
+def payload_recintos():
+    """Lista completa de recintos serializada y comprimida."""
+    from .models import Recinto
+    from .serializers import RecintoSerializer
+
+    return _payload_versionado(
+        'payload', lambda: RecintoSerializer(Recinto.objects.all(), many=True).data
+    )
+
+
+def _arbol_facetas():
+    from django.db.models import Count
+    from .models import Recinto
+
+    niveles = ('departamento', 'provincia', 'municipio', 'zona')
+    hijos = ('provincias', 'municipios', 'zonas', None)
+    filas = (
+        Recinto.objects
+        .values(*niveles)
+        .annotate(total=Count('id'))
+        .order_by(*niveles)
+    )
+
+    raiz = []
+    # Último nodo abierto en cada nivel; las filas vienen ordenadas por la jerarquía
+    abiertos = [None] * len(niveles)
+    for fila in filas:
+        contenedor = raiz
+        for i, nivel in enumerate(niveles):
+            nodo = abiertos[i]
+            if nodo is None or nodo['nombre'] != fila[nivel]:
+                nodo = {'nombre': fila[nivel], 'total': 0}
+                if hijos[i]:
+                    nodo[hijos[i]] = []
+                contenedor.append(nodo)
+                abiertos[i] = nodo
+                abiertos[i + 1:] = [None] * (len(niveles) - i - 1)
+            nodo['total'] += fila['total']
+            if hijos[i]:
+                contenedor = nodo[hijos[i]]
+    return raiz
+
+
+def payload_facetas_recintos():
+    """Árbol departamento → provincia → municipio → zona con el número de recintos."""
+    return _payload_versionado('facetas', _arbol_facetas)
+
+
+# ─── Configuración del sistema ───────────────────────────────────────────────
+_configuracion = {'valor': None, 'cupos': {}, 'expira': 0.0}
+
+
+def _ttl_configuracion():
+    return getattr(settings, 'CONFIGURACION_CACHE_TTL', 5)
+
+
+def _cargar_configuracion():
+    from .models import ConfiguracionSistema, CupoCargo
+
+    if _configuracion['valor'] is not None and time.monotonic() < _configuracion['expira']:
+        return _configuracion
+
+    config = ConfiguracionSistema.objects.order_by('id').first()
+    if config is None:
+        # Si no existe, crear una por defecto
+        config, _ = ConfiguracionSistema.objects.get_or_create(id=1, defaults={
+            'sistema_activo': True,
+            'mensaje': "El sistema de postulación se ha cerrado.",
+        })
+    _configuracion['cupos'] = {
+        cargo: (limite, ocupados)
+        for cargo, limite, ocupados in CupoCargo.objects.values_list('cargo_postulacion', 'limite', 'ocupados')
+    }
+    _configuracion['valor'] = config
+    _configuracion['expira'] = time.monotonic() + _ttl_configuracion()
+    return _configuracion
+
+
+def configuracion_sistema():
+    """Configuración (singleton) cacheada en memoria del proceso por CONFIGURACION_CACHE_TTL segundos.
+
+    Al confirmar un cambio de la configuración o de un cupo se invalida en el
+    proceso que lo guardó; los demás la releen cuando vence el TTL. La instancia devuelta es
+    de solo lectura.
+    """
+    return _cargar_configuracion()['valor']
+
+
+def cupos_cargo():
+    """{cargo: (limite, ocupados)} según la última lectura; solo los cargos con cupo."""
+    return _cargar_configuracion()['cupos']
+
+
+def invalidar_configuracion():
+    _configuracion['valor'] = None
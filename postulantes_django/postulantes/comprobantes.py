@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+from django.conf import settings
+from django.core.files import locks
+from django.utils import timezone
+from .models import Postulante, TareaComprobante
+from .utils import generate_pdf
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def directorio_comprobantes():
+    return os.path.join(settings.MEDIA_ROOT, 'comprobantes')
+
+
+def ruta_comprobante(ci):
+    return os.path.join(directorio_comprobantes(), f'comprobante_{ci}.pdf')
+
+
+def _vigente(path, postulante):
+    """El PDF existe y es posterior al registro (y a COMPROBANTE_VALIDO_DESDE, si se definió)."""
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return False
+    # Un PDF anterior al registro es de otro postulante que usó la misma cédula
+    limites = [postulante.fecha_registro, _config('COMPROBANTE_VALIDO_DESDE', None)]
+    return all(limite is None or mtime >= limite.timestamp() for limite in limites)
+
+
+def obtener_comprobante(ci):
+    """Ruta del comprobante de la cédula, generándolo si falta o está desactualizado.
+
+    Un candado de archivo por cédula hace que peticiones simultáneas (de este
+    u otros procesos) lo rendericen una sola vez: las demás esperan y
+    encuentran el PDF ya escrito. Devuelve None si no hay postulante.
+    """
+    postulante = (
+        Postulante.objects
+        .select_related('recinto_primera_opcion')
+        .filter(cedula_identidad=ci)
+        .order_by('-id')
+        .first()
+    )
+    if postulante is None:
+        return None
+
+    path = ruta_comprobante(ci)
+    if _vigente(path, postulante):
+        return path
+
+    os.makedirs(_dir_locks(), exist_ok=True)
+    with open(os.path.join(_dir_locks(), f'{ci}.lock'), 'wb') as candado:
+        locks.lock(candado, locks.LOCK_EX)
+        try:
+            if not _vigente(path, postulante):
+                generate_pdf(postulante)
+                TareaComprobante.objects.filter(cedula_identidad=ci, estado='ERROR').update(
+                    estado='LISTO', archivo=os.path.basename(path), error=None,
+                    fecha_actualizacion=timezone.now(),
+                )
+                podar_cache()
+        finally:
+            locks.unlock(candado)
+    return path
+
+
+def registrar_acceso(path):
+    # La fecha de acceso ordena la expulsión LRU; mtime queda intacto (lo usa el ETag)
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except OSError:
+        pass
+
+
+# ─── Límite de tamaño de la caché de comprobantes ────────────────────────────
+_poda = {'ultima': 0.0}
+_poda_lock = threading.Lock()
+
+
+def _dir_locks():
+    return os.path.join(directorio_comprobantes(), '.locks')
+
+
+def podar_cache(forzar=False):
+    """Borra los comprobantes usados hace más tiempo hasta quedar bajo COMPROBANTE_CACHE_MAX_MB.
+
+    Se pueden borrar sin riesgo porque se regeneran al pedirlos. Recorrer el
+    directorio cuesta, así que se hace como mucho cada
+    COMPROBANTE_CACHE_INTERVALO segundos por proceso; en el mismo recorrido se
+    borran los candados por cédula que nadie usa. Devuelve los bytes liberados.
+    """
+    intervalo = _config('COMPROBANTE_CACHE_INTERVALO', 60)
+    ahora = time.monotonic()
+    with _poda_lock:
+        if not forzar and ahora - _poda['ultima'] < intervalo:
+            return 0
+        _poda['ultima'] = ahora
+
+    podar_candados(intervalo)
+    max_mb = _config('COMPROBANTE_CACHE_MAX_MB', None)
+    if not max_mb:
+        return 0
+
+    archivos = []
+    total = 0
+    try:
+        entradas = os.scandir(directorio_comprobantes())
+    except FileNotFoundError:
+        return 0
+    with entradas:
+        for entrada in entradas:
+            if entrada.name.endswith('.pdf') and entrada.is_file():
+                st = entrada.stat()
+                archivos.append((st.st_atime, st.st_size, entrada.path))
+                total += st.st_size
+
+    limite = max_mb * 1024 * 1024
+    liberados = 0
+    archivos.sort()
+    for _, tamano, path in archivos:
+        if total <= limite:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        total -= tamano
+        liberados += tamano
+    return liberados
+
+
+def podar_candados(antiguedad):
+    """Borra los `.locks/{ci}.lock` sin usar en los últimos `antiguedad` segundos.
+
+    Abrir el candado lo trunca y actualiza su mtime, así que solo se tocan los
+    que nadie abrió hace rato; además se borran con el candado tomado, para
+    no quitárselo a un render en curso. Devuelve cuántos se borraron.
+    """
+    limite = time.time() - antiguedad
+    borrados = 0
+    try:
+        entradas = os.scandir(_dir_locks())
+    except FileNotFoundError:
+        return 0
+    with entradas:
+        viejos = [e.path for e in entradas if e.name.endswith('.lock') and e.stat().st_mtime < limite]
+    for path in viejos:
+        try:
+            with open(path, 'rb') as candado:
+                if not locks.lock(candado, locks.LOCK_EX | locks.LOCK_NB):
+                    continue
+                try:
+                    os.remove(path)
+                    borrados += 1
+                finally:
+                    locks.unlock(candado)
+        except FileNotFoundError:
+            continue
+    return borrados
@@ -0,0 +1,47 @@
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+_carriles = {}
+_carriles_lock = threading.Lock()
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def _carril(using):
+    with _carriles_lock:
+        return _carriles.setdefault(using, threading.Lock())
+
+
+def carril_activo(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'sqlite' and _config('SQLITE_CARRIL_ESCRITURA', False)
+
+
+@contextmanager
+def escritura(using=DEFAULT_DB_ALIAS):
+    """transaction.atomic() que, con SQLite, pasa por el carril de escritura del proceso.
+
+    SQLite admite un solo escritor a la vez. Si los hilos de un mismo proceso
+    compiten por el bloqueo del archivo, cada uno reintenta con esperas del
+    busy_timeout; con el carril esperan en un candado de Python y entran en
+    orden apenas se libera. Las lecturas fuera de `escritura()` no pasan por
+    el carril y, con WAL, tampoco esperan a los escritores.
+    """
+    conexion = connections[using]
+    if conexion.in_atomic_block or not carril_activo(using):
+        # Dentro de una transacción ya abierta el carril (si corresponde) ya se tomó
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    carril = _carril(using)
+    if not carril.acquire(timeout=conexion.settings_dict['OPTIONS'].get('timeout', 5)):
+        raise OperationalError('database is locked')
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        carril.release()
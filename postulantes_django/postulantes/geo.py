@@ -0,0 +1,120 @@
+import heapq
+import math
+import threading
+from collections import defaultdict
+
+RADIO_TIERRA_KM = 6371.0088
+KM_POR_GRADO = 111.32
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class IndiceRecintos:
+    """Índice espacial en memoria: rejilla regular de celdas lat/lon.
+
+    Cada recinto cae en una celda de `celda_grados` de lado. Una consulta
+    recorre anillos de celdas alrededor del punto y se detiene en cuanto
+    ningún recinto fuera de los anillos ya vistos puede estar más cerca que
+    el k-ésimo encontrado, así que solo calcula distancias para un puñado de
+    recintos en vez de para todos.
+    """
+
+    def __init__(self, puntos, celda_grados=0.05):
+        # puntos: iterable de (lat, lon, item)
+        self.celda = celda_grados
+        self.celdas = defaultdict(list)
+        self.total = 0
+        lat_max = 0.0
+        filas = []
+        columnas = []
+        for lat, lon, item in puntos:
+            fila, col = self._celda_de(lat, lon)
+            self.celdas[(fila, col)].append((lat, lon, item))
+            filas.append(fila)
+            columnas.append(col)
+            lat_max = max(lat_max, abs(lat))
+            self.total += 1
+        self.lat_max = lat_max
+        if self.total:
+            self.fila_min, self.fila_max = min(filas), max(filas)
+            self.col_min, self.col_max = min(columnas), max(columnas)
+
+    def _celda_de(self, lat, lon):
+        return math.floor(lat / self.celda), math.floor(lon / self.celda)
+
+    def _anillo(self, fila, col, r):
+        if r == 0:
+            yield fila, col
+            return
+        for c in range(col - r, col + r + 1):
+            yield fila - r, c
+            yield fila + r, c
+        for f in range(fila - r + 1, fila + r):
+            yield f, col - r
+            yield f, col + r
+
+    def cercanos(self, lat, lon, k=5, radio_km=None):
+        """Devuelve [(distancia_km, item)] ordenado por distancia, como máximo k."""
+        if not self.total or k <= 0:
+            return []
+        fila, col = self._celda_de(lat, lon)
+        # Anillos necesarios para cubrir toda la rejilla desde el punto consultado
+        r_max = max(
+            abs(fila - self.fila_min), abs(fila - self.fila_max),
+            abs(col - self.col_min), abs(col - self.col_max),
+        )
+        # Lado mínimo de una celda en km (las columnas se estrechan con la latitud)
+        lat_ref = min(max(self.lat_max, abs(lat)) + self.celda, 89.9)
+        km_celda = self.celda * KM_POR_GRADO * math.cos(math.radians(lat_ref))
+        mejores = []  # heap de (-distancia, contador, item) con los k más cercanos
+        contador = 0
+        for r in range(r_max + 1):
+            for celda in self._anillo(fila, col, r):
+                for p_lat, p_lon, item in self.celdas.get(celda, ()):
+                    d = haversine_km(lat, lon, p_lat, p_lon)
+                    if radio_km is not None and d > radio_km:
+                        continue
+                    contador += 1
+                    if len(mejores) < k:
+                        heapq.heappush(mejores, (-d, contador, item))
+                    elif d < -mejores[0][0]:
+                        heapq.heapreplace(mejores, (-d, contador, item))
+            # Todo lo no visitado está al menos a r celdas completas de distancia
+            cota = r * km_celda
+            if len(mejores) == k and cota >= -mejores[0][0]:
+                break
+            if radio_km is not None and cota > radio_km:
+                break
+        return [(-d, item) for d, _, item in sorted(mejores, reverse=True)]
+
+
+# ─── Índice de recintos del proceso ──────────────────────────────────────────
+_indice = {'version': None, 'indice': None}
+_indice_lock = threading.Lock()
+
+
+def indice_recintos():
+    """Índice construido perezosamente y reconstruido al cambiar la versión de recintos."""
+    from .caching import version_recintos
+    from .models import Recinto
+    from .serializers import RecintoSerializer
+
+    version = version_recintos()
+    if _indice['version'] == version:
+        return _indice['indice']
+
+    with _indice_lock:
+        if _indice['version'] != version:
+            recintos = Recinto.objects.filter(latitud__isnull=False, longitud__isnull=False)
+            datos = RecintoSerializer(recintos, many=True).data
+            _indice['indice'] = IndiceRecintos(
+                (d['latitud'], d['longitud'], dict(d)) for d in datos
+            )
+            _indice['version'] = version
+    return _indice['indice']
@@ -0,0 +1,141 @@
+import io
+import logging
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+from .models import UploadedFile
+from .tasks import ColaWorkerPool
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES_IMAGEN = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff'}
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def es_imagen(nombre):
+    return os.path.splitext(nombre)[1].lower() in EXTENSIONES_IMAGEN
+
+
+def a_jpeg(img, calidad, icc_profile=None):
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        # Las transparencias se aplanan sobre blanco, como se verían impresas
+        fondo = Image.new('RGB', img.size, 'white')
+        fondo.paste(img.convert('RGBA'), mask=img.convert('RGBA').getchannel('A'))
+        img = fondo
+    elif img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    buffer = io.BytesIO()
+    # Sin `exif=`: los metadatos (GPS, modelo del teléfono…) no se copian
+    img.save(buffer, 'JPEG', quality=calidad, optimize=True, progressive=True, icc_profile=icc_profile)
+    return buffer.getvalue()
+
+
+def abrir_reducida(archivo, lado):
+    """Abre la imagen enderezada según su orientación EXIF y reducida a `lado` píxeles.
+
+    Devuelve (imagen, perfil ICC del original). También la usan las vistas
+    previas del admin.
+    """
+    img = Image.open(archivo)
+    icc_profile = img.info.get('icc_profile')
+    if img.format == 'JPEG':
+        # Decodifica directamente a 1/2, 1/4 u 1/8 de la resolución si sobra
+        img.draft('RGB', (lado, lado))
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail((lado, lado), Image.LANCZOS, reducing_gap=3.0)
+    return img, icc_profile
+
+
+def optimizar(archivo):
+    """Devuelve (optimizada, miniatura) en JPEG a partir de una imagen abierta.
+
+    La imagen se endereza según su orientación EXIF, se reduce a
+    IMAGEN_MAX_LADO píxeles por lado y se recodifica sin metadatos.
+    """
+    img, icc_profile = abrir_reducida(archivo, _config('IMAGEN_MAX_LADO', 2000))
+    optimizada = a_jpeg(img, _config('IMAGEN_CALIDAD', 82), icc_profile)
+
+    lado = _config('IMAGEN_MINIATURA_LADO', 320)
+    img.thumbnail((lado, lado), Image.LANCZOS, reducing_gap=2.0)
+    miniatura = a_jpeg(img, 70, icc_profile)
+    return optimizada, miniatura
+
+
+def procesar_imagen(uploaded):
+    try:
+        with uploaded.file.open('rb') as f:
+            optimizada, miniatura = optimizar(f)
+    except Exception:
+        logger.exception("Error optimizando imagen %s", uploaded.file.name)
+        UploadedFile.objects.filter(id=uploaded.id).update(estado_imagen='ERROR')
+        return None
+
+    base = os.path.splitext(os.path.basename(uploaded.file.name))[0]
+    uploaded.archivo_optimizado.save(f'{base}.jpg', ContentFile(optimizada), save=False)
+    uploaded.miniatura.save(f'{base}.jpg', ContentFile(miniatura), save=False)
+    uploaded.tamano_optimizado = len(optimizada)
+    uploaded.estado_imagen = 'LISTO'
+    uploaded.save(update_fields=['archivo_optimizado', 'miniatura', 'tamano_optimizado', 'estado_imagen'])
+    return uploaded
+
+
+def reclamar_imagen():
+    """Toma la siguiente imagen pendiente con un UPDATE condicionado (como reclamar_tarea).
+
+    Las imágenes en PROCESANDO cuyo worker murió se recuperan tras
+    IMAGEN_TIMEOUT segundos; al agotar IMAGEN_MAX_INTENTOS quedan en ERROR.
+    """
+    vencidas = timezone.now() - timedelta(seconds=_config('IMAGEN_TIMEOUT', 300))
+    max_intentos = _config('IMAGEN_MAX_INTENTOS', 3)
+    UploadedFile.objects.filter(
+        estado_imagen='PROCESANDO', imagen_reclamada__lt=vencidas, imagen_intentos__gte=max_intentos,
+    ).update(estado_imagen='ERROR')
+
+    candidatas = (
+        UploadedFile.objects
+        .filter(imagen_intentos__lt=max_intentos)
+        .filter(Q(estado_imagen='PENDIENTE') | Q(estado_imagen='PROCESANDO', imagen_reclamada__lt=vencidas))
+        .order_by('id')
+        .values_list('id', 'estado_imagen', 'imagen_intentos')[:10]
+    )
+    for pk, estado, intentos in candidatas:
+        tomada = UploadedFile.objects.filter(
+            id=pk, estado_imagen=estado, imagen_intentos=intentos
+        ).update(
+            estado_imagen='PROCESANDO',
+            imagen_intentos=intentos + 1,
+            imagen_reclamada=timezone.now(),
+        )
+        if tomada:
+            return UploadedFile.objects.get(id=pk)
+    return None
+
+
+def procesar_imagenes_pendientes(detener=None):
+    procesadas = 0
+    while not (detener and detener.is_set()):
+        uploaded = reclamar_imagen()
+        if uploaded is None:
+            break
+        procesar_imagen(uploaded)
+        procesadas += 1
+    return procesadas
+
+
+pool_imagenes = ColaWorkerPool('imagen', procesar_imagenes_pendientes, 'IMAGEN_WORKERS')
+
+
+def encolar_imagen(uploaded):
+    """Marca la subida para optimizar si es una foto y despierta a los workers."""
+    if not _config('IMAGEN_OPTIMIZAR', True) or not es_imagen(uploaded.file.name):
+        return
+    UploadedFile.objects.filter(id=uploaded.id, estado_imagen='NO_APLICA').update(estado_imagen='PENDIENTE')
+    transaction.on_commit(pool_imagenes.despertar)
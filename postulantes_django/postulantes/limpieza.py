@@ -0,0 +1,169 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from .escritura import escritura
+from .models import Postulante, SubidaFragmentada, UploadedFile
+from .subidas import ruta_parcial
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_ARCHIVO = ('archivo_ci', 'archivo_no_militancia', 'archivo_hoja_de_vida', 'archivo_certificado_ofimatica')
+# Original y derivados de cada UploadedFile
+ARCHIVOS = ('file', 'archivo_optimizado', 'miniatura')
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def subidas_huerfanas(ttl_horas):
+    """UploadedFile sin usar desde hace más de `ttl_horas` y que ningún postulante referencia."""
+    limite = timezone.now() - timedelta(hours=ttl_horas)
+    referencia = Q()
+    for campo in CAMPOS_ARCHIVO:
+        referencia |= Q(**{campo: OuterRef('file')})
+    return (
+        UploadedFile.objects
+        .filter(uploaded_at__lt=limite)
+        .filter(~Exists(Postulante.objects.filter(referencia)))
+        .order_by('id')
+    )
+
+
+def parciales_huerfanos(limite):
+    """Rutas de los .part anteriores a `limite` sin una sesión ABIERTA.
+
+    Quedan si el proceso murió entre completar la sesión y borrar el archivo,
+    o si la sesión se borró sin pasar por la purga.
+    """
+    try:
+        entradas = list(os.scandir(settings.SUBIDA_DIR))
+    except FileNotFoundError:
+        return []
+    viejos = {}
+    for entrada in entradas:
+        nombre, extension = os.path.splitext(entrada.name)
+        if extension != '.part' or not entrada.is_file() or entrada.stat().st_mtime >= limite.timestamp():
+            continue
+        try:
+            viejos[uuid.UUID(nombre)] = entrada.path
+        except ValueError:
+            continue
+    abiertas = set(
+        SubidaFragmentada.objects.filter(estado='ABIERTA', id__in=list(viejos)).values_list('id', flat=True)
+    )
+    return [path for id_subida, path in viejos.items() if id_subida not in abiertas]
+
+
+def _tamano(storage, name):
+    try:
+        return storage.size(name)
+    except OSError:
+        return 0
+
+
+def purgar_subidas(ttl_horas=None, batch_size=500, dry_run=False):
+    """Borra por lotes las subidas huérfanas, las sesiones fragmentadas abandonadas
+    y los archivos parciales que ya no tienen sesión.
+
+    Devuelve un dict con archivos, sesiones, parciales y bytes liberados.
+    """
+    if ttl_horas is None:
+        ttl_horas = _config('SUBIDA_TTL_HORAS', 48)
+    storage = UploadedFile._meta.get_field('file').storage
+    resultado = {'archivos': 0, 'sesiones': 0, 'parciales': 0, 'bytes': 0}
+
+    ultimo_id = 0
+    while True:
+        lote = list(
+            subidas_huerfanas(ttl_horas).filter(id__gt=ultimo_id).values_list('id', *ARCHIVOS)[:batch_size]
+        )
+        if not lote:
+            break
+        ultimo_id = lote[-1][0]
+        if dry_run:
+            resultado['archivos'] += len(lote)
+            resultado['bytes'] += sum(_tamano(storage, name) for _, *names in lote for name in names if name)
+            continue
+
+        with escritura():
+            # Se vuelve a comprobar dentro de la transacción: un postulante pudo
+            # haberse registrado con alguno de estos archivos, o registrar_archivo
+            # reutilizarlo, mientras tanto. Las filas quedan bloqueadas hasta el commit
+            borrar = list(
+                subidas_huerfanas(ttl_horas).filter(id__in=[pk for pk, *_ in lote])
+                .select_for_update().values_list('id', *ARCHIVOS)
+            )
+            UploadedFile.objects.filter(id__in=[pk for pk, *_ in borrar]).delete()
+            # Los archivos se borran antes de confirmar: quien busque ese contenido
+            # espera al commit, no encuentra la fila y vuelve a guardarlo
+            for _, *names in borrar:
+                for name in filter(None, names):
+                    resultado['bytes'] += _tamano(storage, name)
+                    storage.delete(name)
+        resultado['archivos'] += len(borrar)
+
+    limite = timezone.now() - timedelta(hours=ttl_horas)
+    sesiones = SubidaFragmentada.objects.filter(estado='ABIERTA', fecha_actualizacion__lt=limite)
+    for subida in sesiones.iterator():
+        path = ruta_parcial(subida)
+        if os.path.exists(path):
+            resultado['bytes'] += os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+        resultado['sesiones'] += 1
+    if not dry_run:
+        sesiones.delete()
+
+    for path in parciales_huerfanos(limite):
+        resultado['bytes'] += os.path.getsize(path)
+        if not dry_run:
+            os.remove(path)
+        resultado['parciales'] += 1
+
+    return resultado
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class BarridoSubidas:
+    """Hilo local que ejecuta purgar_subidas cada SUBIDA_PURGA_INTERVALO segundos.
+
+    Se arranca la primera vez que se recibe una subida; con el intervalo en 0
+    queda desactivado y la limpieza se hace con `manage.py purge_uploads`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def iniciar(self):
+        if not _config('SUBIDA_PURGA_INTERVALO', 0):
+            return
+        with self._lock:
+            if self._hilo and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(target=self._bucle, name='barrido-subidas', daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            time.sleep(_config('SUBIDA_PURGA_INTERVALO', 0) or 3600)
+            close_old_connections()
+            try:
+                resultado = purgar_subidas()
+                if resultado['archivos'] or resultado['sesiones'] or resultado['parciales']:
+                    logger.info("Barrido de subidas: %s", resultado)
+            except Exception:
+                logger.exception("Error en barrido de subidas")
+            finally:
+                close_old_connections()
+
+
+barrido = BarridoSubidas()
@@ -0,0 +1,24 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def insertar_con_fechas(modelo, objetos, using=DEFAULT_DB_ALIAS, batch_size=None):
+    """Inserción masiva que conserva las fechas asignadas a mano (al copiar o generar filas).
+
+    bulk_create reemplaza por la hora actual los campos auto_now/auto_now_add
+    (los calcula su pre_save), y apagarlos en el Field afectaría a todos los
+    hilos que guardan ese modelo. Aquí cada lote se inserta en modo raw, como
+    hace loaddata: los valores se toman tal cual de los objetos, en un solo
+    INSERT por lote y sin un segundo UPDATE. Los objetos deben traer su id; no
+    se envían señales. Llamar dentro de una transacción.
+    """
+    campos = modelo._meta.local_concrete_fields
+    # El máximo de filas por INSERT que admite la base (límite de parámetros de SQLite)
+    maximo = max(connections[using].ops.bulk_batch_size(campos, objetos), 1)
+    batch_size = min(batch_size, maximo) if batch_size else maximo
+    queryset = modelo._default_manager.using(using)
+    for inicio in range(0, len(objetos), batch_size):
+        queryset._insert(objetos[inicio:inicio + batch_size], fields=campos, raw=True, using=using)
+    for objeto in objetos:
+        objeto._state.adding = False
+        objeto._state.db = using
+    return objetos
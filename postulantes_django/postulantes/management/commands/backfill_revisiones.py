@@ -0,0 +1,59 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from postulantes.models import Postulante, RevisionPostulante
+
+
+def recalcular_resumenes(postulante_ids):
+    """Recalcula total, última revisión y estado para un lote de postulantes."""
+    resumen = {pid: [0, None, 'SIN_REVISION'] for pid in postulante_ids}
+    revisiones = (
+        RevisionPostulante.objects
+        .filter(postulante_id__in=postulante_ids)
+        .order_by('postulante_id', '-fecha_revision', '-id')
+        .only('id', 'postulante_id', 'cumple_experiencia_especifica',
+              'cumple_no_militancia', 'cumple_bachiller_o_superior')
+    )
+    for rev in revisiones:
+        datos = resumen[rev.postulante_id]
+        if datos[0] == 0:
+            datos[1] = rev.id
+            datos[2] = rev.estado_general
+        datos[0] += 1
+
+    Postulante.objects.bulk_update(
+        [
+            Postulante(id=pid, total_revisiones=total, ultima_revision_id=ultima, estado_revision=estado)
+            for pid, (total, ultima, estado) in resumen.items()
+        ],
+        ['total_revisiones', 'ultima_revision', 'estado_revision'],
+    )
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen desnormalizado de revisiones de todos los postulantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Postulantes por lote')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        inicio = time.perf_counter()
+        total = 0
+        lote = []
+        ids = Postulante.objects.order_by('id').values_list('id', flat=True)
+        for pid in ids.iterator(chunk_size=batch_size):
+            lote.append(pid)
+            if len(lote) >= batch_size:
+                with transaction.atomic():
+                    recalcular_resumenes(lote)
+                total += len(lote)
+                lote = []
+        if lote:
+            with transaction.atomic():
+                recalcular_resumenes(lote)
+            total += len(lote)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Resumen de revisiones actualizado para {total} postulantes en {time.perf_counter() - inicio:.1f} s'
+        ))
@@ -0,0 +1,319 @@
+import io
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from PIL import Image
+from postulantes import metricas
+from postulantes.imagenes import pool_imagenes
+from postulantes.models import ConfiguracionSistema, Recinto
+from postulantes.sinteticos import DEPARTAMENTOS, datos_postulante, recintos_sinteticos
+from postulantes.tasks import pool
+
+API = '/api/postulantes/'
+
+
+def _percentil(ordenados, p):
+    # Rango más cercano: el valor por debajo del cual queda el p % de las muestras
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class Medidor:
+    """Acumula latencia, consultas y códigos de respuesta por endpoint (seguro entre hilos)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.muestras = {}
+        self.excepciones = {}
+
+    def registrar(self, endpoint, ms, consultas, codigo):
+        with self._lock:
+            self.muestras.setdefault(endpoint, []).append((ms, consultas, codigo))
+
+    def registrar_excepcion(self, exc):
+        """Postulante que no terminó su recorrido por una excepción (p. ej. `database is locked`)."""
+        clave = f'{type(exc).__name__}: {exc}'
+        with self._lock:
+            self.excepciones[clave] = self.excepciones.get(clave, 0) + 1
+
+    def resumen(self, duracion):
+        resultado = {}
+        for endpoint, muestras in sorted(self.muestras.items()):
+            tiempos = sorted(ms for ms, _, _ in muestras)
+            codigos = {}
+            for _, _, codigo in muestras:
+                codigos[str(codigo)] = codigos.get(str(codigo), 0) + 1
+            resultado[endpoint] = {
+                'peticiones': len(muestras),
+                'por_segundo': round(len(muestras) / duracion, 2),
+                'media_ms': round(statistics.mean(tiempos), 2),
+                'p50_ms': round(_percentil(tiempos, 50), 2),
+                'p95_ms': round(_percentil(tiempos, 95), 2),
+                'p99_ms': round(_percentil(tiempos, 99), 2),
+                'max_ms': round(tiempos[-1], 2),
+                'consultas_media': round(statistics.mean(c for _, c, _ in muestras), 2),
+                'consultas_max': max(c for _, c, _ in muestras),
+                'errores': sum(1 for _, _, codigo in muestras if codigo >= 500),
+                'codigos': codigos,
+            }
+        return resultado
+
+
+class PostulanteVirtual:
+    """Un postulante virtual que recorre el formulario como lo hace el front end."""
+
+    def __init__(self, medidor, rng, ci, recintos, archivos, duplicado):
+        self.medidor = medidor
+        self.rng = rng
+        self.ci = ci
+        self.recintos = recintos
+        self.archivos = archivos
+        self.duplicado = duplicado
+        # Una excepción en la vista se responde como 500 (y cuenta como error) en vez de propagarse
+        self.client = Client(raise_request_exception=False)
+
+    def _pedir(self, endpoint, metodo, url, **kwargs):
+        conexion = connections[DEFAULT_DB_ALIAS]
+        with CaptureQueriesContext(conexion) as consultas:
+            inicio = time.perf_counter()
+            try:
+                response = getattr(self.client, metodo)(url, **kwargs)
+                if response.streaming:
+                    # El tiempo incluye enviar el archivo completo
+                    b''.join(response.streaming_content)
+                    response.close()
+            except Exception:
+                # Falló fuera de la vista (middleware, streaming): cuenta como un 500
+                self.medidor.registrar(endpoint, (time.perf_counter() - inicio) * 1000, len(consultas), 500)
+                raise
+            ms = (time.perf_counter() - inicio) * 1000
+        self.medidor.registrar(endpoint, ms, len(consultas), response.status_code)
+        return response
+
+    def _subir(self, nombre, contenido):
+        archivo = SimpleUploadedFile(nombre, contenido)
+        response = self._pedir('upload', 'post', f'{API}upload/', data={'file': archivo})
+        return response.json().get('id') if response.status_code == 201 else None
+
+    def recorrer(self):
+        rng = self.rng
+        self._pedir('status', 'get', f'{API}status/')
+        self._pedir('recintos', 'get', f'{API}recintos/', HTTP_ACCEPT_ENCODING='gzip')
+        departamento = rng.choice(list(DEPARTAMENTOS))
+        self._pedir('recintos?departamento', 'get', f'{API}recintos/', data={'departamento': departamento})
+
+        datos = datos_postulante(rng, self.ci, self.recintos)
+        existe = {'cedula_identidad': self.ci, 'complemento': datos['complemento'] or ''}
+        self._pedir('existe', 'get', f'{API}existe/', data=existe)
+
+        # Foto del carnet (de un conjunto chico: también ejercita la deduplicación) y PDFs propios
+        foto = rng.choice(self.archivos)
+        formulario = {k: v for k, v in datos.items() if v is not None}
+        formulario['archivo_ci'] = self._subir('ci.jpg', foto)
+        formulario['archivo_curriculum'] = self._subir('cv.pdf', b'%PDF-1.4 cv ' + str(self.ci).encode() * 4096)
+        formulario['archivo_no_militancia'] = self._subir('nm.pdf', b'%PDF-1.4 nm ' + str(self.ci).encode() * 512)
+        formulario = {k: v for k, v in formulario.items() if v is not None}
+
+        response = self._pedir('registrar', 'post', API, data=formulario)
+        if self.duplicado:
+            # Doble clic en "Enviar": el segundo envío debe rechazarse sin error
+            self._pedir('registrar', 'post', API, data=formulario)
+        if response.status_code != 201:
+            return
+
+        self._pedir('existe', 'get', f'{API}existe/', data=existe)
+        for _ in range(50):
+            response = self._pedir('pdf', 'get', f'{API}pdf/{self.ci}/')
+            if response.status_code != 202:
+                break
+            time.sleep(0.1)
+
+
+class Command(BaseCommand):
+    help = ('Prueba de carga de la API de postulación sobre una base de datos temporal: '
+            'latencia p50/p95/p99, peticiones por segundo y consultas por endpoint')
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--postulantes', type=int, default=100, help='Postulantes virtuales')
+        parser.add_argument('-c', '--concurrencia', type=int, default=4, help='Postulantes en paralelo (hilos)')
+        parser.add_argument('--recintos', type=int, default=1500, help='Recintos sintéticos en la base temporal')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla de los datos generados')
+        parser.add_argument('--salida', help='Guardar el resultado en este archivo JSON')
+        parser.add_argument('--comparar', help='Resultado JSON de una corrida anterior para comparar')
+
+    def handle(self, *args, **options):
+        conexion = connections[DEFAULT_DB_ALIAS]
+        opciones = conexion.settings_dict['OPTIONS']
+        # Con varios hilos registrando a la vez, SQLite usa el mismo perfil que
+        # DB_SQLITE_CONCURRENCIA=1; sin él, los escritores fallan con `database is locked`
+        carril = conexion.vendor == 'sqlite' and options['concurrencia'] > 1
+        with tempfile.TemporaryDirectory() as directorio:
+            if conexion.vendor == 'sqlite':
+                # En archivo y no en memoria, para que los hilos compartan la base como en producción
+                conexion.settings_dict['TEST']['NAME'] = os.path.join(directorio, 'benchmark.sqlite3')
+            if carril:
+                conexion.settings_dict['OPTIONS'] = {**opciones, **settings.SQLITE_OPCIONES_CONCURRENCIA}
+            setup_test_environment()
+            # Los 400 esperados (envíos duplicados) no deben ensuciar la salida
+            logging.getLogger('django.request').setLevel(logging.ERROR)
+            nombre_original = conexion.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                with override_settings(
+                    MEDIA_ROOT=os.path.join(directorio, 'media'),
+                    SUBIDA_DIR=os.path.join(directorio, 'media', 'subidas_parciales'),
+                    PREVIEW_DIR=os.path.join(directorio, 'previews'),
+                    CACHES={'default': {
+                        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                        'LOCATION': os.path.join(directorio, 'cache'),
+                    }},
+                    METRICAS_DIR=os.path.join(directorio, 'metricas'),
+                    SQLITE_CARRIL_ESCRITURA=carril or settings.SQLITE_CARRIL_ESCRITURA,
+                ):
+                    try:
+                        resultado = self._ejecutar(options)
+                    finally:
+                        # Los workers escriben en MEDIA_ROOT: se detienen antes de
+                        # volver a los directorios reales
+                        pool.detener()
+                        pool_imagenes.detener()
+                        metricas.reiniciar()
+            finally:
+                connections.close_all()
+                conexion.creation.destroy_test_db(nombre_original, verbosity=0)
+                conexion.settings_dict['OPTIONS'] = opciones
+                teardown_test_environment()
+
+        self._reportar(resultado)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as f:
+                json.dump(resultado, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Resultado guardado en {options["salida"]}')
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as f:
+                self._comparar(json.load(f), resultado)
+
+    def _preparar(self, rng, cantidad_recintos):
+        Recinto.objects.bulk_create(recintos_sinteticos(rng, cantidad_recintos), batch_size=500)
+        ConfiguracionSistema.objects.update_or_create(id=1, defaults={'sistema_activo': True})
+        archivos = []
+        for _ in range(4):
+            # Fotos de celular: 12 MP en JPEG, con ruido para que no se compriman de más
+            img = Image.effect_noise((4000, 3000), rng.randint(20, 80)).convert('RGB')
+            buffer = io.BytesIO()
+            img.save(buffer, 'JPEG', quality=90)
+            archivos.append(buffer.getvalue())
+        return list(Recinto.objects.values_list('id', flat=True)), archivos
+
+    def _ejecutar(self, options):
+        rng = random.Random(options['semilla'])
+        recintos, archivos = self._preparar(rng, options['recintos'])
+        medidor = Medidor()
+
+        # Calentamiento (no se mide): imports, plantilla del PDF y cachés del proceso
+        PostulanteVirtual(Medidor(), random.Random(0), 1000000, recintos, archivos, False).recorrer()
+
+        postulantes = [
+            PostulanteVirtual(medidor, random.Random(f"{options['semilla']}-{i}"), 5000000 + i,
+                       recintos, archivos, duplicado=i % 20 == 0)
+            for i in range(options['postulantes'])
+        ]
+        pendientes = list(reversed(postulantes))
+        pendientes_lock = threading.Lock()
+
+        def trabajar():
+            try:
+                while True:
+                    with pendientes_lock:
+                        if not pendientes:
+                            return
+                        postulante = pendientes.pop()
+                    try:
+                        postulante.recorrer()
+                    except Exception as exc:
+                        # Se informa y el hilo sigue con el próximo postulante
+                        medidor.registrar_excepcion(exc)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=trabajar) for _ in range(max(options['concurrencia'], 1))]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        endpoints = medidor.resumen(duracion)
+        total = sum(e['peticiones'] for e in endpoints.values())
+        return {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit(),
+            'base_de_datos': connections[DEFAULT_DB_ALIAS].vendor,
+            'carril_escritura': settings.SQLITE_CARRIL_ESCRITURA,
+            'parametros': {
+                'postulantes': options['postulantes'],
+                'concurrencia': options['concurrencia'],
+                'recintos': options['recintos'],
+                'semilla': options['semilla'],
+            },
+            'duracion_s': round(duracion, 2),
+            'peticiones': total,
+            'por_segundo': round(total / duracion, 2),
+            'endpoints': endpoints,
+            'excepciones': medidor.excepciones,
+        }
+
+    def _reportar(self, resultado):
+        self.stdout.write(
+            f"{'endpoint':<24}{'n':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'consultas':>11}{'5xx':>6}"
+        )
+        for endpoint, e in resultado['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<24}{e['peticiones']:>6}{e['por_segundo']:>9.1f}{e['p50_ms']:>10.1f}"
+                f"{e['p95_ms']:>10.1f}{e['p99_ms']:>10.1f}{e['consultas_media']:>11.1f}{e['errores']:>6}"
+            )
+        for excepcion, cantidad in resultado['excepciones'].items():
+            self.stdout.write(self.style.ERROR(f'{cantidad} postulantes interrumpidos por {excepcion}'))
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['peticiones']} peticiones en {resultado['duracion_s']} s "
+            f"({resultado['por_segundo']} req/s, commit {resultado['commit'] or '?'})"
+        ))
+
+    def _comparar(self, anterior, actual):
+        self.stdout.write(f"\nComparación con {anterior.get('commit') or '?'} ({anterior.get('fecha')}):")
+        if anterior.get('parametros') != actual['parametros']:
+            self.stdout.write(self.style.WARNING('Los parámetros de las corridas no coinciden'))
+        for endpoint, e in actual['endpoints'].items():
+            previo = anterior.get('endpoints', {}).get(endpoint)
+            if not previo:
+                continue
+            cambio = (e['p95_ms'] - previo['p95_ms']) / previo['p95_ms'] * 100 if previo['p95_ms'] else 0
+            estilo = self.style.ERROR if cambio > 10 else self.style.SUCCESS if cambio < -10 else str
+            self.stdout.write(estilo(
+                f"{endpoint:<24}p95 {previo['p95_ms']:>8.1f} → {e['p95_ms']:>8.1f} ms ({cambio:+.0f} %)   "
+                f"consultas {previo['consultas_media']:.1f} → {e['consultas_media']:.1f}"
+            ))
@@ -0,0 +1,113 @@
+import os
+import statistics
+import tempfile
+import time
+from datetime import date
+from io import BytesIO
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from postulantes.models import Postulante, Recinto
+from postulantes.utils import (
+    generate_pdf, get_plantilla, generate_qr, generate_qr_matrix, draw_qr,
+    QR_X, QR_Y, QR_SIZE,
+)
+
+class Command(BaseCommand):
+    help = 'Mide la latencia y el tamaño de los comprobantes PDF (plantilla precargada y QR en memoria)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--iteraciones', type=int, default=50, help='PDFs a generar por escenario')
+        parser.add_argument('--qr', action='store_true', help='Medir solo la generación y el dibujo del QR')
+
+    def _postulante(self):
+        # Postulante en memoria: el benchmark no toca la base de datos
+        return Postulante(
+            nombre='María Fernanda', apellido_paterno='Quispe', apellido_materno='Mamani',
+            fecha_nacimiento=date(1995, 5, 17), cedula_identidad=9876543, complemento='1A',
+            expedicion='LP', grado_instruccion='LICENCIATURA', carrera='Ingeniería de Sistemas',
+            ciudad='La Paz', zona='Sopocachi', calle_avenida='Av. 6 de Agosto', numero_domicilio='2450',
+            email='maria.quispe@example.com', celular=71234567, telefono=2412345,
+            cargo_postulacion='Notario Electoral', experiencia_general='SI', experiencia_especifica='3',
+            es_boliviano=True, registrado_en_padron_electoral=True, ci_vigente=True,
+            recinto_primera_opcion=Recinto(nombre='U. E. Ayacucho', codigo='0', municipio='Nuestra Señora de La Paz'),
+        )
+
+    def _medir(self, postulante, iteraciones, **kwargs):
+        tiempos = []
+        tamanos = []
+        for _ in range(iteraciones):
+            inicio = time.perf_counter()
+            filename = generate_pdf(postulante, **kwargs)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            tamanos.append(os.path.getsize(os.path.join(self.media_root, 'comprobantes', filename)))
+        return tiempos, tamanos
+
+    def _reportar(self, nombre, tiempos, tamanos):
+        tiempos = sorted(tiempos)
+        p95 = tiempos[int(len(tiempos) * 0.95) - 1] if len(tiempos) > 1 else tiempos[0]
+        self.stdout.write(
+            f'{nombre:<18} media {statistics.mean(tiempos):8.2f} ms   '
+            f'p50 {statistics.median(tiempos):8.2f} ms   p95 {p95:8.2f} ms   '
+            f'tamaño {statistics.mean(tamanos) / 1024:7.1f} KB'
+        )
+
+    def _medir_qr(self, postulante, iteraciones, vectorial):
+        datos = {
+            "cedula_identidad": postulante.cedula_identidad,
+            "complemento": postulante.complemento,
+            "nombre": postulante.nombre,
+            "fecha_nacimiento": postulante.fecha_nacimiento,
+        }
+        tiempos = []
+        tamanos = []
+        for _ in range(iteraciones):
+            buffer = BytesIO()
+            c = canvas.Canvas(buffer, pagesize=A4)
+            inicio = time.perf_counter()
+            if vectorial:
+                draw_qr(c, generate_qr_matrix(datos), QR_X, QR_Y, QR_SIZE)
+            else:
+                qr_path = generate_qr(datos, postulante.cedula_identidad)
+                c.drawImage(qr_path, QR_X, QR_Y, width=QR_SIZE, height=QR_SIZE)
+                os.remove(qr_path)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            c.save()
+            tamanos.append(len(buffer.getvalue()))
+        return tiempos, tamanos
+
+    def handle(self, *args, **options):
+        iteraciones = options['iteraciones']
+        postulante = self._postulante()
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            self.media_root = media_root
+
+            if options['qr']:
+                self._medir_qr(postulante, 1, vectorial=False)
+                resultados = [
+                    ('QR en disco', self._medir_qr(postulante, iteraciones, vectorial=False)),
+                    ('QR vectorial', self._medir_qr(postulante, iteraciones, vectorial=True)),
+                ]
+            else:
+                inicio = time.perf_counter()
+                get_plantilla()
+                self.stdout.write(f'Construcción de la plantilla: {(time.perf_counter() - inicio) * 1000:.2f} ms (una vez por proceso)')
+
+                # Calentamiento para no medir imports ni cachés de fuentes
+                generate_pdf(postulante, usar_plantilla=False, qr_vectorial=False)
+                generate_pdf(postulante)
+
+                resultados = [
+                    ('sin optimizar', self._medir(postulante, iteraciones, usar_plantilla=False, qr_vectorial=False)),
+                    ('con plantilla', self._medir(postulante, iteraciones, qr_vectorial=False)),
+                    ('plantilla + QR', self._medir(postulante, iteraciones)),
+                ]
+
+        for nombre, (tiempos, tamanos) in resultados:
+            self._reportar(nombre, tiempos, tamanos)
+
+        base = statistics.mean(resultados[0][1][0])
+        nuevo = statistics.mean(resultados[-1][1][0])
+        self.stdout.write(self.style.SUCCESS(f'Aceleración: {base / nuevo:.2f}x'))
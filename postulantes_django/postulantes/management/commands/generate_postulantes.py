@@ -0,0 +1,144 @@
+import random
+import time
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from postulantes.caching import invalidar_configuracion
+from postulantes.lotes import insertar_con_fechas
+from postulantes.models import CupoCargo, Postulante, Recinto, RevisionPostulante
+from postulantes.sinteticos import datos_postulante
+from postulantes.subidas import registrar_archivo
+
+ARCHIVOS = ['archivo_ci', 'archivo_no_militancia', 'archivo_hoja_de_vida', 'archivo_certificado_ofimatica']
+CUMPLIMIENTO = ['CUMPLE', 'CUMPLE', 'CUMPLE', 'NO_CUMPLE', 'NO_REVISADO']
+
+
+class Command(BaseCommand):
+    help = ('Crea postulantes ficticios (con revisiones y, opcionalmente, archivos) para pruebas de volumen. '
+            'No usar mientras el sistema recibe registros reales.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('cantidad', type=int, help='Postulantes a crear')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Postulantes por lote y por transacción')
+        parser.add_argument('--semilla', type=int, default=None, help='Semilla para repetir exactamente los datos')
+        parser.add_argument('--revisados', type=float, default=0.3,
+                            help='Fracción de postulantes con historial de revisiones (0 a 1)')
+        parser.add_argument('--dias', type=int, default=30, help='Días hacia atrás en los que se reparten los registros')
+        parser.add_argument('--archivos', action='store_true',
+                            help='Adjuntar documentos ficticios (unos pocos archivos compartidos por todos)')
+
+    def handle(self, *args, **options):
+        cantidad = options['cantidad']
+        batch_size = max(options['batch_size'], 1)
+        if cantidad <= 0:
+            raise CommandError('La cantidad debe ser mayor que cero')
+        rng = random.Random(options['semilla'])
+
+        recintos = list(Recinto.objects.values_list('id', flat=True))
+        if not recintos:
+            self.stderr.write(self.style.WARNING('No hay recintos; los postulantes quedarán sin recinto (ver import_recintos)'))
+        revisores = list(User.objects.filter(is_staff=True).values_list('id', flat=True)) or [None]
+        documentos = self._documentos() if options['archivos'] else {}
+
+        # Los ids se asignan aquí para enlazar postulante y última revisión sin un
+        # UPDATE posterior; las claves foráneas se verifican al confirmar cada lote
+        siguiente_postulante = (Postulante.objects.aggregate(m=Max('id'))['m'] or 0) + 1
+        siguiente_revision = (RevisionPostulante.objects.aggregate(m=Max('id'))['m'] or 0) + 1
+        # Cédulas nuevas a partir de la mayor registrada, con saltos como en la numeración real
+        ci = max(Postulante.objects.aggregate(m=Max('cedula_identidad'))['m'] or 0, 1000000)
+
+        ahora = timezone.now()
+        desde = ahora - timedelta(days=max(options['dias'], 1))
+        segundos = (ahora - desde).total_seconds()
+
+        inicio = time.perf_counter()
+        creados = revisiones_creadas = 0
+        while creados < cantidad:
+            postulantes, revisiones = [], []
+            anterior = None
+            for _ in range(min(batch_size, cantidad - creados)):
+                if anterior and anterior.cedula_identidad == ci and rng.random() < 0.02:
+                    # Cédula duplicada en el SEGIP: mismo número, otro complemento. Las letras
+                    # no se cruzan con las de sinteticos.complemento, así el par nunca se repite
+                    datos = datos_postulante(rng, ci, recintos)
+                    datos['complemento'] = f'{rng.randint(1, 9)}{rng.choice("LMNPQRSTUV")}'
+                    ci += 1  # Como mucho un duplicado por cédula
+                else:
+                    ci += rng.randint(1, 40)
+                    datos = datos_postulante(rng, ci, recintos)
+                datos['recinto_primera_opcion_id'] = datos.pop('recinto_primera_opcion', None)
+                datos['recinto_segunda_opcion_id'] = datos.pop('recinto_segunda_opcion', None)
+                for campo, nombre in documentos.items():
+                    datos[campo] = nombre
+
+                registro = desde + timedelta(seconds=rng.random() * segundos)
+                postulante = Postulante(id=siguiente_postulante, fecha_registro=registro, **datos)
+                siguiente_postulante += 1
+                if rng.random() < options['revisados']:
+                    historial = self._revisiones(rng, postulante, revisores, siguiente_revision, ahora)
+                    siguiente_revision += len(historial)
+                    revisiones.extend(historial)
+                postulantes.append(postulante)
+                anterior = postulante
+
+            with transaction.atomic():
+                insertar_con_fechas(Postulante, postulantes)
+                insertar_con_fechas(RevisionPostulante, revisiones)
+            creados += len(postulantes)
+            revisiones_creadas += len(revisiones)
+            duracion = time.perf_counter() - inicio
+            self.stdout.write(f'{creados}/{cantidad} postulantes ({creados / duracion:,.0f} por segundo)')
+
+        self._ajustar_secuencias()
+        self._recontar_cupos()
+        self.stdout.write(self.style.SUCCESS(
+            f'{creados} postulantes y {revisiones_creadas} revisiones creados en {time.perf_counter() - inicio:.1f} s'
+        ))
+
+    def _revisiones(self, rng, postulante, revisores, siguiente_id, ahora):
+        """Entre una y tres revisiones posteriores al registro; la última define el resumen."""
+        historial = []
+        fecha = postulante.fecha_registro
+        for i in range(rng.choice((1, 1, 1, 2, 2, 3))):
+            fecha = min(fecha + timedelta(hours=rng.uniform(1, 96)), ahora)
+            historial.append(RevisionPostulante(
+                id=siguiente_id + i,
+                postulante_id=postulante.id,
+                revisado_por_id=rng.choice(revisores),
+                fecha_revision=fecha,
+                cumple_experiencia_especifica=rng.choice(CUMPLIMIENTO),
+                cumple_no_militancia=rng.choice(CUMPLIMIENTO),
+                cumple_bachiller_o_superior=rng.choice(CUMPLIMIENTO),
+            ))
+        ultima = historial[-1]
+        # Lo mismo que mantienen las señales de RevisionPostulante (bulk_create no las dispara)
+        postulante.total_revisiones = len(historial)
+        postulante.ultima_revision_id = ultima.id
+        postulante.estado_revision = ultima.estado_general
+        return historial
+
+    def _documentos(self):
+        """Un PDF ficticio por tipo de documento, guardado una vez y compartido por todos."""
+        documentos = {}
+        for campo in ARCHIVOS:
+            contenido = ContentFile(f'%PDF-1.4\n% documento ficticio: {campo}\n%%EOF\n'.encode())
+            uploaded, _ = registrar_archivo(f'{campo}.pdf', contenido)
+            documentos[campo] = uploaded.file.name
+        return documentos
+
+    def _ajustar_secuencias(self):
+        # Las filas se insertaron con id explícito: en PostgreSQL la secuencia debe alcanzarlas
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Postulante, RevisionPostulante]):
+                cursor.execute(sql)
+
+    def _recontar_cupos(self):
+        for cupo in CupoCargo.objects.all():
+            cupo.ocupados = Postulante.objects.filter(cargo_postulacion=cupo.cargo_postulacion).count()
+            cupo.save(update_fields=['ocupados'])
+        invalidar_configuracion()
@@ -1,51 +1,144 @@
 import csv
 import os
+import time
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from postulantes.caching import invalidar_recintos
 from postulantes.models import Recinto
 
+# CSV column -> model field (codigo is the natural key)
+COLUMNAS = {
+    'Nombre': 'nombre',
+    'Departamento': 'departamento',
+    'Provincia': 'provincia',
+    'Municipio': 'municipio',
+    'Asiento': 'asiento',
+    'Zona': 'zona',
+    'Longitud': 'longitud',
+    'Latitud': 'latitud',
+}
+CAMPOS = list(COLUMNAS.values())
+
+
+def _parse_float(valor):
+    # Parse float values, handling empty or malformed strings
+    try:
+        return float(valor) if valor else None
+    except ValueError:
+        return None
+
+
+def _lotes(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
 class Command(BaseCommand):
-    help = 'Import recintos from CSV'
+    help = 'Import recintos from CSV (bulk upsert keyed by Código)'
 
     def add_arguments(self, parser):
         parser.add_argument('csv_file', type=str, help='Path to the CSV file')
+        parser.add_argument('--dry-run', action='store_true', help='Report the diff without writing anything')
+        parser.add_argument('--delete-missing', action='store_true',
+                            help='Delete recintos whose código is not in the CSV')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per query and per transaction')
+
+    def _leer_csv(self, csv_path):
+        """Streams the CSV into {codigo: {campo: valor}}; later rows win on duplicate códigos."""
+        filas = {}
+        with open(csv_path, mode='r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                try:
+                    codigo = row['Código']
+                    if not codigo:
+                        raise ValueError('empty Código')
+                    datos = {campo: row[columna] for columna, campo in COLUMNAS.items()}
+                    datos['longitud'] = _parse_float(datos['longitud'])
+                    datos['latitud'] = _parse_float(datos['latitud'])
+                    filas[codigo] = datos
+                except Exception as e:
+                    self.stderr.write(self.style.ERROR(f'Error importing row {row.get("Código", "unknown")}: {e}'))
+        return filas
+
+    def _diff(self, filas):
+        existentes = {
+            codigo: (pk, dict(zip(CAMPOS, valores)))
+            for codigo, pk, *valores in Recinto.objects.values_list('codigo', 'pk', *CAMPOS).iterator()
+        }
+        nuevos, cambios, sin_cambios = [], [], 0
+        for codigo, datos in filas.items():
+            actual = existentes.get(codigo)
+            if actual is None:
+                nuevos.append(Recinto(codigo=codigo, **datos))
+                continue
+            pk, valores = actual
+            diferencias = {campo: (valores[campo], datos[campo]) for campo in CAMPOS if valores[campo] != datos[campo]}
+            if diferencias:
+                cambios.append((Recinto(pk=pk, codigo=codigo, **datos), diferencias))
+            else:
+                sin_cambios += 1
+        faltantes = sorted(set(existentes) - set(filas))
+        return nuevos, cambios, sin_cambios, faltantes
+
+    def _reportar(self, nuevos, cambios, faltantes, limite=20):
+        for recinto in nuevos[:limite]:
+            self.stdout.write(f'  + {recinto.codigo} {recinto.nombre}')
+        for recinto, diferencias in cambios[:limite]:
+            detalle = ', '.join(f'{campo}: {antes!r} -> {despues!r}' for campo, (antes, despues) in diferencias.items())
+            self.stdout.write(f'  ~ {recinto.codigo} {detalle}')
+        for codigo in faltantes[:limite]:
+            self.stdout.write(f'  - {codigo}')
+        if max(len(nuevos), len(cambios), len(faltantes)) > limite:
+            self.stdout.write(f'  (showing at most {limite} per category)')
 
     def handle(self, *args, **options):
         csv_path = options['csv_file']
         if not os.path.exists(csv_path):
             self.stderr.write(self.style.ERROR(f'File "{csv_path}" does not exist'))
             return
+        batch_size = max(options['batch_size'], 1)
 
-        with open(csv_path, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            count = 0
-            for row in reader:
-                try:
-                    # Parse float values, handling empty or malformed strings
-                    try:
-                        longitud = float(row['Longitud']) if row['Longitud'] else None
-                    except ValueError:
-                        longitud = None
-                        
-                    try:
-                        latitud = float(row['Latitud']) if row['Latitud'] else None
-                    except ValueError:
-                        latitud = None
-
-                    Recinto.objects.update_or_create(
-                        codigo=row['Código'],
-                        defaults={
-                            'nombre': row['Nombre'],
-                            'departamento': row['Departamento'],
-                            'provincia': row['Provincia'],
-                            'municipio': row['Municipio'],
-                            'asiento': row['Asiento'],
-                            'zona': row['Zona'],
-                            'longitud': longitud,
-                            'latitud': latitud,
-                        }
-                    )
-                    count += 1
-                except Exception as e:
-                    self.stderr.write(self.style.ERROR(f'Error importing row {row.get("Código", "unknown")}: {e}'))
+        inicio = time.perf_counter()
+        filas = self._leer_csv(csv_path)
+        t_lectura = time.perf_counter()
+        nuevos, cambios, sin_cambios, faltantes = self._diff(filas)
+        t_diff = time.perf_counter()
+
+        borrar = faltantes if options['delete_missing'] else []
+        self.stdout.write(
+            f'{len(filas)} rows: {len(nuevos)} new, {len(cambios)} changed, {sin_cambios} unchanged, '
+            f'{len(faltantes)} missing from CSV' + ('' if options['delete_missing'] else ' (kept)')
+        )
+        if options['dry_run']:
+            self._reportar(nuevos, cambios, borrar)
+            self.stdout.write(self.style.WARNING('Dry run: no changes written'))
+            return
+
+        for lote in _lotes(nuevos, batch_size):
+            with transaction.atomic():
+                # Upsert: a código inserted concurrently since the diff is updated instead of failing
+                Recinto.objects.bulk_create(
+                    lote, update_conflicts=True, unique_fields=['codigo'], update_fields=CAMPOS,
+                )
+        for lote in _lotes([recinto for recinto, _ in cambios], batch_size):
+            with transaction.atomic():
+                Recinto.objects.bulk_update(lote, CAMPOS)
+        if borrar:
+            self.stdout.write(self.style.WARNING(
+                f'Deleting {len(borrar)} recintos; postulantes that chose them keep an empty option'
+            ))
+        for lote in _lotes(borrar, batch_size):
+            with transaction.atomic():
+                Recinto.objects.filter(codigo__in=lote).delete()
+        t_escritura = time.perf_counter()
 
-        self.stdout.write(self.style.SUCCESS(f'Successfully imported {count} recintos'))
+        if nuevos or cambios or borrar:
+            invalidar_recintos()
+        self.stdout.write(
+            f'Timing: read {t_lectura - inicio:.2f}s, diff {t_diff - t_lectura:.2f}s, '
+            f'write {t_escritura - t_diff:.2f}s'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully imported {len(filas)} recintos '
+            f'({len(nuevos)} created, {len(cambios)} updated, {len(borrar)} deleted)'
+        ))
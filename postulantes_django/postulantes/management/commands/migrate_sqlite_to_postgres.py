@@ -0,0 +1,151 @@
+import time
+from itertools import islice
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from postulantes.lotes import insertar_con_fechas
+
+ORIGEN = 'sqlite_origen'
+
+# En orden de dependencias. Postulante.ultima_revision apunta a una revisión que
+# se copia después: las claves foráneas se verifican al confirmar la transacción.
+MODELOS = [
+    'auth.Group',
+    'auth.User',
+    'postulantes.Recinto',
+    'postulantes.UploadedFile',
+    'postulantes.ConfiguracionSistema',
+    'postulantes.CupoCargo',
+    'postulantes.Postulante',
+    'postulantes.RevisionPostulante',
+]
+
+
+def registrar_origen(ruta):
+    """Agrega la base SQLite de origen como una conexión más (sin tocar DATABASES)."""
+    configurado = connections.configure_settings({
+        DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+        ORIGEN: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(ruta)},
+    })
+    connections.settings[ORIGEN] = configurado[ORIGEN]
+
+
+def relaciones(modelos):
+    """Tablas intermedias de los ManyToMany de `modelos` (Group.permissions, User.groups, ...)."""
+    return [
+        campo.remote_field.through
+        for modelo in modelos
+        for campo in modelo._meta.local_many_to_many
+        if campo.remote_field.through._meta.auto_created
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Copia los datos de la base SQLite a la base PostgreSQL configurada (DB_ENGINE=postgresql)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sqlite', default=str(settings.BASE_DIR / 'db.sqlite3'),
+                            help='Archivo SQLite de origen (por defecto db.sqlite3)')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Conexión de destino')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Filas leídas e insertadas por lote')
+
+    def handle(self, *args, **options):
+        destino = options['database']
+        if connections[destino].vendor != 'postgresql':
+            raise CommandError(
+                f'La conexión "{destino}" usa {connections[destino].vendor}; '
+                'configure DB_ENGINE=postgresql y ejecute `migrate` antes de copiar.'
+            )
+        registrar_origen(options['sqlite'])
+
+        inicio = time.perf_counter()
+        self.copiar(ORIGEN, destino, max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(
+            f'Migración completada en {time.perf_counter() - inicio:.1f} s'
+        ))
+
+    def copiar(self, origen, destino, batch_size):
+        """Copia MODELOS y sus ManyToMany de `origen` a `destino` y verifica los totales."""
+        modelos = [apps.get_model(nombre) for nombre in MODELOS]
+        intermedias = relaciones(modelos)
+
+        ocupadas = [m._meta.label for m in modelos + intermedias if m._default_manager.using(destino).exists()]
+        if ocupadas:
+            raise CommandError(f'El destino ya tiene datos en: {", ".join(ocupadas)}')
+
+        # Filas que debe tener el destino; en las intermedias, sin los permisos omitidos
+        esperadas = {}
+        # Una sola transacción: si algo falla, el destino queda vacío y se puede reintentar
+        with transaction.atomic(using=destino):
+            for modelo in modelos:
+                total = self._copiar(modelo, origen, destino, batch_size)
+                self.stdout.write(f'{modelo._meta.label}: {total} filas')
+                esperadas[modelo] = modelo._default_manager.using(origen).count()
+            for intermedia in intermedias:
+                esperadas[intermedia] = self._copiar_relacion(intermedia, origen, destino, batch_size)
+                self.stdout.write(f'{intermedia._meta.db_table}: {esperadas[intermedia]} filas')
+            self._reiniciar_secuencias(modelos + intermedias, destino)
+
+        for modelo, cantidad in esperadas.items():
+            copiadas = modelo._default_manager.using(destino).count()
+            if cantidad != copiadas:
+                raise CommandError(f'{modelo._meta.label}: {cantidad} filas en origen y {copiadas} en destino')
+
+    def _copiar(self, modelo, origen, destino, batch_size):
+        # Lectura en streaming por lotes: la memoria no crece con el tamaño de la tabla
+        filas = modelo._default_manager.using(origen).order_by('pk').iterator(chunk_size=batch_size)
+        total = 0
+        while lote := list(islice(filas, batch_size)):
+            insertar_con_fechas(modelo, lote, using=destino)
+            total += len(lote)
+        return total
+
+    def _copiar_relacion(self, intermedia, origen, destino, batch_size):
+        """Copia una tabla intermedia; devuelve las filas copiadas.
+
+        Los permisos los crea `migrate` en el destino con sus propios id, así que
+        se traducen por (app, modelo, codename). Los que no existen en el destino
+        (de una app ya desinstalada) se omiten con un aviso.
+        """
+        desde, hacia = [f for f in intermedia._meta.fields if f.is_relation]
+        traducir = self._mapa_permisos(origen, destino) if hacia.related_model is Permission else None
+        filas = (
+            intermedia._default_manager.using(origen)
+            .order_by('pk').values_list(desde.attname, hacia.attname).iterator(chunk_size=batch_size)
+        )
+        total = omitidas = 0
+        while lote := list(islice(filas, batch_size)):
+            objetos = []
+            for id_desde, id_hacia in lote:
+                if traducir is not None:
+                    id_hacia = traducir.get(id_hacia)
+                    if id_hacia is None:
+                        omitidas += 1
+                        continue
+                objetos.append(intermedia(**{desde.attname: id_desde, hacia.attname: id_hacia}))
+            intermedia._default_manager.using(destino).bulk_create(objetos)
+            total += len(objetos)
+        if omitidas:
+            self.stderr.write(self.style.WARNING(
+                f'{intermedia._meta.db_table}: {omitidas} filas omitidas por permisos que no existen en el destino'
+            ))
+        return total
+
+    def _mapa_permisos(self, origen, destino):
+        natural = ('content_type__app_label', 'content_type__model', 'codename')
+        en_destino = {tuple(clave): pk for *clave, pk in Permission.objects.using(destino).values_list(*natural, 'pk')}
+        return {
+            pk: en_destino[tuple(clave)]
+            for *clave, pk in Permission.objects.using(origen).values_list(*natural, 'pk')
+            if tuple(clave) in en_destino
+        }
+
+    def _reiniciar_secuencias(self, modelos, destino):
+        # Las filas se insertan con su id original: las secuencias deben seguir al id máximo
+        conexion = connections[destino]
+        with conexion.cursor() as cursor:
+            for sql in conexion.ops.sequence_reset_sql(no_style(), modelos):
+                cursor.execute(sql)
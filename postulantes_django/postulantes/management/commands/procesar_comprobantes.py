@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from postulantes.tasks import procesar_pendientes
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de comprobantes PDF pendientes (worker dedicado)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Vaciar la cola una vez y terminar')
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre revisiones de la cola')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Worker de comprobantes iniciado')
+        total = 0
+        try:
+            while True:
+                procesadas = procesar_pendientes()
+                if procesadas:
+                    total += procesadas
+                    self.stdout.write(f'{procesadas} comprobantes generados (total: {total})')
+                if options['once']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'Worker detenido. Comprobantes generados: {total}'))
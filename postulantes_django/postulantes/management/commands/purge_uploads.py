@@ -0,0 +1,29 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from postulantes.limpieza import purgar_subidas
+
+
+class Command(BaseCommand):
+    help = 'Borra las subidas temporales que ningún postulante usa y las sesiones fragmentadas abandonadas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl-horas', type=float, default=None,
+                            help=f'Antigüedad mínima (por defecto SUBIDA_TTL_HORAS = {getattr(settings, "SUBIDA_TTL_HORAS", 48)})')
+        parser.add_argument('--batch-size', type=int, default=500, help='Registros borrados por transacción')
+        parser.add_argument('--dry-run', action='store_true', help='Solo informar lo que se borraría')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resultado = purgar_subidas(
+            ttl_horas=options['ttl_horas'],
+            batch_size=max(options['batch_size'], 1),
+            dry_run=options['dry_run'],
+        )
+        duracion = time.perf_counter() - inicio
+        accion = 'Se borrarían' if options['dry_run'] else 'Borrados'
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} {resultado['archivos']} archivos, {resultado['sesiones']} sesiones fragmentadas y "
+            f"{resultado['parciales']} archivos parciales sin sesión; "
+            f"{resultado['bytes'] / (1024 * 1024):.1f} MB liberados en {duracion:.1f} s"
+        ))
@@ -0,0 +1,154 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from postulantes.models import Postulante
+
+
+def _init_worker():
+    # Con 'spawn'/'forkserver' el proceso hijo arranca sin Django configurado
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _noop(_):
+    return None
+
+
+def _render(postulante):
+    """Se ejecuta en el proceso hijo: no consulta la base de datos."""
+    from postulantes.utils import generate_pdf
+    try:
+        generate_pdf(postulante)
+        return postulante.id, None
+    except Exception as e:
+        return postulante.id, f"{postulante.cedula_identidad}: {e}"
+
+
+class Command(BaseCommand):
+    help = 'Regenera los comprobantes PDF en paralelo (usa todos los núcleos y se puede reanudar)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=str, help='Fecha de registro inicial (YYYY-MM-DD)')
+        parser.add_argument('--hasta', type=str, help='Fecha de registro final, inclusive (YYYY-MM-DD)')
+        parser.add_argument('--cargo', action='append', help='Cargo de postulación (se puede repetir)')
+        parser.add_argument('--ci', nargs='+', type=int, help='Lista de cédulas de identidad')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Procesos de renderizado')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Filas leídas por consulta y por lote')
+        parser.add_argument('--reanudar', action='store_true', help='Continuar desde el último lote completado')
+        parser.add_argument('--estado', type=str, help='Archivo de control para reanudar')
+
+    def _parse_fecha(self, valor, nombre):
+        try:
+            return datetime.strptime(valor, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'{nombre} debe tener el formato YYYY-MM-DD')
+
+    def _queryset(self, options):
+        qs = Postulante.objects.select_related('recinto_primera_opcion').order_by('id')
+        if options['desde']:
+            qs = qs.filter(fecha_registro__date__gte=self._parse_fecha(options['desde'], '--desde'))
+        if options['hasta']:
+            qs = qs.filter(fecha_registro__date__lte=self._parse_fecha(options['hasta'], '--hasta'))
+        if options['cargo']:
+            qs = qs.filter(cargo_postulacion__in=options['cargo'])
+        if options['ci']:
+            qs = qs.filter(cedula_identidad__in=options['ci'])
+        return qs
+
+    def _leer_estado(self, path, filtros):
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding='utf-8') as f:
+            estado = json.load(f)
+        if estado.get('filtros') != filtros:
+            raise CommandError(
+                f'El archivo de control {path} corresponde a otros filtros; '
+                'ejecute sin --reanudar para empezar de nuevo'
+            )
+        return estado.get('ultimo_id', 0)
+
+    def _guardar_estado(self, path, filtros, ultimo_id, procesados):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'filtros': filtros,
+                'ultimo_id': ultimo_id,
+                'procesados': procesados,
+                'actualizado': datetime.now().isoformat(),
+            }, f)
+
+    def handle(self, *args, **options):
+        filtros = {k: options[k] for k in ('desde', 'hasta', 'cargo', 'ci')}
+        estado_path = options['estado'] or os.path.join(settings.MEDIA_ROOT, 'regenerar_comprobantes.json')
+        os.makedirs(os.path.dirname(os.path.abspath(estado_path)), exist_ok=True)
+        chunk_size = max(options['chunk_size'], 1)
+
+        qs = self._queryset(options)
+        ultimo_id = self._leer_estado(estado_path, filtros) if options['reanudar'] else 0
+        if ultimo_id:
+            self.stdout.write(f'Reanudando desde el postulante id > {ultimo_id}')
+            qs = qs.filter(id__gt=ultimo_id)
+
+        total = qs.count()
+        self.stdout.write(f'Comprobantes a regenerar: {total}')
+        if not total:
+            return
+
+        # Las conexiones abiertas no deben heredarse en los procesos hijos
+        connections.close_all()
+
+        procesados = 0
+        errores = 0
+        inicio = time.perf_counter()
+        self.workers = max(options['workers'], 1)
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as executor:
+            # Arrancar los procesos antes de abrir el cursor del iterador
+            list(executor.map(_noop, range(self.workers)))
+            lote = []
+            for postulante in qs.iterator(chunk_size=chunk_size):
+                lote.append(postulante)
+                if len(lote) >= chunk_size:
+                    procesados, errores = self._procesar_lote(
+                        executor, lote, procesados, errores, total, inicio, estado_path, filtros
+                    )
+                    lote = []
+            if lote:
+                procesados, errores = self._procesar_lote(
+                    executor, lote, procesados, errores, total, inicio, estado_path, filtros
+                )
+
+        duracion = time.perf_counter() - inicio
+        # Terminado: el archivo de control ya no hace falta
+        if os.path.exists(estado_path):
+            os.remove(estado_path)
+
+        resumen = (
+            f'Regenerados {procesados - errores} comprobantes en {duracion:.1f} s '
+            f'({procesados / duracion:.1f} PDFs/s), errores: {errores}'
+        )
+        if errores:
+            # Código de salida distinto de cero; las cédulas con error ya se listaron
+            raise CommandError(resumen)
+        self.stdout.write(self.style.SUCCESS(resumen))
+
+    def _procesar_lote(self, executor, lote, procesados, errores, total, inicio, estado_path, filtros):
+        chunksize = max(len(lote) // (self.workers * 4), 1)
+        for _, error in executor.map(_render, lote, chunksize=chunksize):
+            procesados += 1
+            if error:
+                errores += 1
+                self.stderr.write(self.style.ERROR(f'Error regenerando {error}'))
+
+        # El lote se completó entero: se puede reanudar a partir de su último id
+        self._guardar_estado(estado_path, filtros, lote[-1].id, procesados)
+        transcurrido = time.perf_counter() - inicio
+        self.stdout.write(
+            f'{procesados}/{total} comprobantes ({procesados / transcurrido:.1f} PDFs/s)'
+        )
+        return procesados, errores
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Min, Q, Value
+from django.db.models.functions import Coalesce
+from postulantes.management.commands.backfill_revisiones import recalcular_resumenes
+from postulantes.models import Postulante, RevisionPostulante, TareaComprobante
+
+
+def grupos_duplicados():
+    """[(ci, complemento, id conservado, ids repetidos)]; NULL y '' cuentan como "sin complemento"."""
+    grupos = (
+        Postulante.objects
+        .annotate(comp=Coalesce('complemento', Value('')))
+        .values('cedula_identidad', 'comp')
+        .annotate(cantidad=Count('id'), conservado=Min('id'))
+        .filter(cantidad__gt=1)
+        .order_by('cedula_identidad', 'comp')
+    )
+    resultado = []
+    for grupo in grupos:
+        complemento = grupo['comp']
+        mismo = Q(complemento=complemento) if complemento else Q(complemento__isnull=True) | Q(complemento='')
+        repetidos = list(
+            Postulante.objects.filter(mismo, cedula_identidad=grupo['cedula_identidad'])
+            .exclude(id=grupo['conservado']).order_by('id').values_list('id', flat=True)
+        )
+        resultado.append((grupo['cedula_identidad'], complemento, grupo['conservado'], repetidos))
+    return resultado
+
+
+def unir(conservado, repetidos):
+    """Pasa las revisiones de `repetidos` a `conservado` y borra los repetidos."""
+    RevisionPostulante.objects.filter(postulante_id__in=repetidos).update(postulante_id=conservado)
+    TareaComprobante.objects.filter(postulante_id__in=repetidos).delete()
+    # DELETE directo, sin las señales de Postulante: se ejecuta antes de la
+    # migración 0011, cuando las tablas posteriores (cupos) todavía no existen
+    tabla = connection.ops.quote_name(Postulante._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {tabla} WHERE id IN ({", ".join(["%s"] * len(repetidos))})', repetidos)
+
+
+class Command(BaseCommand):
+    help = ('Une los postulantes repetidos (mismo CI y complemento) en el registro más antiguo. '
+            'La migración 0011 no se aplica mientras existan.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo listar los duplicados')
+
+    def handle(self, *args, **options):
+        grupos = grupos_duplicados()
+        if not grupos:
+            self.stdout.write(self.style.SUCCESS('No hay postulantes duplicados'))
+            return
+
+        accion = 'se eliminarían' if options['dry_run'] else 'se eliminan'
+        for ci, complemento, conservado, repetidos in grupos:
+            self.stdout.write(
+                f'CI {ci} ({complemento or "sin complemento"}): se conserva el id {conservado}; '
+                f'{accion} {", ".join(map(str, repetidos))}'
+            )
+        if options['dry_run']:
+            return
+
+        with transaction.atomic():
+            Postulante.objects.filter(complemento='').update(complemento=None)
+            for _, _, conservado, repetidos in grupos:
+                unir(conservado, repetidos)
+            recalcular_resumenes([conservado for _, _, conservado, _ in grupos])
+        eliminados = sum(len(repetidos) for _, _, _, repetidos in grupos)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(grupos)} cédulas unidas; {eliminados} postulantes eliminados'
+        ))
@@ -0,0 +1,227 @@
+import atexit
+import functools
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from django.conf import settings
+from django.db import connection
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+METRICAS = {
+    'sirepre_http_requests_total': ('counter', 'Peticiones atendidas por ruta, método y código'),
+    'sirepre_http_request_duration_seconds': ('histogram', 'Tiempo de respuesta por ruta'),
+    'sirepre_http_request_db_queries': ('histogram', 'Consultas SQL por petición'),
+    'sirepre_db_query_seconds_total': ('counter', 'Tiempo total en consultas SQL por ruta'),
+    'sirepre_pdf_render_seconds': ('histogram', 'Tiempo de generate_pdf por comprobante'),
+    'sirepre_upload_bytes_total': ('counter', 'Bytes de archivos recibidos'),
+    'sirepre_sistema_activo': ('gauge', '1 si el sistema acepta postulaciones en este momento'),
+}
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def activas():
+    return _config('METRICAS_ACTIVAS', True)
+
+
+# ─── Registro del proceso ────────────────────────────────────────────────────
+# Cada proceso acumula en memoria y vuelca su estado a METRICAS_DIR/<pid>.json
+# como mucho cada METRICAS_INTERVALO segundos. El endpoint suma los archivos de
+# todos los procesos (como el modo multiproceso de prometheus_client).
+_contadores = {}
+_histogramas = {}
+_lock = threading.Lock()
+_estado = {'volcado': 0.0, 'cambios': False}
+
+
+def _clave(nombre, etiquetas):
+    return json.dumps([nombre, sorted(etiquetas.items())], ensure_ascii=False)
+
+
+def incrementar(nombre, valor=1, **etiquetas):
+    if not activas():
+        return
+    clave = _clave(nombre, etiquetas)
+    with _lock:
+        _contadores[clave] = _contadores.get(clave, 0) + valor
+        _estado['cambios'] = True
+    volcar()
+
+
+def observar(nombre, valor, buckets=BUCKETS_SEGUNDOS, **etiquetas):
+    if not activas():
+        return
+    clave = _clave(nombre, etiquetas)
+    with _lock:
+        # Conteo por bucket (el último es +Inf); se acumulan recién al exponer
+        datos = _histogramas.get(clave)
+        if datos is None:
+            datos = _histogramas[clave] = {'buckets': list(buckets), 'conteos': [0] * (len(buckets) + 1), 'suma': 0.0}
+        for i, limite in enumerate(datos['buckets']):
+            if valor <= limite:
+                break
+        else:
+            i = len(datos['buckets'])
+        datos['conteos'][i] += 1
+        datos['suma'] += valor
+        _estado['cambios'] = True
+    volcar()
+
+
+def cronometrar(nombre, **etiquetas):
+    """Decorador que observa la duración de cada llamada en el histograma `nombre`."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                observar(nombre, time.perf_counter() - inicio, **etiquetas)
+        return envoltura
+    return decorador
+
+
+def directorio():
+    return _config('METRICAS_DIR', os.path.join(tempfile.gettempdir(), 'sirepre_metricas'))
+
+
+def volcar(forzar=False):
+    ahora = time.monotonic()
+    with _lock:
+        if not _estado['cambios'] or (not forzar and ahora - _estado['volcado'] < _config('METRICAS_INTERVALO', 5)):
+            return
+        datos = json.dumps({'contadores': _contadores, 'histogramas': _histogramas})
+        _estado['volcado'] = ahora
+        _estado['cambios'] = False
+    os.makedirs(directorio(), exist_ok=True)
+    # Temporal + rename: quien lee nunca ve un archivo a medio escribir
+    ruta = os.path.join(directorio(), f'{os.getpid()}.json')
+    temporal = f'{ruta}.{threading.get_ident()}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(datos)
+    os.replace(temporal, ruta)
+
+
+atexit.register(volcar, forzar=True)
+
+
+def reiniciar():
+    """Descarta lo acumulado en este proceso (pruebas y benchmark_api)."""
+    with _lock:
+        _contadores.clear()
+        _histogramas.clear()
+        _estado.update(volcado=0.0, cambios=False)
+
+
+def _agregar():
+    """Suma los estados volcados por todos los procesos (incluidos los que ya terminaron)."""
+    contadores, histogramas = {}, {}
+    for ruta in glob.glob(os.path.join(directorio(), '*.json')):
+        try:
+            with open(ruta, encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for clave, valor in datos['contadores'].items():
+            contadores[clave] = contadores.get(clave, 0) + valor
+        for clave, h in datos['histogramas'].items():
+            total = histogramas.get(clave)
+            if total is None:
+                histogramas[clave] = h
+                continue
+            total['conteos'] = [a + b for a, b in zip(total['conteos'], h['conteos'])]
+            total['suma'] += h['suma']
+    return contadores, histogramas
+
+
+# ─── Formato de texto de Prometheus ─────────────────────────────────────────
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etiquetas(pares):
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exponer(gauges=None):
+    """Texto para /api/metrics con las métricas de todos los procesos más los `gauges` dados."""
+    volcar(forzar=True)
+    contadores, histogramas = _agregar()
+    series = {nombre: [] for nombre in METRICAS}
+
+    for clave, valor in sorted(contadores.items()):
+        nombre, pares = json.loads(clave)
+        series.setdefault(nombre, []).append(f'{nombre}{_etiquetas(pares)} {_numero(valor)}')
+    for clave, h in sorted(histogramas.items()):
+        nombre, pares = json.loads(clave)
+        acumulado = 0
+        for limite, conteo in zip([*h['buckets'], '+Inf'], h['conteos']):
+            acumulado += conteo
+            le = limite if limite == '+Inf' else _numero(limite)
+            series.setdefault(nombre, []).append(f'{nombre}_bucket{_etiquetas([*pares, ["le", le]])} {acumulado}')
+        series[nombre].append(f'{nombre}_sum{_etiquetas(pares)} {_numero(h["suma"])}')
+        series[nombre].append(f'{nombre}_count{_etiquetas(pares)} {acumulado}')
+    for nombre, valor in (gauges or {}).items():
+        series.setdefault(nombre, []).append(f'{nombre} {_numero(valor)}')
+
+    lineas = []
+    for nombre, muestras in series.items():
+        if not muestras:
+            continue
+        tipo, descripcion = METRICAS.get(nombre, ('untyped', ''))
+        lineas += [f'# HELP {nombre} {descripcion}', f'# TYPE {nombre} {tipo}', *muestras]
+    return '\n'.join(lineas) + '\n'
+
+
+# ─── Middleware ──────────────────────────────────────────────────────────────
+class MetricasMiddleware:
+    """Cuenta peticiones, tiempo de respuesta y consultas SQL por ruta.
+
+    La ruta es el patrón de la URL (`api/postulantes/pdf/<int:ci>/`), no la
+    URL concreta, para que la cantidad de series no crezca con cada cédula.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not activas():
+            return self.get_response(request)
+
+        consultas = {'cantidad': 0, 'segundos': 0.0}
+
+        def contar(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                consultas['cantidad'] += 1
+                consultas['segundos'] += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(contar):
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        match = getattr(request, 'resolver_match', None)
+        ruta = match.route if match else 'sin_ruta'
+        incrementar('sirepre_http_requests_total', ruta=ruta, metodo=request.method, codigo=response.status_code)
+        observar('sirepre_http_request_duration_seconds', duracion, ruta=ruta)
+        observar('sirepre_http_request_db_queries', consultas['cantidad'], BUCKETS_CONSULTAS, ruta=ruta)
+        if consultas['cantidad']:
+            incrementar('sirepre_db_query_seconds_total', consultas['segundos'], ruta=ruta)
+        return response
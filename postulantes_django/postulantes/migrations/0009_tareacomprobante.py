@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postulantes', '0008_configuracionsistema'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaComprobante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cedula_identidad', models.IntegerField(db_index=True)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PROCESANDO', 'Procesando'), ('LISTO', 'Listo'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('archivo', models.CharField(blank=True, max_length=255, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('postulante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tareas_comprobante', to='postulantes.postulante')),
+            ],
+            options={
+                'verbose_name': 'Tarea de Comprobante',
+                'verbose_name_plural': 'Tareas de Comprobantes',
+                'db_table': 'tareas_comprobante',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='tarea_comp_estado_idx')],
+            },
+        ),
+    ]
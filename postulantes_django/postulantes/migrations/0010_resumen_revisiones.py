@@ -0,0 +1,57 @@
+# Generated by Django 6.0.2 on 2026-10-17 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def calcular_resumen(apps, schema_editor):
+    Postulante = apps.get_model('postulantes', 'Postulante')
+    RevisionPostulante = apps.get_model('postulantes', 'RevisionPostulante')
+    db_alias = schema_editor.connection.alias
+    resumen = {}
+    revisiones = RevisionPostulante.objects.using(db_alias).order_by('postulante_id', '-fecha_revision', '-id')
+    for rev in revisiones.iterator(chunk_size=2000):
+        datos = resumen.setdefault(rev.postulante_id, [0, None, 'SIN_REVISION'])
+        if datos[0] == 0:
+            cumple_all = (
+                rev.cumple_experiencia_especifica == 'CUMPLE' and
+                rev.cumple_no_militancia == 'CUMPLE' and
+                rev.cumple_bachiller_o_superior == 'CUMPLE'
+            )
+            datos[1] = rev.id
+            datos[2] = 'CUMPLE_TODO' if cumple_all else 'CON_OBSERVACIONES'
+        datos[0] += 1
+    Postulante.objects.using(db_alias).bulk_update(
+        [
+            Postulante(id=pid, total_revisiones=total, ultima_revision_id=ultima, estado_revision=estado)
+            for pid, (total, ultima, estado) in resumen.items()
+        ],
+        ['total_revisiones', 'ultima_revision', 'estado_revision'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postulantes', '0009_tareacomprobante'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postulante',
+            name='estado_revision',
+            field=models.CharField(choices=[('SIN_REVISION', 'Sin revisión'), ('CUMPLE_TODO', 'CUMPLE TODO'), ('CON_OBSERVACIONES', 'CON OBSERVACIONES')], db_index=True, default='SIN_REVISION', editable=False, max_length=20, verbose_name='Estado Actual'),
+        ),
+        migrations.AddField(
+            model_name='postulante',
+            name='total_revisiones',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Revisiones'),
+        ),
+        migrations.AddField(
+            model_name='postulante',
+            name='ultima_revision',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='postulantes.revisionpostulante', verbose_name='Última revisión'),
+        ),
+        migrations.RunPython(calcular_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:05
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def normalizar_complemento(apps, schema_editor):
+    Postulante = apps.get_model('postulantes', 'Postulante')
+    Postulante.objects.using(schema_editor.connection.alias).filter(complemento='').update(complemento=None)
+
+
+def verificar_duplicados(apps, schema_editor):
+    """Detiene la migración si hay registros repetidos de un mismo CI y complemento.
+
+    AddConstraint fallaría con un IntegrityError. Los duplicados no se borran
+    aquí: se revisan y se unen con `python manage.py unir_duplicados`.
+    """
+    Postulante = apps.get_model('postulantes', 'Postulante')
+    grupos = list(
+        Postulante.objects.using(schema_editor.connection.alias)
+        .values('cedula_identidad', 'complemento')
+        .annotate(cantidad=Count('id'))
+        .filter(cantidad__gt=1)
+        .order_by('cedula_identidad', 'complemento')
+    )
+    if grupos:
+        detalle = '\n'.join(
+            f"  CI {g['cedula_identidad']} ({g['complemento'] or 'sin complemento'}): {g['cantidad']} registros"
+            for g in grupos
+        )
+        raise RuntimeError(
+            f'Hay {len(grupos)} cédulas registradas más de una vez con el mismo complemento:\n{detalle}\n'
+            'Revíselas con `python manage.py unir_duplicados --dry-run`, únalas con '
+            '`python manage.py unir_duplicados` y vuelva a ejecutar `migrate`.'
+        )
+    if schema_editor.connection.vendor == 'postgresql':
+        # Las claves foráneas diferidas deben verificarse antes de alterar la tabla
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postulantes', '0010_resumen_revisiones'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_complemento, migrations.RunPython.noop),
+        migrations.RunPython(verificar_duplicados, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='postulante',
+            index=models.Index(fields=['cedula_identidad', 'complemento'], name='postulante_ci_comp_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='postulante',
+            constraint=models.UniqueConstraint(condition=models.Q(('complemento__isnull', False), models.Q(('complemento', ''), _negated=True)), fields=('cedula_identidad', 'complemento'), name='postulante_ci_complemento_unico'),
+        ),
+        migrations.AddConstraint(
+            model_name='postulante',
+            constraint=models.UniqueConstraint(condition=models.Q(('complemento__isnull', True), ('complemento', ''), _connector='OR'), fields=('cedula_identidad',), name='postulante_ci_sin_complemento_unico'),
+        ),
+    ]
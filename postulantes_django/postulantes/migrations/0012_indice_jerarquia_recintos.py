@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 14:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postulantes', '0011_indice_ci_complemento'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recinto',
+            index=models.Index(fields=['departamento', 'provincia', 'municipio', 'zona'], name='recinto_jerarquia_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-17 15:10
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postulantes', '0012_indice_jerarquia_recintos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubidaFragmentada',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=255)),
+                ('tamano', models.PositiveBigIntegerField()),
+                ('sha256', models.CharField(blank=True, max_length=64, null=True)),
+                ('recibido', models.PositiveBigIntegerField(default=0)),
+                ('estado', models.CharField(choices=[('ABIERTA', 'Abierta'), ('COMPLETA', 'Completa')], default='ABIERTA', max_length=20)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('archivo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='postulantes.uploadedfile')),
+            ],
+            options={
+                'verbose_name': 'Subida Fragmentada',
+                'verbose_name_plural': 'Subidas Fragmentadas',
+                'db_table': 'subidas_fragmentadas',
+                'indexes': [models.Index(fields=['estado', 'fecha_actualizacion'], name='subida_estado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-17 15:40
+
+import postulantes.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postulantes', '0013_subidafragmentada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='tamano',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='uploadedfile',
+            name='file',
+            field=models.FileField(storage=postulantes.storage.AlmacenamientoPorContenido(), upload_to='temp_uploads/'),
+        ),
+    ]
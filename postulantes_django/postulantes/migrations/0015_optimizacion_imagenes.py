@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-17 16:20
+
+import postulantes.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postulantes', '0014_uploadedfile_por_contenido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='archivo_optimizado',
+            field=models.FileField(blank=True, editable=False, null=True, storage=postulantes.storage.AlmacenamientoPorContenido(), upload_to='temp_uploads/optimizados/'),
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='estado_imagen',
+            field=models.CharField(choices=[('NO_APLICA', 'No aplica'), ('PENDIENTE', 'Pendiente'), ('PROCESANDO', 'Procesando'), ('LISTO', 'Listo'), ('ERROR', 'Error')], db_index=True, default='NO_APLICA', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='miniatura',
+            field=models.FileField(blank=True, editable=False, null=True, storage=postulantes.storage.AlmacenamientoPorContenido(), upload_to='temp_uploads/miniaturas/'),
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='tamano_optimizado',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
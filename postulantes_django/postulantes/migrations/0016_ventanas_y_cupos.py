@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-17 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postulantes', '0015_optimizacion_imagenes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CupoCargo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cargo_postulacion', models.CharField(max_length=100, unique=True, verbose_name='Cargo')),
+                ('limite', models.PositiveIntegerField(verbose_name='Límite')),
+                ('ocupados', models.PositiveIntegerField(default=0, verbose_name='Ocupados')),
+            ],
+            options={
+                'verbose_name': 'Cupo por Cargo',
+                'verbose_name_plural': 'Cupos por Cargo',
+                'db_table': 'cupos_cargo',
+            },
+        ),
+        migrations.AddField(
+            model_name='configuracionsistema',
+            name='fecha_apertura',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Apertura Programada'),
+        ),
+        migrations.AddField(
+            model_name='configuracionsistema',
+            name='fecha_cierre',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Cierre Programado'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('postulantes', '0016_ventanas_y_cupos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='imagen_intentos',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='imagen_reclamada',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
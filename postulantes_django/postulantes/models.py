@@ -1,4 +1,17 @@
+import uuid
 from django.db import models
+from .storage import almacenamiento_por_contenido
+
+class PostulanteQuerySet(models.QuerySet):
+    def por_ci(self, cedula_identidad, complemento=None):
+        """Filtra por CI y complemento; NULL y cadena vacía significan "sin complemento"."""
+        complemento = (complemento or '').strip()
+        if complemento:
+            return self.filter(cedula_identidad=cedula_identidad, complemento=complemento)
+        return self.filter(
+            models.Q(complemento__isnull=True) | models.Q(complemento=''),
+            cedula_identidad=cedula_identidad,
+        )
 
 class Postulante(models.Model):
     EXPEDICION_CHOICES = [
@@ -80,6 +93,29 @@ class Postulante(models.Model):
     # Registro automático
     fecha_registro = models.DateTimeField(auto_now_add=True)
 
+    # Resumen de revisiones (desnormalizado; lo mantienen las señales de RevisionPostulante)
+    ESTADO_REVISION_CHOICES = [
+        ('SIN_REVISION', 'Sin revisión'),
+        ('CUMPLE_TODO', 'CUMPLE TODO'),
+        ('CON_OBSERVACIONES', 'CON OBSERVACIONES'),
+    ]
+    total_revisiones = models.PositiveIntegerField(default=0, editable=False, verbose_name="Revisiones")
+    ultima_revision = models.ForeignKey(
+        'RevisionPostulante',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        editable=False,
+        verbose_name="Última revisión"
+    )
+    estado_revision = models.CharField(
+        max_length=20, choices=ESTADO_REVISION_CHOICES, default='SIN_REVISION',
+        db_index=True, editable=False, verbose_name="Estado Actual"
+    )
+
+    objects = PostulanteQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.nombre} {self.apellido_paterno or ''} {self.apellido_materno or ''} - {self.cedula_identidad}"
 
@@ -87,6 +123,23 @@ class Postulante(models.Model):
         verbose_name = "Postulante"
         verbose_name_plural = "Postulantes"
         db_table = "postulantes"
+        indexes = [
+            models.Index(fields=['cedula_identidad', 'complemento'], name='postulante_ci_comp_idx'),
+        ]
+        constraints = [
+            # Un CI solo puede registrarse una vez por complemento; NULL y ''
+            # cuentan como el mismo "sin complemento".
+            models.UniqueConstraint(
+                fields=['cedula_identidad', 'complemento'],
+                condition=models.Q(complemento__isnull=False) & ~models.Q(complemento=''),
+                name='postulante_ci_complemento_unico',
+            ),
+            models.UniqueConstraint(
+                fields=['cedula_identidad'],
+                condition=models.Q(complemento__isnull=True) | models.Q(complemento=''),
+                name='postulante_ci_sin_complemento_unico',
+            ),
+        ]
 
 class RevisionPostulante(models.Model):
     REVISION_CHOICES = [
@@ -120,6 +173,15 @@ class RevisionPostulante(models.Model):
     def __str__(self):
         return f"Revisión {self.id} - {self.postulante.nombre} ({self.fecha_revision.strftime('%d/%m/%Y %H:%M')})"
 
+    @property
+    def estado_general(self):
+        cumple_all = (
+            self.cumple_experiencia_especifica == 'CUMPLE' and
+            self.cumple_no_militancia == 'CUMPLE' and
+            self.cumple_bachiller_o_superior == 'CUMPLE'
+        )
+        return 'CUMPLE_TODO' if cumple_all else 'CON_OBSERVACIONES'
+
     class Meta:
         verbose_name = "Revisión de Postulante"
         verbose_name_plural = "Revisiones de Postulantes"
@@ -143,9 +205,35 @@ class Recinto(models.Model):
         verbose_name = "Recinto"
         verbose_name_plural = "Recintos"
         db_table = "recintos"
+        indexes = [
+            # Filtros en cascada: cualquier prefijo de la jerarquía usa el índice
+            models.Index(
+                fields=['departamento', 'provincia', 'municipio', 'zona'],
+                name='recinto_jerarquia_idx',
+            ),
+        ]
 class UploadedFile(models.Model):
-    file = models.FileField(upload_to='temp_uploads/')
+    file = models.FileField(upload_to='temp_uploads/', storage=almacenamiento_por_contenido)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # Un registro por contenido distinto, compartido por todas las subidas con esos bytes
+    sha256 = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    tamano = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+
+    # Fotos de documentos: versión optimizada y miniatura (ver postulantes/imagenes.py)
+    ESTADO_IMAGEN_CHOICES = [
+        ('NO_APLICA', 'No aplica'),
+        ('PENDIENTE', 'Pendiente'),
+        ('PROCESANDO', 'Procesando'),
+        ('LISTO', 'Listo'),
+        ('ERROR', 'Error'),
+    ]
+    estado_imagen = models.CharField(max_length=20, choices=ESTADO_IMAGEN_CHOICES, default='NO_APLICA', db_index=True, editable=False)
+    archivo_optimizado = models.FileField(upload_to='temp_uploads/optimizados/', storage=almacenamiento_por_contenido, blank=True, null=True, editable=False)
+    miniatura = models.FileField(upload_to='temp_uploads/miniaturas/', storage=almacenamiento_por_contenido, blank=True, null=True, editable=False)
+    tamano_optimizado = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    # Reclamo del worker: si muere a mitad, la imagen se reintenta tras IMAGEN_TIMEOUT
+    imagen_reclamada = models.DateTimeField(null=True, blank=True, editable=False)
+    imagen_intentos = models.PositiveSmallIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"File {self.id} - {self.file.name}"
@@ -153,6 +241,8 @@ class UploadedFile(models.Model):
 class ConfiguracionSistema(models.Model):
     sistema_activo = models.BooleanField(default=True, verbose_name="Sistema Activo")
     mensaje = models.TextField(default="El sistema de postulación se ha cerrado.", verbose_name="Mensaje de Cierre")
+    fecha_apertura = models.DateTimeField(null=True, blank=True, verbose_name="Apertura Programada")
+    fecha_cierre = models.DateTimeField(null=True, blank=True, verbose_name="Cierre Programado")
 
     class Meta:
         verbose_name = "Configuración de Sistema"
@@ -160,3 +250,109 @@ class ConfiguracionSistema(models.Model):
 
     def __str__(self):
         return f"Configuración: {'Activo' if self.sistema_activo else 'Inactivo'}"
+
+    def abierto(self, ahora):
+        """El interruptor manual y la ventana programada (si la hay) permiten postular."""
+        if not self.sistema_activo:
+            return False
+        if self.fecha_apertura and ahora < self.fecha_apertura:
+            return False
+        if self.fecha_cierre and ahora >= self.fecha_cierre:
+            return False
+        return True
+
+    def proximo_cambio(self, ahora):
+        """Siguiente apertura o cierre programado posterior a `ahora` (o None)."""
+        futuros = [f for f in (self.fecha_apertura, self.fecha_cierre) if f and f > ahora]
+        return min(futuros) if futuros else None
+
+class CupoCargo(models.Model):
+    """Límite de postulantes para un cargo. `ocupados` se actualiza con un UPDATE
+    condicionado al registrar, así el cupo nunca se excede sin contar filas."""
+    cargo_postulacion = models.CharField(max_length=100, unique=True, verbose_name="Cargo")
+    limite = models.PositiveIntegerField(verbose_name="Límite")
+    ocupados = models.PositiveIntegerField(default=0, verbose_name="Ocupados")
+
+    class Meta:
+        verbose_name = "Cupo por Cargo"
+        verbose_name_plural = "Cupos por Cargo"
+        db_table = "cupos_cargo"
+
+    def __str__(self):
+        return f"{self.cargo_postulacion}: {self.ocupados}/{self.limite}"
+
+    @classmethod
+    def reservar(cls, cargo):
+        """Ocupa un lugar del cupo de forma atómica. False si ya no quedan lugares."""
+        return bool(
+            cls.objects
+            .filter(cargo_postulacion=cargo, ocupados__lt=models.F('limite'))
+            .update(ocupados=models.F('ocupados') + 1)
+        )
+
+    @classmethod
+    def liberar(cls, cargo):
+        cls.objects.filter(cargo_postulacion=cargo, ocupados__gt=0).update(ocupados=models.F('ocupados') - 1)
+
+    @classmethod
+    def ocupar(cls, cargo):
+        """Ocupa un lugar aunque el cupo esté lleno (cambios de cargo hechos por un revisor)."""
+        cls.objects.filter(cargo_postulacion=cargo).update(ocupados=models.F('ocupados') + 1)
+
+class TareaComprobante(models.Model):
+    ESTADO_CHOICES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('PROCESANDO', 'Procesando'),
+        ('LISTO', 'Listo'),
+        ('ERROR', 'Error'),
+    ]
+
+    postulante = models.ForeignKey(Postulante, on_delete=models.CASCADE, related_name='tareas_comprobante')
+    cedula_identidad = models.IntegerField(db_index=True)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='PENDIENTE')
+    intentos = models.PositiveIntegerField(default=0)
+    archivo = models.CharField(max_length=255, blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Comprobante {self.cedula_identidad} - {self.estado}"
+
+    class Meta:
+        verbose_name = "Tarea de Comprobante"
+        verbose_name_plural = "Tareas de Comprobantes"
+        db_table = "tareas_comprobante"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion'], name='tarea_comp_estado_idx'),
+        ]
+
+class SubidaFragmentada(models.Model):
+    """Sesión de subida por fragmentos: el archivo parcial vive en SUBIDA_DIR
+    hasta que se completa y se convierte en un UploadedFile."""
+    ESTADO_CHOICES = [
+        ('ABIERTA', 'Abierta'),
+        ('COMPLETA', 'Completa'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    nombre = models.CharField(max_length=255)
+    tamano = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, null=True)
+    recibido = models.PositiveBigIntegerField(default=0)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='ABIERTA')
+    archivo = models.ForeignKey(UploadedFile, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Subida {self.id} - {self.nombre} ({self.recibido}/{self.tamano})"
+
+    class Meta:
+        verbose_name = "Subida Fragmentada"
+        verbose_name_plural = "Subidas Fragmentadas"
+        db_table = "subidas_fragmentadas"
+        indexes = [
+            models.Index(fields=['estado', 'fecha_actualizacion'], name='subida_estado_idx'),
+        ]
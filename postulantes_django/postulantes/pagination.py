@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RecintoCursorPagination(CursorPagination):
+    # Orden estable por clave primaria: cada página es un rango del índice,
+    # sin OFFSET ni COUNT(*) sobre toda la tabla.
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -0,0 +1,96 @@
+import logging
+import os
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from .archivos import write_atomic
+from .imagenes import a_jpeg, abrir_reducida, es_imagen
+from .models import UploadedFile
+from .subidas import sha256_archivo
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # Sin pypdfium2 los PDF muestran un aviso en lugar de la vista previa
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+# Candados repartidos por hash: cantidad fija, sin crecer con cada documento
+_locks = [threading.Lock() for _ in range(64)]
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def es_pdf(nombre):
+    return os.path.splitext(nombre)[1].lower() == '.pdf'
+
+
+def admite_preview(nombre):
+    return es_imagen(nombre) or (es_pdf(nombre) and pdfium is not None)
+
+
+def _sha(archivo):
+    """Hash del contenido: el de UploadedFile si existe, si no se calcula una vez y se cachea."""
+    sha = UploadedFile.objects.filter(file=archivo.name).values_list('sha256', flat=True).first()
+    if sha:
+        return sha
+    st = os.stat(archivo.path)
+    key = f'preview:sha:{archivo.name}:{st.st_size}:{st.st_mtime_ns}'
+    sha = cache.get(key)
+    if sha is None:
+        sha = sha256_archivo(archivo.path)
+        cache.set(key, sha, timeout=None)
+    return sha
+
+
+def _lock(sha):
+    return _locks[int(sha[:8], 16) % len(_locks)]
+
+
+def generar_preview(path):
+    """JPEG de vista previa (imagen reducida o primera página del PDF), o None."""
+    lado = _config('PREVIEW_LADO', 480)
+    if es_pdf(path):
+        if pdfium is None:
+            return None
+        pdf = pdfium.PdfDocument(path)
+        try:
+            pagina = pdf[0]
+            ancho, alto = pagina.get_size()
+            img = pagina.render(scale=lado / max(ancho, alto)).to_pil()
+        finally:
+            pdf.close()
+    else:
+        img, _ = abrir_reducida(path, lado)
+    return a_jpeg(img, 75)
+
+
+def obtener_preview(archivo):
+    """Devuelve (ruta, sha256) de la vista previa del archivo, generándola si falta.
+
+    Las vistas previas se guardan en PREVIEW_DIR con el hash del contenido
+    como nombre, así un mismo documento se dibuja una sola vez aunque lo
+    referencien varios postulantes. Devuelve None si no se puede previsualizar.
+    """
+    if not archivo or not admite_preview(archivo.name) or not os.path.exists(archivo.path):
+        return None
+    sha = _sha(archivo)
+    ruta = os.path.join(_config('PREVIEW_DIR', 'previews'), sha[:2], f'{sha}.jpg')
+    if os.path.exists(ruta):
+        return ruta, sha
+
+    # Una sola generación por documento aunque lleguen varias peticiones a la vez
+    with _lock(sha):
+        if not os.path.exists(ruta):
+            try:
+                data = generar_preview(archivo.path)
+            except Exception:
+                logger.exception("Error generando vista previa de %s", archivo.name)
+                data = None
+            if data is None:
+                return None
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            write_atomic(ruta, data)
+    return ruta, sha
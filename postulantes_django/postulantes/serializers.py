@@ -5,6 +5,9 @@ class PostulanteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Postulante
         fields = '__all__'
+        # La unicidad de CI + complemento la garantiza la base de datos
+        # (ver Postulante.Meta.constraints); la vista captura el IntegrityError.
+        validators = []
 
 class RecintoSerializer(serializers.ModelSerializer):
     class Meta:
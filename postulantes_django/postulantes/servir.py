@@ -0,0 +1,144 @@
+import mimetypes
+import os
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+class _Rango:
+    """Lector que entrega solo `longitud` bytes del archivo a partir de su posición actual."""
+
+    def __init__(self, archivo, longitud):
+        self.archivo = archivo
+        self.restante = longitud
+
+    def read(self, size=-1):
+        if self.restante <= 0:
+            return b''
+        if size < 0 or size > self.restante:
+            size = self.restante
+        data = self.archivo.read(size)
+        self.restante -= len(data)
+        return data
+
+    def close(self):
+        self.archivo.close()
+
+
+def _rango(header, tamano):
+    """Interpreta `Range: bytes=a-b` (un solo rango). Devuelve (inicio, fin), None o 'invalido'."""
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    inicio, _, fin = header[6:].strip().partition('-')
+    try:
+        if inicio == '':
+            # Sufijo: los últimos N bytes
+            n = int(fin)
+            if n <= 0:
+                return 'invalido'
+            return max(tamano - n, 0), tamano - 1
+        inicio = int(inicio)
+        fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    except ValueError:
+        return None
+    if inicio >= tamano or fin < inicio:
+        return 'invalido'
+    return inicio, fin
+
+
+def _no_modificado(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+    desde = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return desde is not None and int(mtime) <= desde
+
+
+def servir_archivo(request, path, content_type=None, filename=None, disposition='inline',
+                   cache_control='private, max-age=0'):
+    """Respuesta para un archivo en disco con ETag, 304 y rangos.
+
+    Según SERVIR_ARCHIVOS_MODO:
+    - 'python': Django envía el archivo. Sin rango se entrega el descriptor al
+      servidor WSGI (`wsgi.file_wrapper`), que usa sendfile si lo soporta.
+    - 'x-accel' / 'x-sendfile': solo se envían cabeceras y el proxy (nginx,
+      Apache, lighttpd) lee el archivo; los rangos también los resuelve él.
+    """
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("Archivo no encontrado")
+
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    cabeceras = {
+        'ETag': etag,
+        'Last-Modified': http_date(st.st_mtime),
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+    }
+    if filename:
+        cabeceras['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+
+    if _no_modificado(request, etag, st.st_mtime):
+        response = HttpResponseNotModified()
+        for nombre in ('ETag', 'Last-Modified', 'Cache-Control'):
+            response[nombre] = cabeceras[nombre]
+        return response
+
+    modo = _config('SERVIR_ARCHIVOS_MODO', 'python')
+    if modo in ('x-accel', 'x-sendfile'):
+        response = HttpResponse(content_type=content_type)
+        if modo == 'x-accel':
+            relativo = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            response['X-Accel-Redirect'] = _config('SERVIR_ACCEL_PREFIX', '/protected-media/') + relativo
+        else:
+            response['X-Sendfile'] = os.path.abspath(path)
+        for nombre, valor in cabeceras.items():
+            response[nombre] = valor
+        return response
+
+    rango = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if request.method == 'GET' and (not if_range or if_range == etag):
+        rango = _rango(request.META.get('HTTP_RANGE'), st.st_size)
+    if rango == 'invalido':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{st.st_size}'
+        return response
+
+    try:
+        archivo = open(path, 'rb')
+    except FileNotFoundError:
+        # Borrado entre el stat y la apertura
+        raise Http404("Archivo no encontrado")
+    if rango:
+        inicio, fin = rango
+        archivo.seek(inicio)
+        response = FileResponse(_Rango(archivo, fin - inicio + 1), content_type=content_type, status=206)
+        response['Content-Range'] = f'bytes {inicio}-{fin}/{st.st_size}'
+        response['Content-Length'] = str(fin - inicio + 1)
+    else:
+        response = FileResponse(archivo, content_type=content_type)
+        response['Content-Length'] = str(st.st_size)
+    for nombre, valor in cabeceras.items():
+        response[nombre] = valor
+    return response
+
+
+def servir_media(request, path):
+    """Sirve MEDIA_ROOT (reemplaza a django.conf.urls.static.static)."""
+    try:
+        ruta = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Archivo no encontrado")
+    if os.path.isdir(ruta):
+        raise Http404("Archivo no encontrado")
+    return servir_archivo(request, ruta)
@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .caching import invalidar_configuracion, invalidar_recintos
+from .models import ConfiguracionSistema, CupoCargo, Postulante, Recinto, RevisionPostulante
+
+
+def actualizar_resumen_revisiones(postulante_id):
+    """Recalcula el resumen desnormalizado de revisiones de un postulante."""
+    revisiones = RevisionPostulante.objects.filter(postulante_id=postulante_id)
+    ultima = revisiones.order_by('-fecha_revision', '-id').first()
+    Postulante.objects.filter(pk=postulante_id).update(
+        total_revisiones=revisiones.count(),
+        ultima_revision=ultima,
+        estado_revision=ultima.estado_general if ultima else 'SIN_REVISION',
+    )
+
+
+@receiver(post_save, sender=RevisionPostulante)
+def revision_guardada(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    actualizar_resumen_revisiones(instance.postulante_id)
+
+
+@receiver(post_delete, sender=RevisionPostulante)
+def revision_eliminada(sender, instance, **kwargs):
+    actualizar_resumen_revisiones(instance.postulante_id)
+
+
+@receiver(post_save, sender=Recinto)
+@receiver(post_delete, sender=Recinto)
+def recinto_modificado(sender, using, **kwargs):
+    # Tras confirmar: si se invalida antes, otra petición puede volver a
+    # cachear los datos viejos mientras la transacción sigue abierta
+    transaction.on_commit(invalidar_recintos, using=using)
+
+
+@receiver(post_save, sender=ConfiguracionSistema)
+@receiver(post_delete, sender=ConfiguracionSistema)
+@receiver(post_save, sender=CupoCargo)
+@receiver(post_delete, sender=CupoCargo)
+def configuracion_modificada(sender, using, **kwargs):
+    transaction.on_commit(invalidar_configuracion, using=using)
+
+
+@receiver(post_delete, sender=Postulante)
+def postulante_eliminado(sender, instance, using, **kwargs):
+    # Devuelve el lugar al cupo del cargo (si el cargo tiene cupo)
+    CupoCargo.liberar(instance.cargo_postulacion)
+    transaction.on_commit(invalidar_configuracion, using=using)
+
+
+@receiver(pre_save, sender=Postulante)
+def recordar_cargo(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Cargo guardado en la base, para mover el lugar del cupo si cambia
+    instance._cargo_anterior = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'cargo_postulacion' not in update_fields:
+        return
+    instance._cargo_anterior = (
+        Postulante.objects.filter(pk=instance.pk).values_list('cargo_postulacion', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Postulante)
+def cargo_cambiado(sender, instance, created, using, raw=False, **kwargs):
+    anterior = getattr(instance, '_cargo_anterior', None)
+    if raw or created or anterior is None or anterior == instance.cargo_postulacion:
+        return
+    # El registro reservó un lugar en el cupo del cargo anterior: pasa al nuevo
+    CupoCargo.liberar(anterior)
+    CupoCargo.ocupar(instance.cargo_postulacion)
+    transaction.on_commit(invalidar_configuracion, using=using)
@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+from .models import Recinto
+
+# Datos ficticios para pruebas de carga: nunca se usan datos reales de ciudadanos
+NOMBRES = [
+    'María', 'Juan', 'Ana', 'Carlos', 'Lucía', 'Jorge', 'Rosa', 'Luis', 'Carmen', 'José',
+    'Patricia', 'Miguel', 'Gabriela', 'Fernando', 'Silvia', 'Roberto', 'Daniela', 'Marco',
+    'Verónica', 'Álvaro', 'Lidia', 'Wilson', 'Noemí', 'Freddy', 'Ximena', 'Edwin',
+]
+APELLIDOS = [
+    'Quispe', 'Mamani', 'Condori', 'Choque', 'Flores', 'Vargas', 'Gutiérrez', 'Rojas',
+    'Torrez', 'Huanca', 'Apaza', 'Limachi', 'Copa', 'Ticona', 'Rodríguez', 'Fernández',
+    'López', 'Cruz', 'Villca', 'Colque', 'Aguilar', 'Morales', 'Suárez', 'Callisaya',
+]
+# Departamento del recinto y código de expedición del carnet
+DEPARTAMENTOS = {
+    'La Paz': 'LP', 'Santa Cruz': 'SC', 'Cochabamba': 'CB', 'Oruro': 'OR', 'Chuquisaca': 'CH',
+    'Beni': 'BN', 'Potosí': 'PT', 'Tarija': 'TJ', 'Pando': 'PN',
+}
+CARGOS = ['Notario Electoral', 'Guía Electoral', 'Operador de Transmisión', 'Técnico de Recinto']
+GRADOS = ['BACHILLER', 'TÉCNICO MEDIO', 'TÉCNICO SUPERIOR', 'LICENCIATURA', 'MAESTRÍA']
+ZONAS = ['Centro', 'Sopocachi', 'Miraflores', 'Villa Fátima', 'El Alto', 'Equipetrol', 'Plan 3000', 'Cala Cala']
+
+
+def complemento(rng):
+    # Cerca del 5 % de los carnets tiene complemento (p. ej. "1A"), como los duplicados del SEGIP
+    if rng.random() < 0.05:
+        return f'{rng.randint(1, 9)}{rng.choice("ABCDEFGHJK")}'
+    return None
+
+
+def datos_postulante(rng, ci, recintos=()):
+    """Campos de un postulante plausible; `recintos` son ids de Recinto para las opciones."""
+    departamento = rng.choice(list(DEPARTAMENTOS))
+    datos = {
+        'nombre': rng.choice(NOMBRES),
+        'apellido_paterno': rng.choice(APELLIDOS),
+        'apellido_materno': rng.choice(APELLIDOS),
+        'fecha_nacimiento': date(1960, 1, 1) + timedelta(days=rng.randrange(365 * 45)),
+        'cedula_identidad': ci,
+        'complemento': complemento(rng),
+        'expedicion': DEPARTAMENTOS[departamento],
+        'grado_instruccion': rng.choice(GRADOS),
+        'ciudad': departamento,
+        'zona': rng.choice(ZONAS),
+        'calle_avenida': f'Calle {rng.randint(1, 120)}',
+        'numero_domicilio': str(rng.randint(1, 3000)),
+        'email': f'postulante{ci}@example.com',
+        'celular': rng.choice((6, 7)) * 10000000 + rng.randrange(10000000),
+        'cargo_postulacion': rng.choice(CARGOS),
+        'experiencia_general': rng.choice(('SI', 'NO')),
+        'experiencia_especifica': str(rng.randint(0, 10)),
+        'es_boliviano': True,
+        'registrado_en_padron_electoral': True,
+        'ci_vigente': rng.random() < 0.97,
+        'disponibilidad_tiempo_completo': rng.random() < 0.9,
+        'ninguna_militancia_politica': rng.random() < 0.95,
+    }
+    if recintos:
+        datos['recinto_primera_opcion'] = rng.choice(recintos)
+        if rng.random() < 0.7:
+            datos['recinto_segunda_opcion'] = rng.choice(recintos)
+    return datos
+
+
+def recintos_sinteticos(rng, cantidad):
+    """Recintos repartidos en los nueve departamentos, con coordenadas dentro de Bolivia."""
+    recintos = []
+    for i in range(cantidad):
+        departamento = rng.choice(list(DEPARTAMENTOS))
+        provincia = f'Provincia {rng.randint(1, 8)}'
+        municipio = f'Municipio {rng.randint(1, 5)}'
+        recintos.append(Recinto(
+            nombre=f'U. E. Recinto {i}', codigo=f'SINT-{i:06d}', departamento=departamento,
+            provincia=provincia, municipio=municipio, asiento=municipio, zona=rng.choice(ZONAS),
+            latitud=rng.uniform(-22.8, -9.7), longitud=rng.uniform(-69.6, -57.5),
+        ))
+    return recintos
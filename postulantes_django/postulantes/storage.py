@@ -0,0 +1,73 @@
+import hashlib
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def _nombre_final(directorio, digest, extension):
+    return os.path.join(directorio, digest[:2], digest[2:4], digest + extension).replace('\\', '/')
+
+
+@deconstructible
+class AlmacenamientoPorContenido(FileSystemStorage):
+    """Guarda cada archivo bajo el SHA-256 de su contenido.
+
+    `temp_uploads/cv.pdf` termina como `temp_uploads/ab/cd/abcd….pdf`: el hash
+    se calcula mientras el contenido se copia a un temporal en el mismo
+    directorio y al final se renombra. Si ya existe un archivo con ese hash el
+    temporal se descarta, así los mismos bytes ocupan disco una sola vez.
+    Si el contenido trae el atributo `sha256` (ya calculado por quien guarda)
+    no se vuelve a calcular, y si ese archivo ya existe ni siquiera se copia.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre definitivo lo decide el contenido, no hace falta buscar uno libre
+        return name
+
+    def _save(self, name, content):
+        directorio = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        base = self.path(directorio)
+        conocido = getattr(content, 'sha256', None)
+        if conocido:
+            final = _nombre_final(directorio, conocido, extension)
+            if os.path.exists(self.path(final)):
+                return final
+        os.makedirs(base, exist_ok=True)
+
+        h = None if conocido else hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=base, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    if h is not None:
+                        h.update(chunk)
+                    f.write(chunk)
+
+            final = _nombre_final(directorio, conocido or h.hexdigest(), extension)
+            ruta = self.path(final)
+            if os.path.exists(ruta):
+                os.remove(tmp)
+            else:
+                os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp, self.file_permissions_mode)
+                os.replace(tmp, ruta)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return final
+
+
+def sha256_de_nombre(name):
+    """Hash de un archivo guardado por AlmacenamientoPorContenido, a partir de su nombre."""
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+almacenamiento_por_contenido = AlmacenamientoPorContenido()
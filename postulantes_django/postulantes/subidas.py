@@ -0,0 +1,172 @@
+import hashlib
+import os
+from django.conf import settings
+from django.core.files import File, locks
+from django.db import IntegrityError
+from django.utils import timezone
+from .escritura import escritura
+from .imagenes import encolar_imagen
+from .models import SubidaFragmentada, UploadedFile
+from .storage import sha256_de_nombre
+
+BLOQUE = 64 * 1024
+
+
+def buscar_por_contenido(sha256, tamano=None):
+    """UploadedFile existente con ese contenido (o None).
+
+    Reutilizarlo cuenta como subida reciente para purge_uploads. La fila se
+    marca con un UPDATE condicional, sin leerla antes en la misma transacción
+    (con SQLite, leer y luego escribir bloquea a dos peticiones entre sí), y
+    recién después se lee. Si la purga la está borrando, el UPDATE espera a que
+    termine y no encuentra la fila.
+    """
+    if not sha256:
+        return None
+    existente = UploadedFile.objects.filter(sha256=sha256.lower())
+    if tamano is not None:
+        existente = existente.filter(tamano=tamano)
+    with escritura():
+        marcados = existente.update(uploaded_at=timezone.now())
+    return existente.first() if marcados else None
+
+
+def sha256_contenido(contenido):
+    h = hashlib.sha256()
+    if hasattr(contenido, 'seek'):
+        contenido.seek(0)
+    for chunk in contenido.chunks():
+        h.update(chunk.encode() if isinstance(chunk, str) else chunk)
+    return h.hexdigest()
+
+
+def registrar_archivo(nombre, contenido, sha256=None):
+    """Guarda el contenido (deduplicado por hash) y devuelve (UploadedFile, creado).
+
+    El hash se busca antes de escribir: si el contenido ya está registrado no
+    se toca el disco. `sha256` evita recalcularlo cuando ya se conoce.
+    """
+    sha256 = sha256 or sha256_contenido(contenido)
+    existente = buscar_por_contenido(sha256)
+    if existente:
+        return existente, False
+
+    campo = UploadedFile._meta.get_field('file')
+    # El almacenamiento usa este hash en lugar de volver a leer el contenido para calcularlo
+    contenido.sha256 = sha256
+    name = campo.storage.save(campo.generate_filename(None, nombre), contenido)
+    try:
+        with escritura():
+            uploaded = UploadedFile.objects.create(file=name, sha256=sha256_de_nombre(name), tamano=contenido.size)
+            encolar_imagen(uploaded)
+            return uploaded, True
+    except IntegrityError:
+        # Otra petición registró el mismo contenido al mismo tiempo
+        existente = buscar_por_contenido(sha256)
+        if existente.file.name != name:
+            # Mismo contenido con otra extensión: la copia recién guardada no la usa nadie
+            campo.storage.delete(name)
+        return existente, False
+
+
+def ruta_parcial(subida):
+    return os.path.join(settings.SUBIDA_DIR, f'{subida.id}.part')
+
+
+def crear_subida(nombre, tamano, sha256):
+    subida = SubidaFragmentada.objects.create(
+        nombre=os.path.basename(nombre)[:255] or 'archivo',
+        tamano=tamano,
+        sha256=sha256.lower(),
+    )
+    os.makedirs(settings.SUBIDA_DIR, exist_ok=True)
+    open(ruta_parcial(subida), 'wb').close()
+    return subida
+
+
+def escribir_fragmento(subida, offset, stream, longitud):
+    """Escribe el cuerpo de la petición a partir de `offset`, bloque a bloque.
+
+    Devuelve el nuevo offset confirmado, o None si otra petición está
+    escribiendo la sesión o ya la avanzó. Si la conexión se corta a mitad del
+    fragmento se confirma lo que alcanzó a llegar, así el cliente reanuda
+    desde ahí.
+    """
+    with open(ruta_parcial(subida), 'r+b') as f:
+        # Un solo escritor por sesión: el offset se reserva con un candado sobre
+        # el .part antes de escribir (el sistema lo libera si el proceso muere)
+        if not locks.lock(f, locks.LOCK_EX | locks.LOCK_NB):
+            return None
+        try:
+            # Con el candado tomado el offset confirmado ya no cambia por debajo
+            if not SubidaFragmentada.objects.filter(id=subida.id, estado='ABIERTA', recibido=offset).exists():
+                return None
+            escritos = 0
+            f.seek(offset)
+            while escritos < longitud:
+                bloque = stream.read(min(BLOQUE, longitud - escritos))
+                if not bloque:
+                    break
+                f.write(bloque)
+                escritos += len(bloque)
+            f.flush()
+
+            nuevo = offset + escritos
+            avanzado = SubidaFragmentada.objects.filter(
+                id=subida.id, estado='ABIERTA', recibido=offset
+            ).update(recibido=nuevo)
+            return nuevo if avanzado else None
+        finally:
+            locks.unlock(f)
+
+
+def sha256_archivo(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class ChecksumInvalido(Exception):
+    pass
+
+
+def completar_subida(subida):
+    """Verifica el archivo parcial y lo convierte en un UploadedFile.
+
+    La sesión se toma con el mismo candado sobre el .part que usan los
+    fragmentos y pasa a COMPLETA recién cuando el archivo quedó registrado: si
+    el proceso muere a mitad de camino el sistema libera el candado y la
+    sesión sigue ABIERTA para volver a completarla. Si el checksum no coincide
+    la sesión vuelve a cero y se lanza ChecksumInvalido. Devuelve el
+    UploadedFile, o None si otra petición ya está completando la sesión.
+    """
+    path = ruta_parcial(subida)
+    try:
+        f = open(path, 'r+b')
+    except FileNotFoundError:
+        # Otra petición la completó y ya borró el archivo parcial
+        return None
+    with f:
+        if not locks.lock(f, locks.LOCK_EX | locks.LOCK_NB):
+            return None
+        try:
+            if not SubidaFragmentada.objects.filter(
+                id=subida.id, estado='ABIERTA', recibido=subida.tamano
+            ).exists():
+                return None
+            digest = sha256_archivo(path)
+            if digest != subida.sha256:
+                f.truncate(0)
+                SubidaFragmentada.objects.filter(id=subida.id).update(recibido=0)
+                raise ChecksumInvalido(digest)
+
+            uploaded, _ = registrar_archivo(subida.nombre, File(f), digest)
+            with escritura():
+                SubidaFragmentada.objects.filter(id=subida.id).update(estado='COMPLETA', archivo=uploaded)
+        finally:
+            locks.unlock(f)
+
+    os.remove(path)
+    return uploaded
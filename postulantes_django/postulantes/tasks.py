@@ -0,0 +1,189 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .comprobantes import podar_cache
+from .models import Postulante, TareaComprobante
+from .utils import generate_pdf, get_plantilla
+
+logger = logging.getLogger(__name__)
+
+# Estados en los que el comprobante todavía no puede servirse
+ESTADOS_EN_CURSO = ('PENDIENTE', 'PROCESANDO')
+
+
+def _config(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+def encolar_comprobante(postulante):
+    """Registra la tarea de generación del comprobante y despierta a los workers.
+
+    Si COMPROBANTE_ASYNC está desactivado, el PDF se genera en línea como antes.
+    """
+    tarea = TareaComprobante.objects.create(
+        postulante=postulante,
+        cedula_identidad=postulante.cedula_identidad,
+    )
+    if not _config('COMPROBANTE_ASYNC', True):
+        tarea.intentos = _config('COMPROBANTE_MAX_INTENTOS', 3)
+        procesar_tarea(tarea)
+        return tarea
+
+    # Solo despertar a los workers cuando la fila sea visible para ellos
+    transaction.on_commit(pool.despertar)
+    return tarea
+
+
+def estado_comprobante(ci):
+    """Devuelve la última tarea registrada para la cédula (o None)."""
+    return TareaComprobante.objects.filter(cedula_identidad=ci).order_by('-id').first()
+
+
+def reclamar_tarea():
+    """Toma la siguiente tarea pendiente de forma atómica.
+
+    El UPDATE condicionado al estado hace de candado: si otro worker (de este u
+    otro proceso) la reclamó primero, el UPDATE no afecta filas y se prueba la
+    siguiente. Las tareas en PROCESANDO cuyo worker murió se recuperan tras
+    COMPROBANTE_TIMEOUT segundos; al agotar COMPROBANTE_MAX_INTENTOS quedan en
+    ERROR y la descarga genera el PDF en el momento.
+    """
+    vencidas = timezone.now() - timedelta(seconds=_config('COMPROBANTE_TIMEOUT', 300))
+    max_intentos = _config('COMPROBANTE_MAX_INTENTOS', 3)
+    TareaComprobante.objects.filter(
+        estado='PROCESANDO', fecha_actualizacion__lt=vencidas, intentos__gte=max_intentos,
+    ).update(
+        estado='ERROR',
+        error='El worker se detuvo durante el último intento',
+        fecha_actualizacion=timezone.now(),
+    )
+
+    candidatas = (
+        TareaComprobante.objects
+        .filter(intentos__lt=max_intentos)
+        .filter(Q(estado='PENDIENTE') | Q(estado='PROCESANDO', fecha_actualizacion__lt=vencidas))
+        .order_by('fecha_creacion')
+        .values_list('id', 'estado', 'intentos')[:10]
+    )
+    for tarea_id, estado, intentos in candidatas:
+        tomada = TareaComprobante.objects.filter(
+            id=tarea_id, estado=estado, intentos=intentos
+        ).update(
+            estado='PROCESANDO',
+            intentos=intentos + 1,
+            fecha_actualizacion=timezone.now(),
+        )
+        if tomada:
+            return TareaComprobante.objects.select_related(
+                'postulante__recinto_primera_opcion'
+            ).get(id=tarea_id)
+    return None
+
+
+def procesar_tarea(tarea):
+    """Genera el PDF de una tarea y registra el resultado."""
+    try:
+        postulante = tarea.postulante
+        archivo = generate_pdf(postulante)
+    except Postulante.DoesNotExist:
+        TareaComprobante.objects.filter(id=tarea.id).delete()
+        return None
+    except Exception:
+        logger.exception("Error generando el comprobante de %s", tarea.cedula_identidad)
+        max_intentos = _config('COMPROBANTE_MAX_INTENTOS', 3)
+        tarea.estado = 'PENDIENTE' if tarea.intentos < max_intentos else 'ERROR'
+        tarea.error = traceback.format_exc()
+        tarea.save(update_fields=['estado', 'error', 'fecha_actualizacion'])
+        return None
+
+    tarea.estado = 'LISTO'
+    tarea.archivo = archivo
+    tarea.error = None
+    tarea.save(update_fields=['estado', 'archivo', 'error', 'fecha_actualizacion'])
+    podar_cache()
+    return archivo
+
+
+def procesar_pendientes(detener=None):
+    """Procesa tareas hasta vaciar la cola. Devuelve cuántas se procesaron."""
+    procesadas = 0
+    while not (detener and detener.is_set()):
+        tarea = reclamar_tarea()
+        if tarea is None:
+            break
+        procesar_tarea(tarea)
+        procesadas += 1
+    return procesadas
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+class ColaWorkerPool:
+    """Pool de hilos locales que consume una cola guardada en la base de datos.
+
+    No requiere broker: la cola es la propia tabla. Los hilos se arrancan la
+    primera vez que se encola algo y, cuando no hay trabajo, revisan la tabla
+    cada COMPROBANTE_POLL segundos para recoger tareas encoladas por otros
+    procesos. `procesar(detener)` vacía la cola; `preparar()` se ejecuta una
+    vez por hilo antes de la primera tarea.
+    """
+
+    def __init__(self, nombre, procesar, workers_setting, preparar=None):
+        self.nombre = nombre
+        self.procesar = procesar
+        self.workers_setting = workers_setting
+        self.preparar = preparar
+        self._lock = threading.Lock()
+        self._hilos = []
+        self._evento = threading.Event()
+        self._detener = threading.Event()
+
+    def iniciar(self):
+        num_workers = _config(self.workers_setting, 2)
+        with self._lock:
+            self._hilos = [h for h in self._hilos if h.is_alive()]
+            faltan = num_workers - len(self._hilos)
+            for _ in range(max(faltan, 0)):
+                hilo = threading.Thread(
+                    target=self._bucle,
+                    name=f"{self.nombre}-worker-{len(self._hilos) + 1}",
+                    daemon=True,
+                )
+                hilo.start()
+                self._hilos.append(hilo)
+
+    def despertar(self):
+        self.iniciar()
+        self._evento.set()
+
+    def detener(self):
+        self._detener.set()
+        self._evento.set()
+        for hilo in self._hilos:
+            hilo.join(timeout=5)
+        self._hilos = []
+        self._detener.clear()
+
+    def _bucle(self):
+        intervalo = _config('COMPROBANTE_POLL', 5)
+        if self.preparar:
+            self.preparar()
+        while not self._detener.is_set():
+            self._evento.wait(timeout=intervalo)
+            self._evento.clear()
+            close_old_connections()
+            try:
+                self.procesar(self._detener)
+            except Exception:
+                logger.exception("Error en worker de %s", self.nombre)
+            finally:
+                close_old_connections()
+
+
+# Las capas fijas del PDF se construyen antes de la primera tarea
+pool = ColaWorkerPool('comprobante', procesar_pendientes, 'COMPROBANTE_WORKERS', preparar=get_plantilla)
@@ -1,3 +1,1522 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import os
+import random
+import re
+import runpy
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import Group, Permission, User
+from django.core.files import locks
+from django.core.management import CommandError, call_command
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, connections, transaction
+from django.db.models import QuerySet
+from django.http import Http404
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import load_workbook
+from PIL import Image
+from . import metricas, utils
+from .archivos import write_atomic
+from .caching import configuracion_sistema, cupos_cargo, invalidar_configuracion, invalidar_recintos
+from .comprobantes import podar_cache, ruta_comprobante
+from .escritura import escritura
+from .geo import haversine_km
+from .imagenes import procesar_imagenes_pendientes, reclamar_imagen
+from .limpieza import purgar_subidas
+from .lotes import insertar_con_fechas
+from .management.commands.migrate_sqlite_to_postgres import Command as MigrarAPostgres
+from .previews import admite_preview, obtener_preview
+from .servir import servir_archivo, servir_media
+from .models import ConfiguracionSistema, CupoCargo, Postulante, Recinto, RevisionPostulante, SubidaFragmentada, TareaComprobante, UploadedFile
+from .subidas import buscar_por_contenido, completar_subida, registrar_archivo, ruta_parcial
+from .tasks import encolar_comprobante, estado_comprobante, procesar_pendientes, reclamar_tarea
 
-# Create your tests here.
+# Base SQLite en archivo con el perfil de concurrencia, declarada en settings para `manage.py test`
+ALIAS = 'concurrencia'
+
+_aislamiento = {}
+
+
+def setUpModule():
+    # Archivos, caché y métricas de las pruebas fuera de los directorios reales
+    directorio = tempfile.mkdtemp(prefix='sirepre_tests_')
+    _aislamiento['directorio'] = directorio
+    _aislamiento['settings'] = override_settings(
+        MEDIA_ROOT=os.path.join(directorio, 'media'),
+        SUBIDA_DIR=os.path.join(directorio, 'media', 'subidas_parciales'),
+        PREVIEW_DIR=os.path.join(directorio, 'previews'),
+        METRICAS_ACTIVAS=False,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    _aislamiento['settings'].enable()
+
+
+def tearDownModule():
+    _aislamiento['settings'].disable()
+    shutil.rmtree(_aislamiento['directorio'], ignore_errors=True)
+
+
+def crear_postulante(ci, using=DEFAULT_DB_ALIAS, **campos):
+    datos = {
+        'nombre': 'Prueba', 'fecha_nacimiento': date(1990, 1, 1), 'cedula_identidad': ci,
+        'expedicion': 'LP', 'ciudad': 'La Paz', 'zona': 'Centro', 'calle_avenida': 'Av. Prueba',
+        'email': 'prueba@example.com', 'celular': 70000000, 'cargo_postulacion': 'Notario',
+    }
+    datos.update(campos)
+    return Postulante.objects.using(using).create(**datos)
+
+
+def crear_recinto(codigo, **campos):
+    datos = {
+        'nombre': f'U. E. {codigo}', 'codigo': codigo, 'departamento': 'La Paz', 'provincia': 'Murillo',
+        'municipio': 'La Paz', 'asiento': 'La Paz', 'zona': 'Centro',
+    }
+    datos.update(campos)
+    return Recinto.objects.create(**datos)
+
+
+def datos_registro(ci, **campos):
+    """Formulario mínimo que acepta POST /api/postulantes/ (como lo envía el frontend)."""
+    datos = {
+        'nombre': 'Prueba', 'apellidoPaterno': 'Registro', 'fechaNacimiento': '1990-01-01',
+        'cedulaIdentidad': ci, 'expedicion': 'LP', 'ciudad': 'La Paz', 'zona': 'Centro',
+        'calleAvenida': 'Av. Prueba', 'email': 'prueba@example.com', 'celular': 70000000,
+        'cargoPostulacion': 'Notario',
+    }
+    datos.update(campos)
+    return datos
+
+
+@override_settings(SQLITE_CARRIL_ESCRITURA=True)
+class EscrituraConcurrenteSQLiteTests(TransactionTestCase):
+    """Registros simultáneos sobre un archivo SQLite con SQLITE_OPCIONES_CONCURRENCIA."""
+    databases = {ALIAS}
+    escritores = 12
+    registros = 10
+    lectores = 4
+
+    def setUp(self):
+        Recinto.objects.using(ALIAS).bulk_create(
+            Recinto(nombre=f'Recinto {i}', codigo=str(i), departamento='La Paz', provincia='Murillo',
+                    municipio='La Paz', asiento='La Paz', zona='Centro')
+            for i in range(200)
+        )
+
+    def _registrar(self, hilo, errores):
+        try:
+            for i in range(self.registros):
+                ci = 1000000 + hilo * 1000 + i
+                with escritura(ALIAS):
+                    archivo = UploadedFile.objects.using(ALIAS).create(file=f'temp_uploads/{ci}.pdf')
+                    crear_postulante(ci, using=ALIAS, archivo_ci=archivo.file.name)
+        except Exception as e:
+            errores.append(e)
+        finally:
+            connections[ALIAS].close()
+
+    def _leer(self, terminado, errores, lecturas):
+        try:
+            while not terminado.is_set():
+                Postulante.objects.using(ALIAS).filter(cedula_identidad=1000000).exists()
+                list(Recinto.objects.using(ALIAS).filter(departamento='La Paz')[:50])
+                lecturas.append(1)
+        except Exception as e:
+            errores.append(e)
+        finally:
+            connections[ALIAS].close()
+
+    def test_escritores_en_paralelo_sin_bloqueos(self):
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+
+        errores, lecturas = [], []
+        terminado = threading.Event()
+        lectores = [
+            threading.Thread(target=self._leer, args=(terminado, errores, lecturas))
+            for _ in range(self.lectores)
+        ]
+        escritores = [
+            threading.Thread(target=self._registrar, args=(hilo, errores))
+            for hilo in range(self.escritores)
+        ]
+        for hilo in lectores + escritores:
+            hilo.start()
+        for hilo in escritores:
+            hilo.join()
+        terminado.set()
+        for hilo in lectores:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        self.assertEqual(Postulante.objects.using(ALIAS).count(), self.escritores * self.registros)
+        self.assertEqual(UploadedFile.objects.using(ALIAS).count(), self.escritores * self.registros)
+        self.assertGreater(len(lecturas), 0)
+
+
+@override_settings(COMPROBANTE_MAX_INTENTOS=2, COMPROBANTE_TIMEOUT=300)
+class ColaComprobantesTests(TestCase):
+    """Cola de comprobantes en tareas_comprobante (sin arrancar los hilos del pool)."""
+    ci = 4000001
+
+    def setUp(self):
+        self.postulante = crear_postulante(self.ci)
+
+    def test_una_tarea_se_reclama_una_sola_vez(self):
+        tarea = encolar_comprobante(self.postulante)
+        self.assertEqual(tarea.estado, 'PENDIENTE')
+
+        reclamada = reclamar_tarea()
+        self.assertEqual((reclamada.id, reclamada.estado, reclamada.intentos), (tarea.id, 'PROCESANDO', 1))
+        self.assertIsNone(reclamar_tarea())
+
+    def test_tarea_de_un_worker_caido_se_vuelve_a_reclamar(self):
+        tarea = encolar_comprobante(self.postulante)
+        reclamar_tarea()
+        TareaComprobante.objects.filter(id=tarea.id).update(
+            fecha_actualizacion=timezone.now() - timedelta(seconds=301),
+        )
+
+        reclamada = reclamar_tarea()
+        self.assertEqual((reclamada.id, reclamada.intentos), (tarea.id, 2))
+
+    def test_el_worker_genera_el_pdf(self):
+        encolar_comprobante(self.postulante)
+        self.assertEqual(procesar_pendientes(), 1)
+
+        self.assertEqual(estado_comprobante(self.ci).estado, 'LISTO')
+        self.assertTrue(os.path.exists(ruta_comprobante(self.ci)))
+        response = self.client.get(f'/api/postulantes/pdf/{self.ci}/estado/')
+        self.assertEqual(response.json()['estado'], 'listo')
+        response = self.client.get(f'/api/postulantes/pdf/{self.ci}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_ultimo_intento_de_un_worker_caido_queda_en_error(self):
+        tarea = encolar_comprobante(self.postulante)
+        TareaComprobante.objects.filter(id=tarea.id).update(
+            estado='PROCESANDO', intentos=2, fecha_actualizacion=timezone.now() - timedelta(hours=5),
+        )
+
+        self.assertIsNone(reclamar_tarea())
+        self.assertEqual(estado_comprobante(self.ci).estado, 'ERROR')
+        estado = self.client.get(f'/api/postulantes/pdf/{self.ci}/estado/')
+        self.assertNotEqual(estado.json()['estado'], 'pendiente')
+        # La descarga ya no espera a la cola: genera el PDF en el momento
+        response = self.client.get(f'/api/postulantes/pdf/{self.ci}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(estado_comprobante(self.ci).estado, 'LISTO')
+
+    def test_los_fallos_se_reintentan_hasta_el_maximo(self):
+        encolar_comprobante(self.postulante)
+        with mock.patch('postulantes.tasks.generate_pdf', side_effect=RuntimeError('disco lleno')), \
+                self.assertLogs('postulantes.tasks', 'ERROR'):
+            self.assertEqual(procesar_pendientes(), 2)
+
+        tarea = estado_comprobante(self.ci)
+        self.assertEqual((tarea.estado, tarea.intentos), ('ERROR', 2))
+        self.assertIn('disco lleno', tarea.error)
+
+    def test_descarga_pendiente_responde_202(self):
+        encolar_comprobante(self.postulante)
+        with mock.patch('postulantes.views.pool') as pool:
+            response = self.client.get(f'/api/postulantes/pdf/{self.ci}/')
+            estado = self.client.get(f'/api/postulantes/pdf/{self.ci}/estado/')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Retry-After'], '2')
+        pool.despertar.assert_called()
+        self.assertEqual(estado.json()['estado'], 'pendiente')
+
+    def test_cedula_sin_postulante(self):
+        response = self.client.get('/api/postulantes/pdf/999/estado/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['estado'], 'no_encontrado')
+
+
+class EscrituraAtomicaTests(TestCase):
+    """write_atomic: un lector ve la versión anterior o la nueva completa, nunca una mezcla."""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp(dir=_aislamiento['directorio'])
+        self.path = os.path.join(self.directorio, 'comprobante.pdf')
+        write_atomic(self.path, b'anterior')
+
+    def test_fallo_al_renombrar_conserva_la_version_anterior(self):
+        with mock.patch('postulantes.archivos.os.replace', side_effect=OSError('disco lleno')), \
+                self.assertRaises(OSError):
+            write_atomic(self.path, b'nueva')
+
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'anterior')
+        self.assertEqual(os.listdir(self.directorio), ['comprobante.pdf'])
+
+    def test_fallo_a_medio_escribir_no_deja_temporales(self):
+        with self.assertRaises(TypeError):
+            write_atomic(self.path, 'no son bytes')
+
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'anterior')
+        self.assertEqual(os.listdir(self.directorio), ['comprobante.pdf'])
+
+    def test_escritores_simultaneos(self):
+        versiones = [bytes([i]) * (256 * 1024) for i in range(8)]
+        lecturas, errores = [], []
+        terminado = threading.Event()
+
+        def escribir(contenido):
+            try:
+                for _ in range(10):
+                    write_atomic(self.path, contenido)
+            except Exception as e:
+                errores.append(e)
+
+        def leer():
+            while not terminado.is_set():
+                with open(self.path, 'rb') as f:
+                    lecturas.append(f.read())
+
+        lector = threading.Thread(target=leer)
+        lector.start()
+        escritores = [threading.Thread(target=escribir, args=(v,)) for v in versiones]
+        for hilo in escritores:
+            hilo.start()
+        for hilo in escritores:
+            hilo.join()
+        terminado.set()
+        lector.join()
+
+        self.assertEqual(errores, [])
+        validas = set(versiones) | {b'anterior'}
+        self.assertTrue(lecturas)
+        self.assertTrue(all(lectura in validas for lectura in lecturas))
+        with open(self.path, 'rb') as f:
+            self.assertIn(f.read(), versiones)
+        self.assertEqual(os.listdir(self.directorio), ['comprobante.pdf'])
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+
+
+class Interrupcion(BaseException):
+    """Corta el comando como un Ctrl+C (no la atrapan los workers)."""
+
+
+# Hilos en lugar de procesos: comparten la base de pruebas y los mocks
+@mock.patch('postulantes.management.commands.regenerate_comprobantes.ProcessPoolExecutor', ThreadPoolExecutor)
+class RegenerarComprobantesTests(TestCase):
+    """regenerate_comprobantes: lotes, reanudación y errores de los workers."""
+
+    def setUp(self):
+        self.postulantes = [crear_postulante(4000301 + i) for i in range(5)]
+        self.estado = os.path.join(tempfile.mkdtemp(dir=_aislamiento['directorio']), 'estado.json')
+
+    def regenerar(self, *args):
+        self.salida, self.errores = io.StringIO(), io.StringIO()
+        call_command('regenerate_comprobantes', *args, estado=self.estado, chunk_size=2, workers=2,
+                     stdout=self.salida, stderr=self.errores)
+        return self.salida.getvalue()
+
+    def test_regenera_todos_y_borra_el_estado(self):
+        salida = self.regenerar()
+
+        for postulante in self.postulantes:
+            self.assertTrue(os.path.exists(ruta_comprobante(postulante.cedula_identidad)))
+        self.assertIn('Regenerados 5 comprobantes', salida)
+        self.assertFalse(os.path.exists(self.estado))
+
+    def test_reanuda_despues_del_ultimo_lote_completo(self):
+        generados = []
+        interrumpir = [True]
+
+        def generar(postulante):
+            if interrumpir[0] and postulante.id == self.postulantes[3].id:
+                raise Interrupcion
+            generados.append(postulante.id)
+
+        with mock.patch('postulantes.utils.generate_pdf', side_effect=generar), self.assertRaises(Interrupcion):
+            self.regenerar()
+        with open(self.estado, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['ultimo_id'], self.postulantes[1].id)
+
+        generados.clear()
+        interrumpir[0] = False
+        with mock.patch('postulantes.utils.generate_pdf', side_effect=generar):
+            salida = self.regenerar('--reanudar')
+
+        self.assertIn(f'Reanudando desde el postulante id > {self.postulantes[1].id}', salida)
+        self.assertEqual(sorted(generados), [p.id for p in self.postulantes[2:]])
+        self.assertFalse(os.path.exists(self.estado))
+
+    def test_estado_de_otros_filtros(self):
+        with open(self.estado, 'w', encoding='utf-8') as f:
+            json.dump({'filtros': {'desde': None, 'hasta': None, 'cargo': ['Otro'], 'ci': None}, 'ultimo_id': 1}, f)
+
+        with self.assertRaisesMessage(CommandError, 'corresponde a otros filtros'):
+            self.regenerar('--reanudar')
+
+    def test_los_errores_se_informan(self):
+        fallido = self.postulantes[2]
+
+        def generar(postulante):
+            if postulante.id == fallido.id:
+                raise RuntimeError('fuente dañada')
+
+        with mock.patch('postulantes.utils.generate_pdf', side_effect=generar), \
+                self.assertRaisesMessage(CommandError, 'errores: 1'):
+            self.regenerar()
+        self.assertIn(f'Error regenerando {fallido.cedula_identidad}: fuente dañada', self.errores.getvalue())
+        self.assertIn('5/5 comprobantes', self.salida.getvalue())  # Los demás se generan igual
+
+
+def flujos_pdf(contenido):
+    """Contenido decodificado de los streams de un PDF de reportlab (ASCII85 + Flate)."""
+    for crudo in re.findall(rb'stream\r?\n(.*?)endstream', contenido, re.S):
+        try:
+            yield zlib.decompress(base64.a85decode(crudo.strip().removesuffix(b'~>')))
+        except ValueError:
+            yield crudo
+
+
+def textos_pdf(contenido):
+    return {m.decode('latin-1') for f in flujos_pdf(contenido) for m in re.findall(rb'\((.*?)\) Tj', f)}
+
+
+class ComprobantePDFTests(TestCase):
+    """generate_pdf: capas como Form XObjects y QR vectorial, con el mismo contenido que antes."""
+    ci = 4000201
+
+    def setUp(self):
+        self.postulante = crear_postulante(
+            self.ci, nombre='Ana', apellido_paterno='Quispe', apellido_materno='Mamani', complemento='1A',
+        )
+
+    def generar(self, **opciones):
+        nombre = utils.generate_pdf(self.postulante, **opciones)
+        with open(os.path.join(settings.MEDIA_ROOT, 'comprobantes', nombre), 'rb') as f:
+            return f.read()
+
+    def test_qr_lleva_los_datos_del_postulante(self):
+        generados = []
+        original = utils._build_qr
+
+        def construir(datos):
+            generados.append(original(datos))
+            return generados[-1]
+
+        with mock.patch('postulantes.utils._build_qr', side_effect=construir), \
+                mock.patch('postulantes.utils.draw_qr', wraps=utils.draw_qr) as draw_qr:
+            self.generar()
+
+        datos = json.loads(base64.b64decode(generados[0].data_list[0].data))
+        self.assertEqual((datos['ci'], datos['complemento']), (self.ci, '1A'))
+        self.assertEqual(datos['nombres'], 'Ana Quispe Mamani')
+        self.assertEqual(datos['fechaNacimiento'], '1990-01-01')
+        # Se dibuja exactamente esa matriz, como vectores y no como imagen
+        self.assertEqual(draw_qr.call_args.args[1], generados[0].get_matrix())
+
+    def test_qr_vectorial_no_agrega_imagenes(self):
+        vectorial = self.generar()
+        png = self.generar(qr_vectorial=False)
+
+        self.assertEqual(png.count(b'/Subtype /Image'), vectorial.count(b'/Subtype /Image') + 1)
+        self.assertFalse(os.listdir(os.path.join(settings.MEDIA_ROOT, 'qr_temp')))
+
+    def test_plantilla_conserva_el_contenido(self):
+        con_plantilla = self.generar()
+        sin_plantilla = self.generar(usar_plantilla=False)
+
+        # Marca de agua, cabecera y pie como Form XObjects, definidos una sola vez
+        self.assertEqual(con_plantilla.count(b'/Subtype /Form'), 4)
+        self.assertEqual(sin_plantilla.count(b'/Subtype /Form'), 0)
+        self.assertLess(len(con_plantilla), len(sin_plantilla))
+
+        def sin_fecha(textos):
+            # La fecha de emisión y el número de registro dependen de la hora
+            return {t for t in textos if not t.startswith(('Fecha de emisi', 'Nro. de registro'))}
+        textos = textos_pdf(con_plantilla)
+        self.assertEqual(sin_fecha(textos), sin_fecha(textos_pdf(sin_plantilla)))
+        self.assertIn('ANA QUISPE MAMANI', ' '.join(textos))
+        self.assertIn(str(self.ci), ' '.join(textos))
+        self.assertTrue(any(t.startswith('COMPROBANTE DE POSTULACI') for t in textos))
+
+
+class CacheComprobantesTests(TestCase):
+    """media/comprobantes como caché: se regenera lo que falta y se podan los candados."""
+    ci = 4000101
+
+    def setUp(self):
+        crear_postulante(self.ci)
+        self.candado = os.path.join(settings.MEDIA_ROOT, 'comprobantes', '.locks', f'{self.ci}.lock')
+
+    def envejecer(self, path):
+        antes = time.time() - 3600
+        os.utime(path, (antes, antes))
+
+    def test_candados_sin_uso_se_borran(self):
+        self.assertEqual(self.client.get(f'/api/postulantes/pdf/{self.ci}/').status_code, 200)
+        self.assertTrue(os.path.exists(self.candado))
+
+        podar_cache(forzar=True)
+        self.assertTrue(os.path.exists(self.candado))  # Recién usado
+        self.envejecer(self.candado)
+        podar_cache(forzar=True)
+        self.assertFalse(os.path.exists(self.candado))
+        self.assertTrue(os.path.exists(ruta_comprobante(self.ci)))
+
+    def test_candado_tomado_no_se_borra(self):
+        os.makedirs(os.path.dirname(self.candado), exist_ok=True)
+        with open(self.candado, 'wb') as candado:
+            locks.lock(candado, locks.LOCK_EX)
+            self.envejecer(self.candado)
+            podar_cache(forzar=True)
+            self.assertTrue(os.path.exists(self.candado))
+            locks.unlock(candado)
+
+    def test_pdf_podado_antes_de_enviarlo_se_regenera(self):
+        def podar(path):
+            if podar.primera:
+                podar.primera = False
+                os.remove(path)
+        podar.primera = True
+
+        with mock.patch('postulantes.views.registrar_acceso', side_effect=podar):
+            response = self.client.get(f'/api/postulantes/pdf/{self.ci}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+
+class UnicidadCedulaTests(TestCase):
+    """Un CI se registra una vez por complemento; NULL y '' son "sin complemento"."""
+
+    def setUp(self):
+        invalidar_configuracion()
+
+    def test_sin_complemento_null_y_vacio_son_el_mismo(self):
+        crear_postulante(5000001)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            crear_postulante(5000001, complemento='')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            crear_postulante(5000001)
+
+    def test_mismo_ci_con_otro_complemento(self):
+        crear_postulante(5000002)
+        crear_postulante(5000002, complemento='1A')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            crear_postulante(5000002, complemento='1A')
+        self.assertEqual(Postulante.objects.por_ci(5000002).count(), 1)
+        self.assertEqual(Postulante.objects.por_ci(5000002, ' 1A ').count(), 1)
+
+    def test_registro_repetido_responde_400(self):
+        primera = self.client.post('/api/postulantes/', datos_registro(5000003, complemento=''))
+        segunda = self.client.post('/api/postulantes/', datos_registro(5000003))
+
+        self.assertEqual(primera.status_code, 201, primera.content)
+        self.assertIsNone(Postulante.objects.get(cedula_identidad=5000003).complemento)
+        self.assertEqual(segunda.status_code, 400)
+        self.assertIn('Ya existe', segunda.json()['message'])
+
+    def test_verificar_existencia(self):
+        crear_postulante(5000004, complemento='2B')
+        url = '/api/postulantes/existe/'
+        self.assertTrue(self.client.get(url, {'cedula_identidad': 5000004, 'complemento': '2B'}).json()['existe'])
+        self.assertFalse(self.client.get(url, {'cedula_identidad': 5000004, 'complemento': 'null'}).json()['existe'])
+
+
+class CuposYVentanaTests(TestCase):
+    """El registro respeta el cupo por cargo y la ventana programada de postulación."""
+
+    def setUp(self):
+        invalidar_configuracion()
+
+    def tearDown(self):
+        invalidar_configuracion()
+
+    def ocupados(self, cargo):
+        return CupoCargo.objects.get(cargo_postulacion=cargo).ocupados
+
+    def test_el_registro_ocupa_el_cupo_hasta_agotarlo(self):
+        CupoCargo.objects.create(cargo_postulacion='Notario', limite=1)
+
+        primera = self.client.post('/api/postulantes/', datos_registro(6000001))
+        segunda = self.client.post('/api/postulantes/', datos_registro(6000002))
+
+        self.assertEqual(primera.status_code, 201, primera.content)
+        self.assertEqual(segunda.status_code, 403)
+        self.assertEqual(segunda.json()['message'], 'No quedan cupos disponibles para el cargo Notario.')
+        self.assertEqual(self.ocupados('Notario'), 1)
+        self.assertFalse(Postulante.objects.filter(cedula_identidad=6000002).exists())
+
+    def test_cupo_desactualizado_en_memoria_no_se_excede(self):
+        cupo = CupoCargo.objects.create(cargo_postulacion='Notario', limite=1)
+        self.assertEqual(cupos_cargo()['Notario'], (1, 0))
+        # Otro proceso ocupó el último lugar después de la lectura en memoria
+        CupoCargo.objects.filter(pk=cupo.pk).update(ocupados=1)
+
+        response = self.client.post('/api/postulantes/', datos_registro(6000003))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.ocupados('Notario'), 1)
+
+    def test_cambio_de_cargo_mueve_el_lugar(self):
+        CupoCargo.objects.create(cargo_postulacion='Notario', limite=5, ocupados=1)
+        CupoCargo.objects.create(cargo_postulacion='Guía', limite=5)
+        postulante = crear_postulante(6000004)
+
+        postulante.cargo_postulacion = 'Guía'
+        postulante.save()
+        self.assertEqual((self.ocupados('Notario'), self.ocupados('Guía')), (0, 1))
+
+        postulante.nombre = 'Otro'
+        postulante.save(update_fields=['nombre'])
+        postulante.save()
+        self.assertEqual((self.ocupados('Notario'), self.ocupados('Guía')), (0, 1))
+
+        postulante.delete()
+        self.assertEqual(self.ocupados('Guía'), 0)
+
+    def test_antes_de_la_apertura(self):
+        ConfiguracionSistema.objects.create(fecha_apertura=timezone.now() + timedelta(days=1))
+
+        response = self.client.post('/api/postulantes/', datos_registro(6000005))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('abrirá el', response.json()['message'])
+        self.assertFalse(Postulante.objects.exists())
+
+    def test_despues_del_cierre(self):
+        ConfiguracionSistema.objects.create(fecha_cierre=timezone.now() - timedelta(minutes=1), mensaje='Cerrado.')
+
+        response = self.client.post('/api/postulantes/', datos_registro(6000006))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['message'], 'Cerrado.')
+
+    def test_dentro_de_la_ventana(self):
+        ahora = timezone.now()
+        ConfiguracionSistema.objects.create(
+            fecha_apertura=ahora - timedelta(days=1), fecha_cierre=ahora + timedelta(days=1),
+        )
+
+        response = self.client.post('/api/postulantes/', datos_registro(6000007))
+
+        self.assertEqual(response.status_code, 201, response.content)
+
+
+@override_settings(CONFIGURACION_CACHE_TTL=5)
+class CacheConfiguracionTests(TestCase):
+    """Configuración y cupos en memoria del proceso: vencen con el TTL y se invalidan al confirmar un cambio."""
+
+    def setUp(self):
+        invalidar_configuracion()
+        self.config = ConfiguracionSistema.objects.create(mensaje='Primero')
+        reloj = mock.patch('postulantes.caching.time')
+        self.reloj = reloj.start().monotonic
+        self.reloj.return_value = 1000.0
+        self.addCleanup(reloj.stop)
+        self.addCleanup(invalidar_configuracion)
+
+    def test_sin_consultas_hasta_que_vence_el_ttl(self):
+        self.assertEqual(configuracion_sistema().mensaje, 'Primero')
+        # Un cambio por fuera del ORM (otro proceso) no dispara la invalidación
+        ConfiguracionSistema.objects.filter(pk=self.config.pk).update(mensaje='Segundo')
+
+        self.reloj.return_value = 1004.9
+        with self.assertNumQueries(0):
+            self.assertEqual(configuracion_sistema().mensaje, 'Primero')
+
+        self.reloj.return_value = 1005.0
+        self.assertEqual(configuracion_sistema().mensaje, 'Segundo')
+
+    def test_guardar_la_configuracion_invalida_al_confirmar(self):
+        self.assertEqual(configuracion_sistema().mensaje, 'Primero')
+        self.config.mensaje = 'Segundo'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.config.save()
+            self.assertEqual(configuracion_sistema().mensaje, 'Primero')
+
+        self.assertEqual(configuracion_sistema().mensaje, 'Segundo')
+
+    def test_guardar_un_cupo_invalida_los_cupos(self):
+        self.assertEqual(cupos_cargo(), {})
+        with self.captureOnCommitCallbacks(execute=True):
+            CupoCargo.objects.create(cargo_postulacion='Notario', limite=3)
+
+        self.assertEqual(cupos_cargo(), {'Notario': (3, 0)})
+
+
+class ResumenRevisionesTests(TestCase):
+    """total_revisiones, ultima_revision y estado_revision siguen a las revisiones."""
+
+    def setUp(self):
+        self.postulante = crear_postulante(5100001)
+
+    def revisar(self, hace_horas, **cumple):
+        revision = RevisionPostulante.objects.create(postulante=self.postulante, **cumple)
+        # fecha_revision es auto_now_add: se fija después para ordenar el historial
+        fecha = timezone.now() - timedelta(hours=hace_horas)
+        RevisionPostulante.objects.filter(pk=revision.pk).update(fecha_revision=fecha)
+        revision.fecha_revision = fecha
+        return revision
+
+    def resumen(self):
+        self.postulante.refresh_from_db()
+        return self.postulante.total_revisiones, self.postulante.ultima_revision_id, self.postulante.estado_revision
+
+    def test_crear_editar_y_borrar(self):
+        self.assertEqual(self.resumen(), (0, None, 'SIN_REVISION'))
+        todo = {'cumple_experiencia_especifica': 'CUMPLE', 'cumple_no_militancia': 'CUMPLE',
+                'cumple_bachiller_o_superior': 'CUMPLE'}
+        anterior = self.revisar(5, **todo)
+        ultima = RevisionPostulante.objects.create(postulante=self.postulante)
+        self.assertEqual(self.resumen(), (2, ultima.id, 'CON_OBSERVACIONES'))
+
+        # Editar una revisión anterior no cambia cuál es la última
+        anterior.cumple_no_militancia = 'NO_CUMPLE'
+        anterior.save()
+        self.assertEqual(self.resumen(), (2, ultima.id, 'CON_OBSERVACIONES'))
+        for campo, valor in todo.items():
+            setattr(ultima, campo, valor)
+        ultima.save()
+        self.assertEqual(self.resumen(), (2, ultima.id, 'CUMPLE_TODO'))
+
+        ultima.delete()
+        self.assertEqual(self.resumen(), (1, anterior.id, 'CON_OBSERVACIONES'))
+        anterior.delete()
+        self.assertEqual(self.resumen(), (0, None, 'SIN_REVISION'))
+
+    def test_migracion_calcula_el_resumen_existente(self):
+        otro = crear_postulante(5100002)
+        self.revisar(3)
+        ultima = self.revisar(1, cumple_experiencia_especifica='CUMPLE', cumple_no_militancia='CUMPLE',
+                              cumple_bachiller_o_superior='CUMPLE')
+        self.revisar(2)
+        # Como antes de 0010: sin resumen
+        Postulante.objects.update(total_revisiones=0, ultima_revision=None, estado_revision='SIN_REVISION')
+
+        migracion = importlib.import_module('postulantes.migrations.0010_resumen_revisiones')
+        migracion.calcular_resumen(apps, mock.Mock(connection=connections[DEFAULT_DB_ALIAS]))
+
+        self.assertEqual(self.resumen(), (3, ultima.id, 'CUMPLE_TODO'))
+        otro.refresh_from_db()
+        self.assertEqual((otro.total_revisiones, otro.ultima_revision_id), (0, None))
+
+
+class UnirDuplicadosTests(TransactionTestCase):
+    """Duplicados anteriores a la migración 0011: la migración se detiene y unir_duplicados los une."""
+
+    def setUp(self):
+        # Sin las restricciones únicas, como antes de 0011
+        conexion = connections[DEFAULT_DB_ALIAS]
+        with conexion.schema_editor() as editor:
+            for restriccion in Postulante._meta.constraints:
+                editor.remove_constraint(Postulante, restriccion)
+        self.addCleanup(self.restaurar_restricciones)
+        self.conservado = crear_postulante(5200001)
+        self.repetido = crear_postulante(5200001, complemento='')
+        crear_postulante(5200002, complemento='1A')
+        crear_postulante(5200002, complemento='1A')
+        crear_postulante(5200003)
+        self.revision = RevisionPostulante.objects.create(
+            postulante=self.repetido, cumple_experiencia_especifica='CUMPLE', cumple_no_militancia='CUMPLE',
+            cumple_bachiller_o_superior='CUMPLE',
+        )
+
+    def restaurar_restricciones(self):
+        Postulante.objects.all().delete()
+        with connections[DEFAULT_DB_ALIAS].schema_editor() as editor:
+            for restriccion in Postulante._meta.constraints:
+                editor.add_constraint(Postulante, restriccion)
+
+    def unir(self, *args):
+        salida = io.StringIO()
+        call_command('unir_duplicados', *args, stdout=salida)
+        return salida.getvalue()
+
+    def verificar(self):
+        migracion = importlib.import_module('postulantes.migrations.0011_indice_ci_complemento')
+        migracion.verificar_duplicados(apps, mock.Mock(connection=connections[DEFAULT_DB_ALIAS]))
+
+    def test_la_migracion_se_detiene_sin_borrar(self):
+        Postulante.objects.filter(complemento='').update(complemento=None)  # normalizar_complemento
+        with self.assertRaisesMessage(RuntimeError, 'CI 5200002 (1A): 2 registros'):
+            self.verificar()
+        self.assertEqual(Postulante.objects.count(), 5)
+
+    def test_dry_run_solo_lista(self):
+        salida = self.unir('--dry-run')
+
+        self.assertIn(f'CI 5200001 (sin complemento): se conserva el id {self.conservado.id}; '
+                      f'se eliminarían {self.repetido.id}', salida)
+        self.assertIn('CI 5200002 (1A)', salida)
+        self.assertEqual(Postulante.objects.count(), 5)
+
+    def test_une_en_el_registro_mas_antiguo(self):
+        salida = self.unir()
+
+        self.assertIn('2 cédulas unidas; 2 postulantes eliminados', salida)
+        self.assertFalse(Postulante.objects.filter(id=self.repetido.id).exists())
+        self.revision.refresh_from_db()
+        self.assertEqual(self.revision.postulante_id, self.conservado.id)
+        self.conservado.refresh_from_db()
+        self.assertEqual((self.conservado.total_revisiones, self.conservado.estado_revision), (1, 'CUMPLE_TODO'))
+        self.verificar()
+        self.assertIn('No hay postulantes duplicados', self.unir())
+
+
+class CacheRecintosTests(TestCase):
+    """Lista y facetas de recintos servidas desde la caché versionada, con ETag y 304."""
+    url = '/api/postulantes/recintos/'
+
+    def setUp(self):
+        crear_recinto('R1', zona='Sopocachi')
+        crear_recinto('R2', provincia='Omasuyos', municipio='Achacachi')
+        invalidar_recintos()
+
+    def test_lista_comprimida_y_sin_consultas_desde_la_cache(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].endswith('-gzip"'))
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))), 2)
+
+        with self.assertNumQueries(0):
+            otra = self.client.get(self.url)
+        self.assertNotIn('Content-Encoding', otra)
+        self.assertEqual(len(otra.json()), 2)
+
+    def test_if_none_match_responde_304(self):
+        etag = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        # El ETag de otra codificación también revalida
+        self.assertEqual(response['ETag'], etag.replace('-gzip', ''))
+
+    def test_guardar_un_recinto_invalida_la_cache(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_recinto('R3')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()), 3)
+
+    def test_la_cache_se_invalida_al_confirmar(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            crear_recinto('R3')
+            # Antes de confirmar, la versión no cambia: nadie cachea datos a medio escribir
+            self.assertEqual(self.client.get(self.url)['ETag'], etag)
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+
+    def test_filtros_usan_la_paginacion(self):
+        response = self.client.get(self.url, {'provincia': 'Omasuyos'})
+        self.assertNotIn('ETag', response)
+        self.assertEqual([r['codigo'] for r in response.json()['results']], ['R2'])
+
+    def test_facetas(self):
+        facetas = self.client.get('/api/postulantes/recintos/facetas/').json()
+        self.assertEqual([(d['nombre'], d['total']) for d in facetas], [('La Paz', 2)])
+        self.assertEqual(sorted(p['nombre'] for p in facetas[0]['provincias']), ['Murillo', 'Omasuyos'])
+
+
+class RecintosCercanosTests(TestCase):
+    """Búsqueda de los recintos más cercanos con el índice en rejilla."""
+    url = '/api/postulantes/recintos/cercanos/'
+
+    def setUp(self):
+        rng = random.Random(9)
+        for i in range(300):
+            crear_recinto(f'G{i}', latitud=rng.uniform(-17.5, -15.5), longitud=rng.uniform(-69, -67))
+        crear_recinto('SIN_COORDENADAS')
+        invalidar_recintos()
+
+    def test_coincide_con_la_busqueda_exhaustiva(self):
+        lat, lon = -16.5, -68.15
+        esperados = sorted(
+            (haversine_km(lat, lon, float(r.latitud), float(r.longitud)), r.codigo)
+            for r in Recinto.objects.exclude(latitud=None)
+        )
+        response = self.client.get(self.url, {'lat': lat, 'lon': lon, 'k': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['codigo'] for r in response.json()], [codigo for _, codigo in esperados[:10]])
+
+        dentro = [codigo for distancia, codigo in esperados if distancia <= 15]
+        response = self.client.get(self.url, {'lat': lat, 'lon': lon, 'k': 50, 'radio_km': 15})
+        self.assertEqual([r['codigo'] for r in response.json()], dentro[:50])
+        self.assertTrue(all(r['distancia_km'] <= 15 for r in response.json()))
+
+    def test_parametros_invalidos_responden_400(self):
+        for parametros in (
+            {'lat': 'abc', 'lon': -68},
+            {'lat': -16.5},
+            {'lat': 91, 'lon': -68},
+            {'lat': 'nan', 'lon': -68},
+            {'lat': -16.5, 'lon': -68, 'k': 0},
+            {'lat': -16.5, 'lon': -68, 'radio_km': 0},
+            {'lat': -16.5, 'lon': -68, 'radio_km': 'nan'},
+            {'lat': -16.5, 'lon': -68, 'radio_km': 'inf'},
+        ):
+            with self.subTest(**parametros):
+                self.assertEqual(self.client.get(self.url, parametros).status_code, 400)
+
+
+class ImportarRecintosTests(TestCase):
+    """import_recintos aplica solo las diferencias con el CSV."""
+    columnas = ['Código', 'Nombre', 'Departamento', 'Provincia', 'Municipio', 'Asiento', 'Zona', 'Longitud', 'Latitud']
+
+    def setUp(self):
+        self.csv = os.path.join(tempfile.mkdtemp(dir=_aislamiento['directorio']), 'recintos.csv')
+
+    def escribir(self, *filas):
+        with open(self.csv, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(self.columnas)
+            for codigo, nombre, zona in filas:
+                escritor.writerow([codigo, nombre, 'La Paz', 'Murillo', 'La Paz', 'La Paz', zona, '-68.1', '-16.5'])
+
+    def importar(self, *opciones):
+        salida = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_recintos', self.csv, *opciones, stdout=salida, stderr=io.StringIO())
+        return salida.getvalue()
+
+    def test_importar_dos_veces(self):
+        self.escribir(('R1', 'U. E. Uno', 'Centro'), ('R2', 'U. E. Dos', 'Sopocachi'))
+        self.assertIn('2 rows: 2 new, 0 changed, 0 unchanged', self.importar())
+        self.assertIn('2 rows: 0 new, 0 changed, 2 unchanged', self.importar())
+
+        self.escribir(('R1', 'U. E. Uno', 'Miraflores'), ('R2', 'U. E. Dos', 'Sopocachi'), ('R3', 'U. E. Tres', 'Centro'))
+        self.assertIn('3 rows: 1 new, 1 changed, 1 unchanged', self.importar())
+        self.assertEqual(Recinto.objects.get(codigo='R1').zona, 'Miraflores')
+        self.assertEqual(Recinto.objects.get(codigo='R3').longitud, -68.1)
+
+    def test_dry_run_no_escribe(self):
+        crear_recinto('R1', zona='Centro')
+        self.escribir(('R1', 'U. E. R1', 'Miraflores'), ('R2', 'U. E. Dos', 'Sopocachi'))
+
+        salida = self.importar('--dry-run', '--delete-missing')
+
+        self.assertIn('1 new, 1 changed', salida)
+        self.assertIn("~ R1 zona: 'Centro' -> 'Miraflores'", salida)
+        self.assertIn('Dry run', salida)
+        self.assertEqual(list(Recinto.objects.values_list('codigo', 'zona')), [('R1', 'Centro')])
+
+    def test_faltantes_se_borran_solo_con_delete_missing(self):
+        crear_recinto('R1')
+        crear_recinto('R9')
+        self.escribir(('R1', 'U. E. R1', 'Centro'))
+
+        self.assertIn('1 missing from CSV (kept)', self.importar())
+        self.assertTrue(Recinto.objects.filter(codigo='R9').exists())
+
+        self.importar('--delete-missing')
+        self.assertEqual(list(Recinto.objects.values_list('codigo', flat=True)), ['R1'])
+
+
+class SubidaFragmentadaTests(TestCase):
+    """Subida reanudable por fragmentos con verificación del sha256."""
+    url = '/api/postulantes/upload/sesiones/'
+    contenido = os.urandom(300 * 1024)
+
+    def _iniciar(self, contenido=None, **datos):
+        contenido = self.contenido if contenido is None else contenido
+        datos = {'nombre': 'hoja_de_vida.pdf', 'tamano': len(contenido),
+                 'sha256': hashlib.sha256(contenido).hexdigest(), **datos}
+        return self.client.post(self.url, datos, content_type='application/json')
+
+    def _put(self, sesion, offset, datos):
+        return self.client.put(f'{self.url}{sesion}/', datos, content_type='application/octet-stream',
+                               HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_sha256_obligatorio(self):
+        self.assertEqual(self._iniciar(sha256='').status_code, 400)
+        self.assertEqual(self._iniciar(sha256='xyz').status_code, 400)
+        self.assertFalse(SubidaFragmentada.objects.exists())
+
+    def test_subida_completa_y_reanudable(self):
+        inicio = self._iniciar().json()
+        sesion, corte = inicio['id'], 100 * 1024
+        self.assertEqual(inicio['sha256'], hashlib.sha256(self.contenido).hexdigest())
+
+        self.assertEqual(self._put(sesion, 0, self.contenido[:corte]).json()['offset'], corte)
+        # Un fragmento repetido (respuesta perdida) no avanza la sesión
+        repetido = self._put(sesion, 0, self.contenido[:corte])
+        self.assertEqual((repetido.status_code, repetido.json()['offset']), (409, corte))
+        self.assertEqual(self.client.get(f'{self.url}{sesion}/').json()['offset'], corte)
+        self.assertEqual(self.client.post(f'{self.url}{sesion}/completar/').status_code, 409)
+
+        self.assertEqual(self._put(sesion, corte, self.contenido[corte:]).json()['offset'], len(self.contenido))
+        fin = self.client.post(f'{self.url}{sesion}/completar/')
+        self.assertEqual(fin.status_code, 201)
+        self.assertEqual(fin.json()['sha256'], inicio['sha256'])
+        uploaded = UploadedFile.objects.get(id=fin.json()['id'])
+        with uploaded.file.open('rb') as f:
+            self.assertEqual(f.read(), self.contenido)
+        self.assertFalse(os.path.exists(ruta_parcial(SubidaFragmentada.objects.get(id=sesion))))
+        # Reintento de "completar" cuya respuesta se perdió
+        self.assertEqual(self.client.post(f'{self.url}{sesion}/completar/').json()['id'], uploaded.id)
+
+    def test_checksum_incorrecto_reinicia_la_sesion(self):
+        sesion = self._iniciar(sha256='0' * 64).json()['id']
+        self._put(sesion, 0, self.contenido)
+
+        response = self.client.post(f'{self.url}{sesion}/completar/')
+        self.assertEqual((response.status_code, response.json()['offset']), (400, 0))
+        subida = SubidaFragmentada.objects.get(id=sesion)
+        self.assertEqual((subida.estado, subida.recibido), ('ABIERTA', 0))
+        self.assertFalse(UploadedFile.objects.exists())
+
+    def test_un_solo_escritor_por_sesion(self):
+        sesion = self._iniciar().json()['id']
+        subida = SubidaFragmentada.objects.get(id=sesion)
+        # Otro PUT en curso sobre la misma sesión tiene tomado el archivo parcial
+        with open(ruta_parcial(subida), 'r+b') as otro:
+            locks.lock(otro, locks.LOCK_EX)
+            response = self._put(sesion, 0, self.contenido[:1024])
+            locks.unlock(otro)
+
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 0))
+        self.assertEqual(os.path.getsize(ruta_parcial(subida)), 0)
+        self.assertEqual(self._put(sesion, 0, self.contenido[:1024]).json()['offset'], 1024)
+
+    def test_completar_con_la_sesion_tomada(self):
+        sesion = self._iniciar().json()['id']
+        self._put(sesion, 0, self.contenido)
+        subida = SubidaFragmentada.objects.get(id=sesion)
+        # Otra petición está verificando y registrando el archivo parcial
+        with open(ruta_parcial(subida), 'r+b') as otro:
+            locks.lock(otro, locks.LOCK_EX)
+            response = self.client.post(f'{self.url}{sesion}/completar/')
+            locks.unlock(otro)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(SubidaFragmentada.objects.get(id=sesion).estado, 'ABIERTA')
+
+    def test_error_al_registrar_deja_la_sesion_abierta(self):
+        sesion = self._iniciar().json()['id']
+        self._put(sesion, 0, self.contenido)
+        subida = SubidaFragmentada.objects.get(id=sesion)
+
+        with mock.patch('postulantes.subidas.registrar_archivo', side_effect=Interrupcion):
+            with self.assertRaises(Interrupcion):
+                completar_subida(subida)
+        subida.refresh_from_db()
+        self.assertEqual((subida.estado, subida.archivo_id), ('ABIERTA', None))
+        self.assertEqual(os.path.getsize(ruta_parcial(subida)), len(self.contenido))
+
+        fin = self.client.post(f'{self.url}{sesion}/completar/')
+        self.assertEqual(fin.status_code, 201)
+        self.assertEqual(SubidaFragmentada.objects.get(id=sesion).estado, 'COMPLETA')
+
+
+class ArchivosPorContenidoTests(TestCase):
+    """Un UploadedFile y un archivo en disco por contenido distinto."""
+
+    def _subir(self, nombre, contenido):
+        return self.client.post('/api/postulantes/upload/', {'file': SimpleUploadedFile(nombre, contenido)})
+
+    def test_mismo_contenido_reutiliza_el_registro_sin_escribir(self):
+        primera = self._subir('ci.pdf', b'%PDF-1.4 ci')
+        campo = UploadedFile._meta.get_field('file')
+        with mock.patch.object(campo.storage, 'save') as save:
+            segunda = self._subir('otro_nombre.pdf', b'%PDF-1.4 ci')
+        save.assert_not_called()
+
+        self.assertEqual(primera.json()['id'], segunda.json()['id'])
+        uploaded = UploadedFile.objects.get()
+        self.assertEqual(uploaded.sha256, hashlib.sha256(b'%PDF-1.4 ci').hexdigest())
+        self.assertEqual(uploaded.file.name, f'temp_uploads/{uploaded.sha256[:2]}/{uploaded.sha256[2:4]}/{uploaded.sha256}.pdf')
+        self.assertTrue(uploaded.file.storage.exists(uploaded.file.name))
+
+    def test_el_contenido_se_hashea_una_sola_vez(self):
+        with mock.patch('postulantes.storage.hashlib') as hashlib_storage:
+            uploaded, creado = registrar_archivo('cv.pdf', ContentFile(b'%PDF-1.4 una vez'))
+        hashlib_storage.sha256.assert_not_called()
+
+        self.assertTrue(creado)
+        self.assertEqual(uploaded.sha256, hashlib.sha256(b'%PDF-1.4 una vez').hexdigest())
+        with uploaded.file.open('rb') as f:
+            self.assertEqual(f.read(), b'%PDF-1.4 una vez')
+
+    def test_buscar_no_lee_dentro_de_la_transaccion(self):
+        uploaded, _ = registrar_archivo('cv.pdf', ContentFile(b'%PDF-1.4 buscado'))
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(buscar_por_contenido(uploaded.sha256), uploaded)
+
+        sentencias = [q['sql'].split()[0].upper() for q in consultas.captured_queries]
+        # Solo el UPDATE va dentro de la transacción (aquí, un savepoint); la lectura queda afuera
+        self.assertEqual(sentencias, ['SAVEPOINT', 'UPDATE', 'RELEASE', 'SELECT'])
+        self.assertIsNone(buscar_por_contenido('0' * 64))
+
+    def test_sesion_con_contenido_conocido_no_transfiere(self):
+        uploaded, creado = registrar_archivo('cv.pdf', ContentFile(b'%PDF-1.4 cv'))
+        self.assertTrue(creado)
+
+        response = self.client.post('/api/postulantes/upload/sesiones/', {
+            'nombre': 'cv.pdf', 'tamano': 11, 'sha256': uploaded.sha256.upper(),
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['id'], response.json()['archivo']), (None, uploaded.id))
+        self.assertFalse(SubidaFragmentada.objects.exists())
+
+    def test_registro_simultaneo_no_deja_huerfanos(self):
+        existente, _ = registrar_archivo('foto.jpeg', ContentFile(b'bytes de la foto'))
+        # La otra petición aún no había registrado el hash al buscarlo
+        with mock.patch('postulantes.subidas.buscar_por_contenido', side_effect=[None, existente]):
+            uploaded, creado = registrar_archivo('foto.jpg', ContentFile(b'bytes de la foto'))
+
+        self.assertEqual((uploaded, creado), (existente, False))
+        storage = existente.file.storage
+        self.assertTrue(storage.exists(existente.file.name))
+        self.assertFalse(storage.exists(existente.file.name.replace('.jpeg', '.jpg')))
+
+
+@override_settings(SUBIDA_TTL_HORAS=48)
+class PurgaSubidasTests(TestCase):
+    """purgar_subidas borra filas y archivos huérfanos en la misma transacción."""
+
+    def _subida(self, contenido, horas):
+        uploaded, _ = registrar_archivo('documento.pdf', ContentFile(contenido))
+        UploadedFile.objects.filter(id=uploaded.id).update(uploaded_at=timezone.now() - timedelta(hours=horas))
+        return uploaded
+
+    def test_borra_solo_las_huerfanas_vencidas(self):
+        vieja = self._subida(b'huerfana vieja', 49)
+        usada = self._subida(b'usada por un postulante', 49)
+        reciente = self._subida(b'huerfana reciente', 1)
+        crear_postulante(6000001, archivo_ci=usada.file.name)
+        storage = vieja.file.storage
+
+        self.assertEqual(purgar_subidas(dry_run=True)['archivos'], 1)
+        self.assertTrue(storage.exists(vieja.file.name))
+
+        resultado = purgar_subidas()
+        self.assertEqual((resultado['archivos'], resultado['bytes']), (1, len(b'huerfana vieja')))
+        self.assertFalse(storage.exists(vieja.file.name))
+        self.assertEqual(set(UploadedFile.objects.values_list('id', flat=True)), {usada.id, reciente.id})
+
+    def test_reutilizar_el_contenido_lo_salva_de_la_purga(self):
+        vieja = self._subida(b'se vuelve a subir', 49)
+        uploaded, creado = registrar_archivo('otra.pdf', ContentFile(b'se vuelve a subir'))
+        self.assertEqual((uploaded.id, creado), (vieja.id, False))
+
+        self.assertEqual(purgar_subidas()['archivos'], 0)
+        self.assertTrue(uploaded.file.storage.exists(uploaded.file.name))
+
+    def test_purga_antes_de_marcar_la_fila(self):
+        vieja = self._subida(b'purgada a mitad de camino', 49)
+        actualizar = QuerySet.update
+
+        def purgar_antes(queryset, **campos):
+            # La purga confirma justo antes de que registrar_archivo marque la fila
+            if queryset.model is UploadedFile and 'uploaded_at' in campos:
+                purgar_subidas()
+            return actualizar(queryset, **campos)
+
+        with mock.patch.object(QuerySet, 'update', purgar_antes):
+            uploaded, creado = registrar_archivo('doc.pdf', ContentFile(b'purgada a mitad de camino'))
+
+        self.assertTrue(creado)
+        self.assertNotEqual(uploaded.id, vieja.id)
+        self.assertTrue(uploaded.file.storage.exists(uploaded.file.name))
+
+    def test_purga_despues_de_marcar_la_fila(self):
+        vieja = self._subida(b'reutilizada a tiempo', 49)
+        primero = QuerySet.first
+
+        def purgar_antes_de_leer(queryset):
+            if queryset.model is UploadedFile:
+                purgar_subidas()
+            return primero(queryset)
+
+        with mock.patch.object(QuerySet, 'first', purgar_antes_de_leer):
+            uploaded, creado = registrar_archivo('doc.pdf', ContentFile(b'reutilizada a tiempo'))
+
+        # La fila ya cuenta como reciente: la purga la deja
+        self.assertEqual((uploaded.id, creado), (vieja.id, False))
+        self.assertTrue(uploaded.file.storage.exists(uploaded.file.name))
+
+    def test_sesiones_abandonadas(self):
+        subida = SubidaFragmentada.objects.create(nombre='cv.pdf', tamano=10, sha256='0' * 64)
+        os.makedirs(settings.SUBIDA_DIR, exist_ok=True)
+        with open(ruta_parcial(subida), 'wb') as f:
+            f.write(b'12345')
+        SubidaFragmentada.objects.filter(id=subida.id).update(fecha_actualizacion=timezone.now() - timedelta(hours=49))
+
+        resultado = purgar_subidas()
+        self.assertEqual((resultado['sesiones'], resultado['bytes']), (1, 5))
+        self.assertFalse(SubidaFragmentada.objects.exists())
+        self.assertFalse(os.path.exists(ruta_parcial(subida)))
+
+    def test_parciales_sin_sesion(self):
+        os.makedirs(settings.SUBIDA_DIR, exist_ok=True)
+        abierta = SubidaFragmentada.objects.create(nombre='cv.pdf', tamano=10, sha256='0' * 64)
+        completa = SubidaFragmentada.objects.create(nombre='ci.pdf', tamano=10, sha256='0' * 64, estado='COMPLETA')
+        viejo = time.time() - 49 * 3600
+        parciales = {
+            'abierta': ruta_parcial(abierta),
+            # El proceso murió antes de borrar el archivo de una sesión completada
+            'completa': ruta_parcial(completa),
+            'sin_sesion': os.path.join(settings.SUBIDA_DIR, f'{uuid.uuid4()}.part'),
+            'reciente': os.path.join(settings.SUBIDA_DIR, f'{uuid.uuid4()}.part'),
+        }
+        for clave, path in parciales.items():
+            with open(path, 'wb') as f:
+                f.write(b'123')
+            if clave != 'reciente':
+                os.utime(path, (viejo, viejo))
+
+        self.assertEqual(purgar_subidas(dry_run=True)['parciales'], 2)
+        resultado = purgar_subidas()
+
+        self.assertEqual((resultado['parciales'], resultado['bytes']), (2, 6))
+        self.assertEqual(
+            {clave for clave, path in parciales.items() if os.path.exists(path)}, {'abierta', 'reciente'}
+        )
+
+
+@override_settings(IMAGEN_TIMEOUT=300, IMAGEN_MAX_INTENTOS=2)
+class ColaImagenesTests(TestCase):
+    """Cola de optimización de fotos en UploadedFile (sin arrancar los hilos del pool)."""
+
+    def setUp(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (900, 600), 'red').save(buffer, 'PNG')
+        self.uploaded, _ = registrar_archivo('foto_ci.png', ContentFile(buffer.getvalue()))
+
+    def _vencer(self):
+        UploadedFile.objects.filter(id=self.uploaded.id).update(
+            imagen_reclamada=timezone.now() - timedelta(seconds=301),
+        )
+
+    def test_la_foto_se_optimiza(self):
+        self.assertEqual(UploadedFile.objects.get(id=self.uploaded.id).estado_imagen, 'PENDIENTE')
+        self.assertEqual(procesar_imagenes_pendientes(), 1)
+
+        uploaded = UploadedFile.objects.get(id=self.uploaded.id)
+        self.assertEqual(uploaded.estado_imagen, 'LISTO')
+        with uploaded.miniatura.open('rb') as f:
+            self.assertEqual(Image.open(f).size, (320, 213))
+
+    def test_reclamo_de_un_worker_caido_se_reintenta(self):
+        self.assertEqual(reclamar_imagen().id, self.uploaded.id)
+        self.assertIsNone(reclamar_imagen())
+
+        self._vencer()
+        reclamada = reclamar_imagen()
+        self.assertEqual((reclamada.id, reclamada.imagen_intentos), (self.uploaded.id, 2))
+
+        self._vencer()
+        self.assertIsNone(reclamar_imagen())
+        self.assertEqual(UploadedFile.objects.get(id=self.uploaded.id).estado_imagen, 'ERROR')
+
+
+class VistaPreviaTests(TestCase):
+    """Vistas previas del admin, guardadas por hash en PREVIEW_DIR."""
+
+    def test_preview_de_una_foto(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 800), 'blue').save(buffer, 'JPEG')
+        uploaded, _ = registrar_archivo('ci.jpg', ContentFile(buffer.getvalue()))
+
+        ruta, sha = obtener_preview(uploaded.file)
+        self.assertEqual(sha, uploaded.sha256)
+        self.assertEqual(Image.open(ruta).size, (480, 320))
+        with mock.patch('postulantes.previews.generar_preview') as generar:
+            self.assertEqual(obtener_preview(uploaded.file), (ruta, sha))
+        generar.assert_not_called()
+
+    def test_pdf_sin_pypdfium2(self):
+        with mock.patch('postulantes.previews.pdfium', None):
+            self.assertFalse(admite_preview('cv.pdf'))
+            self.assertTrue(admite_preview('cv.PNG'))
+
+
+class ServirArchivoTests(TestCase):
+    """servir_archivo: ETag, 304 y rangos de bytes."""
+    contenido = bytes(range(256)) * 4
+
+    def setUp(self):
+        os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+        self.path = os.path.join(settings.MEDIA_ROOT, 'servir_prueba.bin')
+        with open(self.path, 'wb') as f:
+            f.write(self.contenido)
+        self.factory = RequestFactory()
+
+    def _servir(self, **meta):
+        return servir_archivo(self.factory.get('/archivo', **meta), self.path)
+
+    def _cuerpo(self, response):
+        cuerpo = b''.join(response.streaming_content)
+        response.close()
+        return cuerpo
+
+    def test_completo_y_revalidacion(self):
+        response = self._servir()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response['Content-Length'], response['Accept-Ranges']), ('1024', 'bytes'))
+        self.assertEqual(self._cuerpo(response), self.contenido)
+
+        self.assertEqual(self._servir(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self._servir(HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        self.assertEqual(self._servir(HTTP_IF_NONE_MATCH='"otro"').status_code, 200)
+
+    def test_rangos(self):
+        response = self._servir(HTTP_RANGE='bytes=10-19')
+        self.assertEqual((response.status_code, response['Content-Range']), (206, 'bytes 10-19/1024'))
+        self.assertEqual(self._cuerpo(response), self.contenido[10:20])
+
+        response = self._servir(HTTP_RANGE='bytes=-5')
+        self.assertEqual(self._cuerpo(response), self.contenido[-5:])
+        response = self._servir(HTTP_RANGE='bytes=1000-')
+        self.assertEqual(self._cuerpo(response), self.contenido[1000:])
+
+        response = self._servir(HTTP_RANGE='bytes=2000-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */1024'))
+        # Varios rangos no se soportan: se entrega el archivo completo
+        self.assertEqual(self._servir(HTTP_RANGE='bytes=0-1,5-6').status_code, 200)
+
+    def test_if_range_de_otra_version_entrega_todo(self):
+        etag = self._servir()['ETag']
+        self.assertEqual(self._servir(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag).status_code, 206)
+        response = self._servir(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"version-anterior"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._cuerpo(response), self.contenido)
+
+    @override_settings(SERVIR_ARCHIVOS_MODO='x-accel', SERVIR_ACCEL_PREFIX='/protegido/')
+    def test_x_accel_delega_en_nginx(self):
+        response = self._servir(HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protegido/servir_prueba.bin')
+        self.assertEqual(response.content, b'')
+
+    def test_media_fuera_de_media_root(self):
+        with self.assertRaises(Http404):
+            servir_media(self.factory.get('/media/'), '../secreto.txt')
+        with self.assertRaises(Http404):
+            servir_media(self.factory.get('/media/'), 'no_existe.pdf')
+
+
+class MigracionPostgresTests(TestCase):
+    """migrate_sqlite_to_postgres (la copia entre dos bases y el perfil de PostgreSQL en settings)."""
+    databases = {DEFAULT_DB_ALIAS, ALIAS}
+
+    def permiso(self, codename, using):
+        return Permission.objects.using(using).get(content_type__app_label='postulantes', codename=codename)
+
+    def test_copia_grupos_y_permisos(self):
+        # En el destino el permiso tiene otro id: se traduce por codename
+        permiso = self.permiso('view_postulante', DEFAULT_DB_ALIAS)
+        permiso.delete()
+        permiso.pk = None
+        permiso.save()
+
+        grupo = Group.objects.using(ALIAS).create(name='Revisores')
+        grupo.permissions.add(self.permiso('view_postulante', ALIAS))
+        usuario = User.objects.db_manager(ALIAS).create_user('revisor', is_staff=True)
+        usuario.groups.add(grupo)
+        usuario.user_permissions.add(self.permiso('change_postulante', ALIAS))
+        registro = timezone.now() - timedelta(days=30)
+        postulante = crear_postulante(7000001, using=ALIAS)
+        Postulante.objects.using(ALIAS).filter(pk=postulante.pk).update(fecha_registro=registro)
+
+        MigrarAPostgres(stdout=io.StringIO(), stderr=io.StringIO()).copiar(ALIAS, DEFAULT_DB_ALIAS, batch_size=1)
+
+        usuario = User.objects.get(username='revisor')
+        self.assertEqual(list(usuario.groups.values_list('name', flat=True)), ['Revisores'])
+        self.assertEqual(list(Group.objects.get().permissions.all()), [self.permiso('view_postulante', DEFAULT_DB_ALIAS)])
+        self.assertEqual(list(usuario.user_permissions.values_list('codename', flat=True)), ['change_postulante'])
+        self.assertTrue(usuario.has_perm('postulantes.view_postulante'))
+        self.assertEqual(Postulante.objects.values_list('cedula_identidad', 'fecha_registro').get(), (7000001, registro))
+
+    def test_perfil_postgresql_con_pool(self):
+        ruta = os.path.join(settings.BASE_DIR, 'sirepre_backend', 'settings.py')
+        with mock.patch.dict(os.environ, {'DB_ENGINE': 'postgresql', 'DB_POOL_MAX': '4'}):
+            os.environ.pop('DB_POOL', None)
+            base = runpy.run_path(ruta)['DATABASES']['default']
+        with mock.patch.dict(os.environ, {'DB_ENGINE': 'postgresql', 'DB_POOL': '0'}):
+            sin_pool = runpy.run_path(ruta)['DATABASES']['default']
+
+        self.assertEqual(base['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(base['OPTIONS']['pool'], {'min_size': 2, 'max_size': 4, 'timeout': 10})
+        self.assertEqual(base['CONN_MAX_AGE'], 0)  # El pool y CONN_MAX_AGE no se combinan
+        self.assertTrue(base['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', sin_pool['OPTIONS'])
+        self.assertEqual(sin_pool['CONN_MAX_AGE'], 60)
+
+
+class GenerarPostulantesTests(TestCase):
+    """generate_postulantes (con insertar_con_fechas) inserta por lotes con las fechas generadas, no la hora actual."""
+
+    def test_conserva_las_fechas(self):
+        call_command('generate_postulantes', 20, batch_size=7, semilla=1, revisados=1, dias=10,
+                     stdout=io.StringIO(), stderr=io.StringIO())
+
+        self.assertTrue(Postulante._meta.get_field('fecha_registro').auto_now_add)  # El Field no se modifica
+        hace_un_rato = timezone.now() - timedelta(minutes=1)
+        self.assertEqual(Postulante.objects.filter(fecha_registro__lt=hace_un_rato).count(), 20)
+        for postulante in Postulante.objects.select_related('ultima_revision'):
+            self.assertGreaterEqual(postulante.ultima_revision.fecha_revision, postulante.fecha_registro)
+
+    def test_un_insert_por_lote_sin_update(self):
+        fecha = timezone.now() - timedelta(days=30)
+        objetos = [UploadedFile(id=100 + i, file=f'temp_uploads/{i}.pdf', uploaded_at=fecha) for i in range(5)]
+
+        with CaptureQueriesContext(connection) as consultas:
+            insertar_con_fechas(UploadedFile, objetos, batch_size=2)
+
+        self.assertEqual([q['sql'].split()[0] for q in consultas.captured_queries], ['INSERT'] * 3)
+        self.assertEqual(list(UploadedFile.objects.values_list('uploaded_at', flat=True).distinct()), [fecha])
+        self.assertFalse(objetos[0]._state.adding)
+
+
+class MetricasTests(TestCase):
+    """Registro por proceso, suma entre procesos y formato de /api/metrics."""
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp(prefix='sirepre_metricas_', dir=_aislamiento['directorio'])
+        ajustes = override_settings(METRICAS_ACTIVAS=True, METRICAS_DIR=directorio, METRICAS_TOKEN=None)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        metricas.reiniciar()
+        self.addCleanup(metricas.reiniciar)
+        invalidar_configuracion()
+
+    def lineas(self):
+        return metricas.exponer().splitlines()
+
+    def test_middleware_etiqueta_con_el_patron_de_la_ruta(self):
+        crear_postulante(8000001)
+        self.client.get('/api/postulantes/pdf/8000001/estado/')
+        self.client.get('/api/postulantes/pdf/999/estado/')
+
+        lineas = self.lineas()
+        ruta = 'ruta="api/postulantes/pdf/<int:ci>/estado/"'
+        self.assertIn(f'sirepre_http_requests_total{{codigo="404",metodo="GET",{ruta}}} 1', lineas)
+        self.assertIn(f'sirepre_http_request_duration_seconds_count{{{ruta}}} 2', lineas)
+        self.assertIn(f'sirepre_http_request_db_queries_bucket{{{ruta},le="+Inf"}} 2', lineas)
+        self.assertTrue(any(l.startswith(f'sirepre_db_query_seconds_total{{{ruta}}} ') for l in lineas))
+        self.assertIn('# TYPE sirepre_http_requests_total counter', lineas)
+
+    def test_histograma_acumulado(self):
+        metricas.observar('sirepre_pdf_render_seconds', 0.03, buckets=(0.01, 0.05))
+        metricas.observar('sirepre_pdf_render_seconds', 7.5, buckets=(0.01, 0.05))
+
+        lineas = self.lineas()
+        self.assertIn('sirepre_pdf_render_seconds_bucket{le="0.01"} 0', lineas)
+        self.assertIn('sirepre_pdf_render_seconds_bucket{le="0.05"} 1', lineas)
+        self.assertIn('sirepre_pdf_render_seconds_bucket{le="+Inf"} 2', lineas)
+        self.assertIn('sirepre_pdf_render_seconds_sum 7.53', lineas)
+        self.assertIn('sirepre_pdf_render_seconds_count 2', lineas)
+
+    def test_suma_los_procesos(self):
+        # Estado volcado por otro worker (o uno que ya terminó)
+        clave = json.dumps(['sirepre_upload_bytes_total', [['modo', 'multipart']]])
+        with open(os.path.join(metricas.directorio(), '1.json'), 'w', encoding='utf-8') as f:
+            json.dump({'contadores': {clave: 100}, 'histogramas': {}}, f)
+
+        metricas.incrementar('sirepre_upload_bytes_total', 5, modo='multipart')
+
+        self.assertIn('sirepre_upload_bytes_total{modo="multipart"} 105', self.lineas())
+        self.assertTrue(os.path.exists(os.path.join(metricas.directorio(), f'{os.getpid()}.json')))
+
+    def test_subida_cuenta_bytes(self):
+        archivo = SimpleUploadedFile('ci.pdf', b'%PDF-1.4 ' + b'x' * 91, content_type='application/pdf')
+        response = self.client.post('/api/postulantes/upload/', {'file': archivo})
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIn('sirepre_upload_bytes_total{modo="multipart"} 100', self.lineas())
+
+    def test_etiquetas_escapadas(self):
+        metricas.incrementar('sirepre_http_requests_total', ruta='a"b\\c\nd')
+        self.assertIn('sirepre_http_requests_total{ruta="a\\"b\\\\c\\nd"} 1', self.lineas())
+
+    def test_desactivadas(self):
+        with override_settings(METRICAS_ACTIVAS=False):
+            metricas.incrementar('sirepre_upload_bytes_total', 5, modo='multipart')
+            self.client.get('/api/postulantes/status/')
+        self.assertEqual(metricas.exponer(), '\n')
+
+    def test_endpoint_con_token(self):
+        with override_settings(METRICAS_TOKEN='secreto'):
+            sin_token = self.client.get('/api/metrics')
+            otro = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer otro')
+            response = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+
+        self.assertEqual((sin_token.status_code, otro.status_code), (403, 403))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('sirepre_sistema_activo 1', response.content.decode().splitlines())
+
+
+class ExportacionExcelTests(TestCase):
+    """Acción "Exportar a Excel" del admin: libro write-only con un número fijo de consultas."""
+
+    def setUp(self):
+        self.revisor = User.objects.create_user('revisor', first_name='Rosa', last_name='Flores', is_staff=True)
+        self.recinto = crear_recinto('EXP-1')
+        self.admin = admin.site._registry[Postulante]
+        self.request = RequestFactory().post('/admin/postulantes/postulante/')
+
+    def exportar(self, consultas):
+        with self.assertNumQueries(consultas):
+            response = self.admin.exportar_a_excel(self.request, Postulante.objects.all())
+            contenido = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="postulantes_revisiones.xlsx"')
+        return list(load_workbook(io.BytesIO(contenido), read_only=True).active.values)
+
+    def test_filas_y_encabezados(self):
+        revisado = crear_postulante(9000001, apellido_paterno='Quispe', recinto_primera_opcion=self.recinto)
+        RevisionPostulante.objects.create(postulante=revisado, revisado_por=self.revisor, cumple_no_militancia='CUMPLE')
+        RevisionPostulante.objects.create(
+            postulante=revisado, revisado_por=None, cumple_experiencia_especifica='CUMPLE',
+            cumple_no_militancia='CUMPLE', cumple_bachiller_o_superior='CUMPLE',
+        )
+        crear_postulante(9000002)
+
+        filas = self.exportar(1)
+
+        self.assertEqual(filas[0][:5], ('ID', 'Nombre', 'Apellido Paterno', 'Apellido Materno', 'CI'))
+        self.assertEqual(len(filas[0]), 19)
+        self.assertEqual(len(filas), 3)
+        primera, segunda = filas[1], filas[2]
+        self.assertEqual((primera[4], primera[10], primera[11]), (9000001, str(self.recinto), 'N/A'))
+        self.assertEqual(primera[12:18], (2, 'CUMPLE TODO', 'CUMPLE', 'CUMPLE', 'CUMPLE', 'Sistema'))
+        self.assertEqual(segunda[4], 9000002)
+        self.assertEqual(segunda[12:], (0, 'Sin revisión', '-', '-', '-', '-', '-'))
+
+    def test_consultas_no_crecen_con_las_filas(self):
+        for i in range(30):
+            postulante = crear_postulante(9000100 + i, recinto_segunda_opcion=self.recinto)
+            RevisionPostulante.objects.create(postulante=postulante, revisado_por=self.revisor)
+
+        filas = self.exportar(1)
+
+        self.assertEqual(len(filas), 31)
+        self.assertEqual(filas[1][13:18], ('CON OBSERVACIONES', 'NO REVISADO', 'NO REVISADO', 'NO REVISADO',
+                                           'Rosa Flores'))
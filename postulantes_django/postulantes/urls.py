@@ -1,11 +1,17 @@
 from django.urls import path
-from .views import PostulanteCreateView, VerificarExistenciaView, ServirPDFView, RecintoListView, FileUploadView, ConfiguracionSistemaView
+from .views import PostulanteCreateView, VerificarExistenciaView, ServirPDFView, EstadoPDFView, RecintoListView, RecintoFacetasView, RecintoCercanosView, FileUploadView, SubidaSesionView, SubidaFragmentoView, SubidaCompletarView, ConfiguracionSistemaView
 
 urlpatterns = [
     path('', PostulanteCreateView.as_view(), name='registrar_postulante'),
     path('existe/', VerificarExistenciaView.as_view(), name='verificar_existencia'),
     path('pdf/<int:ci>/', ServirPDFView.as_view(), name='servir_pdf'),
+    path('pdf/<int:ci>/estado/', EstadoPDFView.as_view(), name='estado_pdf'),
     path('recintos/', RecintoListView.as_view(), name='listar_recintos'),
+    path('recintos/facetas/', RecintoFacetasView.as_view(), name='recintos_facetas'),
+    path('recintos/cercanos/', RecintoCercanosView.as_view(), name='recintos_cercanos'),
     path('upload/', FileUploadView.as_view(), name='subir_archivo'),
+    path('upload/sesiones/', SubidaSesionView.as_view(), name='crear_subida'),
+    path('upload/sesiones/<uuid:pk>/', SubidaFragmentoView.as_view(), name='fragmento_subida'),
+    path('upload/sesiones/<uuid:pk>/completar/', SubidaCompletarView.as_view(), name='completar_subida'),
     path('status/', ConfiguracionSistemaView.as_view(), name='estado_sistema'),
 ]
@@ -1,13 +1,19 @@
+import math
 import os
+import threading
+from io import BytesIO
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
-from reportlab.lib.utils import simpleSplit
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfbase import pdfmetrics
 from django.conf import settings
 from datetime import datetime
 import qrcode
 import json
 import base64
+from .archivos import write_atomic
+from .metricas import cronometrar
 
 # ─── Paleta institucional ─────────────────────────────────────────────────────
 COLOR_PRIMARY   = colors.HexColor("#474747")
@@ -27,6 +33,37 @@ LOGO_PATH = os.path.join(
     "static", "logoOEP.png"
 )
 
+# ─── Geometría fija del comprobante ──────────────────────────────────────────
+PAGE_W, PAGE_H = A4
+MARGIN         = 45
+HEADER_TOP     = PAGE_H - MARGIN
+HEADER_BOTTOM  = PAGE_H - MARGIN - 90
+HEADER_H       = HEADER_TOP - HEADER_BOTTOM
+LOGO_SIZE      = 72
+QR_SIZE        = 66
+QR_X           = PAGE_W - MARGIN - QR_SIZE - 4
+QR_Y           = HEADER_BOTTOM + (HEADER_H - QR_SIZE) / 2
+TEXT_X         = MARGIN + LOGO_SIZE + 12
+TEXT_W         = (QR_X - 12) - TEXT_X
+MID_Y          = HEADER_BOTTOM + HEADER_H / 2
+BANNER_H       = 26
+BANNER_Y       = HEADER_BOTTOM - BANNER_H
+
+FOOTER_BASE    = MARGIN + 60
+FIRMA_SPACE_Y  = FOOTER_BASE + 54   # Mantiene la declaración en su altura actual
+SEP_Y          = FIRMA_SPACE_Y + 45
+FIRMA_LINE_Y   = FOOTER_BASE + 15   # Subido 15 puntos respecto al anterior (-15 + 15)
+NOMBRE_Y       = FOOTER_BASE - 1
+FIRMA_LABEL_Y  = FOOTER_BASE - 8
+
+DECLARACION = (
+    "Yo, el/la postulante, declaro que toda la información consignada "
+    "en el presente formulario es veraz, completa y fidedigna. Acepto que cualquier dato "
+    "falso, incompleto o alterado será motivo de inhabilitación automática e irrevocable "
+    "de mi postulación. Asimismo, manifiesto mi conformidad con la asignación de "
+    "recintos electorales de acuerdo a requerimiento del SERECI La Paz."
+)
+
 SI  = "✔  SÍ"
 NO  = "✘  NO"
 
@@ -35,7 +72,10 @@ def _bool(val):
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-def generate_qr(data, ci):
+QR_COLOR = "#003A70"
+
+
+def _build_qr(data):
     qr_data = {
         "ci":              data.get("cedulaIdentidad") or data.get("cedula_identidad"),
         "complemento":    data.get("complemento") or "",
@@ -56,7 +96,13 @@ def generate_qr(data, ci):
     
     qr.add_data(b64_data)
     qr.make(fit=True)
-    img = qr.make_image(fill_color="#003A70", back_color="white")
+    return qr
+
+
+def generate_qr(data, ci):
+    """Genera el QR como PNG en MEDIA_ROOT/qr_temp (ruta anterior, vía disco)."""
+    qr = _build_qr(data)
+    img = qr.make_image(fill_color=QR_COLOR, back_color="white")
     qr_dir = os.path.join(settings.MEDIA_ROOT, "qr_temp")
     os.makedirs(qr_dir, exist_ok=True)
     qr_path = os.path.join(qr_dir, f"qr_{ci}.png")
@@ -64,28 +110,54 @@ def generate_qr(data, ci):
     return qr_path
 
 
-# ─────────────────────────────────────────────────────────────────────────────
-def generate_pdf(postulante):
-    pdf_dir = os.path.join(settings.MEDIA_ROOT, "comprobantes")
-    os.makedirs(pdf_dir, exist_ok=True)
-
-    filename = f"comprobante_{postulante.cedula_identidad}.pdf"
-    filepath  = os.path.join(pdf_dir, filename)
+def generate_qr_matrix(data):
+    """Genera el QR en memoria: matriz de módulos (True = oscuro), con borde."""
+    return _build_qr(data).get_matrix()
+
+
+def draw_qr(c, matrix, x, y, size):
+    """Dibuja la matriz del QR como rectángulos vectoriales.
+
+    Los módulos oscuros contiguos de cada fila se agrupan en un solo
+    rectángulo, así que el trazado queda en unas pocas centenas de
+    operadores y el QR se mantiene nítido a cualquier zoom.
+    """
+    n = len(matrix)
+    modulo = size / n
+    path = c.beginPath()
+    for fila, valores in enumerate(matrix):
+        row_y = y + size - (fila + 1) * modulo
+        col = 0
+        while col < n:
+            if not valores[col]:
+                col += 1
+                continue
+            inicio = col
+            while col < n and valores[col]:
+                col += 1
+            path.rect(x + inicio * modulo, row_y, (col - inicio) * modulo, modulo)
+    c.saveState()
+    c.setFillColor(colors.white)
+    c.rect(x, y, size, size, fill=1, stroke=0)
+    c.setFillColor(colors.HexColor(QR_COLOR))
+    c.drawPath(path, fill=1, stroke=0)
+    c.restoreState()
 
-    c       = canvas.Canvas(filepath, pagesize=A4)
-    width, height = A4
-    margin  = 45
-    now_str = datetime.now().strftime("%d/%m/%Y  %H:%M:%S")
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Capas fijas del comprobante. Son idénticas para todos los postulantes, así
+# que con la plantilla se definen una vez por documento como Form XObjects
+# (ver PlantillaComprobante); sin plantilla se dibujan directo en la página.
+def _dibujar_marca_agua(c):
     # ── Marca de agua de fondo (Patrón Repetitivo) ────────────────────────
-    c.saveState()
+    # La transparencia (setFillAlpha) se aplica fuera de la capa porque es un
+    # recurso propio de cada documento.
     c.setFont("Helvetica", 6)
     c.setFillColor(colors.HexColor("#E5E8E8")) # Gris muy claro
-    c.setFillAlpha(0.4)
-    
+
     pattern_text = "SERVICIO DE REGISTRO CÍVICO LA PAZ      "
     text_w_pattern = c.stringWidth(pattern_text, "Helvetica", 6)
-    
+
     # Cubrir toda la página con el patrón
     for i in range(-10, 30): # Filas
         for j in range(-5, 15): # Columnas
@@ -94,107 +166,255 @@ def generate_pdf(postulante):
             c.rotate(35)
             c.drawString(0, 0, pattern_text)
             c.restoreState()
-    c.restoreState()
 
-    nombre_completo = (
-        f"{postulante.nombre or ''} "
-        f"{postulante.apellido_paterno or ''} "
-        f"{postulante.apellido_materno or ''}"
-    ).strip().upper()
 
+def _dibujar_cabecera(c, logo=LOGO_PATH):
     # ══════════════════════════════════════════════════════════════════════
-    # 1. CABECERA INSTITUCIONAL
+    # 1. CABECERA INSTITUCIONAL (partes fijas)
     # ══════════════════════════════════════════════════════════════════════
-    header_top    = height - margin
-    header_bottom = height - margin - 90
-    header_h      = header_top - header_bottom
-
     c.setFillColor(COLOR_WHITE)
     c.setStrokeColor(COLOR_GOLD)
     c.setLineWidth(2.5)
-    c.rect(margin, header_bottom, width - margin * 2, header_h, fill=1, stroke=0)
-    c.line(margin, header_bottom, width - margin, header_bottom)
+    c.rect(MARGIN, HEADER_BOTTOM, PAGE_W - MARGIN * 2, HEADER_H, fill=1, stroke=0)
+    c.line(MARGIN, HEADER_BOTTOM, PAGE_W - MARGIN, HEADER_BOTTOM)
 
-    logo_h, logo_w = 72, 72
-    if os.path.exists(LOGO_PATH):
+    if logo is not None and (not isinstance(logo, str) or os.path.exists(logo)):
         c.drawImage(
-            LOGO_PATH,
-            margin + 4, header_bottom + (header_h - logo_h) / 2,
-            width=logo_w, height=logo_h,
+            logo,
+            MARGIN + 4, HEADER_BOTTOM + (HEADER_H - LOGO_SIZE) / 2,
+            width=LOGO_SIZE, height=LOGO_SIZE,
             preserveAspectRatio=True, mask="auto"
         )
 
-    text_x = margin + logo_w + 12
-    # QR en la cabecera (derecha)
-    qr_size = 66
-    qr_x    = width - margin - qr_size - 4
-    qr_y    = header_bottom + (header_h - qr_size) / 2
-    
-    text_available_right = qr_x - 12
-    text_w  = text_available_right - text_x
-    mid_y   = header_bottom + header_h / 2
-
-    # QR Drawing
-    qr_path = generate_qr({
-        "cedula_identidad": postulante.cedula_identidad,
-        "complemento":      postulante.complemento,
-        "nombre":           postulante.nombre,
-        "apellido_paterno": postulante.apellido_paterno,
-        "apellido_materno": postulante.apellido_materno,
-        "fecha_nacimiento": postulante.fecha_nacimiento,
-    }, postulante.cedula_identidad)
+    # Marco y leyenda del QR (el QR en sí es variable)
     c.setStrokeColor(COLOR_BORDER)
     c.setLineWidth(0.5)
-    c.rect(qr_x - 2, qr_y - 2, qr_size + 4, qr_size + 4, fill=0, stroke=1)
-    c.drawImage(qr_path, qr_x, qr_y, width=qr_size, height=qr_size)
-    os.remove(qr_path)
+    c.rect(QR_X - 2, QR_Y - 2, QR_SIZE + 4, QR_SIZE + 4, fill=0, stroke=1)
     c.setFont("Helvetica", 5.5)
     c.setFillColor(COLOR_LABEL)
-    c.drawCentredString(qr_x + qr_size / 2, qr_y - 8, "Verificación digital")
+    c.drawCentredString(QR_X + QR_SIZE / 2, QR_Y - 8, "Verificación digital")
 
     c.setFillColor(COLOR_PRIMARY)
     c.setFont("Helvetica-Bold", 10.5)
-    c.drawCentredString(text_x + text_w / 2, mid_y + 24,
+    c.drawCentredString(TEXT_X + TEXT_W / 2, MID_Y + 24,
                         "ÓRGANO ELECTORAL PLURINACIONAL")
     c.setFont("Helvetica-Bold", 9)
-    c.drawCentredString(text_x + text_w / 2, mid_y + 10,
+    c.drawCentredString(TEXT_X + TEXT_W / 2, MID_Y + 10,
                         "SERECI - SERVICIO DE REGISTRO CIVICO LA PAZ")
-    c.setFillColor(COLOR_LABEL)
-    c.setFont("Helvetica", 7.5)
-    c.drawCentredString(text_x + text_w / 2, mid_y - 12,
-                        f"Fecha de emisión: {now_str}")
 
     # ── Franja de título ─────────────────────────────────────────────────
-    banner_h = 26
-    banner_y = header_bottom - banner_h
     c.setFillColor(COLOR_PRIMARY)
-    c.rect(margin, banner_y, width - margin * 2, banner_h, fill=1, stroke=0)
+    c.rect(MARGIN, BANNER_Y, PAGE_W - MARGIN * 2, BANNER_H, fill=1, stroke=0)
     c.setFillColor(COLOR_WHITE)
     c.setFont("Helvetica-Bold", 11)
-    c.drawCentredString(width / 2, banner_y + 8,
+    c.drawCentredString(PAGE_W / 2, BANNER_Y + 8,
                         "COMPROBANTE DE POSTULACIÓN — SIREPRE")
     c.setStrokeColor(COLOR_GOLD)
     c.setLineWidth(2)
-    c.line(margin, banner_y, width - margin, banner_y)
+    c.line(MARGIN, BANNER_Y, PAGE_W - MARGIN, BANNER_Y)
+
+
+def _dibujar_pie(c):
+    # ══════════════════════════════════════════════════════════════════════
+    # 3. PIE DE PÁGINA FIJO (partes fijas)
+    # ══════════════════════════════════════════════════════════════════════
+
+    # Franja de fondo
+    footer_area_h = SEP_Y - FOOTER_BASE + 6
+    c.setFillColor(colors.HexColor("#F4F6FA"))
+    c.rect(MARGIN, FOOTER_BASE, PAGE_W - MARGIN * 2, footer_area_h, fill=1, stroke=0)
+
+    # Línea separadora doble
+    c.setStrokeColor(COLOR_PRIMARY)
+    c.setLineWidth(1.5)
+    c.line(MARGIN, SEP_Y, PAGE_W - MARGIN, SEP_Y)
+    c.setStrokeColor(COLOR_GOLD)
+    c.setLineWidth(0.8)
+    c.line(MARGIN, SEP_Y - 3, PAGE_W - MARGIN, SEP_Y - 3)
+
+    # Etiqueta declaración
+    c.setFont("Helvetica-Bold", 7.5)
+    c.setFillColor(COLOR_PRIMARY)
+    c.drawString(MARGIN, SEP_Y - 14, "DECLARACIÓN.")
+
+    # Texto declaración
+    max_w = PAGE_W - MARGIN * 2 - 40
+    decl_lines = simpleSplit(DECLARACION, "Helvetica-Oblique", 8, max_w)
+    decl_line_h = 11
+
+    decl_y = FIRMA_SPACE_Y + (len(decl_lines) - 1) * decl_line_h
+    c.setFont("Helvetica-Oblique", 8)
+    c.setFillColor(COLOR_VALUE)
+    for line in decl_lines:
+        c.drawString(MARGIN, decl_y, line)
+        decl_y -= decl_line_h
+
+    # Área de firma
+    firma_cx = PAGE_W / 2
+    firma_half_w = 110
+
+    c.setStrokeColor(COLOR_PRIMARY)
+    c.setLineWidth(0.8)
+    c.line(firma_cx - firma_half_w, FIRMA_LINE_Y,
+           firma_cx + firma_half_w, FIRMA_LINE_Y)
+
+    c.setFont("Helvetica", 7.5)
+    c.setFillColor(COLOR_LABEL)
+    c.drawCentredString(firma_cx, FIRMA_LABEL_Y, "Firma del postulante")
+
+    c.setFont("Helvetica", 6.5)
+    c.drawRightString(PAGE_W - MARGIN, FOOTER_BASE - 30,
+                      "Documento generado electrónicamente")
+
+
+CAPAS = {
+    'marca_agua': _dibujar_marca_agua,
+    'cabecera': _dibujar_cabecera,
+    'pie': _dibujar_pie,
+}
+
+
+class PlantillaComprobante:
+    """Capas fijas del comprobante, definidas como Form XObjects.
+
+    Cada capa se dibuja una sola vez por documento con beginForm/endForm y la
+    página la invoca con doForm. La marca de agua se arma como una fila de 20
+    textos rotados que se repite 40 veces, en lugar de ~800 transformaciones;
+    el logo se lee y decodifica una sola vez por proceso (ImageReader).
+    """
+
+    PATRON = "SERVICIO DE REGISTRO CÍVICO LA PAZ      "
+
+    def __init__(self):
+        self.logo = ImageReader(LOGO_PATH) if os.path.exists(LOGO_PATH) else None
+        if self.logo:
+            # ImageReader decodifica al primer uso y eso no es seguro entre hilos:
+            # se hace aquí, mientras get_plantilla tiene el candado
+            self.logo.getRGBData()
+        self.ancho_patron = pdfmetrics.stringWidth(self.PATRON, "Helvetica", 6)
+
+    def preparar(self, c):
+        """Define las capas en el documento del canvas (una vez, antes de aplicarlas)."""
+        w = self.ancho_patron
+        c.beginForm('fila_marca_agua', lowerx=-6 * w, lowery=-w, upperx=16 * w, uppery=2 * w)
+        texto = c.beginText()
+        texto.setFont("Helvetica", 6)
+        texto.setFillColor(colors.HexColor("#E5E8E8"))
+        coseno, seno = math.cos(math.radians(35)), math.sin(math.radians(35))
+        for j in range(-5, 15):
+            texto.setTextTransform(coseno, seno, -seno, coseno, j * w, 0)
+            texto.textOut(self.PATRON)
+        c.drawText(texto)
+        c.endForm()
+
+        c.beginForm('marca_agua')
+        for i in range(-10, 30):
+            c.saveState()
+            c.translate(0, i * 35)
+            c.doForm('fila_marca_agua')
+            c.restoreState()
+        c.endForm()
+
+        c.beginForm('cabecera')
+        _dibujar_cabecera(c, logo=self.logo)
+        c.endForm()
+
+        c.beginForm('pie')
+        _dibujar_pie(c)
+        c.endForm()
+
+    def aplicar(self, c, capa):
+        """Dibuja una capa ya definida con preparar() en la página actual."""
+        c.doForm(capa)
+
+
+_plantilla = None
+_plantilla_lock = threading.Lock()
+
+
+def get_plantilla():
+    """Devuelve la plantilla del proceso, construyéndola la primera vez."""
+    global _plantilla
+    if _plantilla is None:
+        with _plantilla_lock:
+            if _plantilla is None:
+                _plantilla = PlantillaComprobante()
+    return _plantilla
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+@cronometrar('sirepre_pdf_render_seconds')
+def generate_pdf(postulante, usar_plantilla=True, qr_vectorial=True):
+    pdf_dir = os.path.join(settings.MEDIA_ROOT, "comprobantes")
+    os.makedirs(pdf_dir, exist_ok=True)
+
+    filename = f"comprobante_{postulante.cedula_identidad}.pdf"
+    filepath  = os.path.join(pdf_dir, filename)
+
+    buffer  = BytesIO()
+    c       = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    margin  = MARGIN
+    now_str = datetime.now().strftime("%d/%m/%Y  %H:%M:%S")
+    plantilla = get_plantilla() if usar_plantilla else None
+    if plantilla:
+        plantilla.preparar(c)
+
+    def dibujar_capa(capa):
+        if plantilla:
+            plantilla.aplicar(c, capa)
+        else:
+            c.saveState()
+            CAPAS[capa](c)
+            c.restoreState()
+
+    # ── Marca de agua de fondo ────────────────────────────────────────────
+    c.saveState()
+    c.setFillAlpha(0.4)
+    dibujar_capa('marca_agua')
+    c.restoreState()
+
+    nombre_completo = (
+        f"{postulante.nombre or ''} "
+        f"{postulante.apellido_paterno or ''} "
+        f"{postulante.apellido_materno or ''}"
+    ).strip().upper()
+
+    # ══════════════════════════════════════════════════════════════════════
+    # 1. CABECERA INSTITUCIONAL
+    # ══════════════════════════════════════════════════════════════════════
+    dibujar_capa('cabecera')
+
+    # QR Drawing
+    qr_data = {
+        "cedula_identidad": postulante.cedula_identidad,
+        "complemento":      postulante.complemento,
+        "nombre":           postulante.nombre,
+        "apellido_paterno": postulante.apellido_paterno,
+        "apellido_materno": postulante.apellido_materno,
+        "fecha_nacimiento": postulante.fecha_nacimiento,
+    }
+    if qr_vectorial:
+        draw_qr(c, generate_qr_matrix(qr_data), QR_X, QR_Y, QR_SIZE)
+    else:
+        qr_path = generate_qr(qr_data, postulante.cedula_identidad)
+        c.drawImage(qr_path, QR_X, QR_Y, width=QR_SIZE, height=QR_SIZE)
+        os.remove(qr_path)
+
+    c.setFillColor(COLOR_LABEL)
+    c.setFont("Helvetica", 7.5)
+    c.drawCentredString(TEXT_X + TEXT_W / 2, MID_Y - 12,
+                        f"Fecha de emisión: {now_str}")
 
     # ══════════════════════════════════════════════════════════════════════
     # 2. CONTENIDO PRINCIPAL - FLUJO DINÁMICO
     # ══════════════════════════════════════════════════════════════════════
     
-    # Espacio para el pie de página (fijo)
-    footer_base = margin + 60 
-    firma_space_y = footer_base + 54 # Mantiene la declaración en su altura actual
-    sep_y = firma_space_y + 45
-    
-    firma_line_y = footer_base + 15    # Subido 15 puntos respecto al anterior (-15 + 15)
-    nombre_y = footer_base - 1      # Mantener altura actual
-    firma_label_y = footer_base - 8 # Mantener altura actual
-    
     # Límite superior del contenido (después del banner)
-    current_y = banner_y - 12
+    current_y = BANNER_Y - 12
     
-    # Altura máxima disponible para contenido
-    content_min_y = sep_y + 12 # Ajustado al nuevo sep_y
+    # Altura máxima disponible para contenido (el pie de página es fijo)
+    content_min_y = SEP_Y + 12
     
     line_h = 14
     label_w = 160
@@ -470,71 +690,18 @@ def generate_pdf(postulante):
     # 3. PIE DE PÁGINA FIJO
     # ══════════════════════════════════════════════════════════════════════
 
-    # Ajustar current_y para el pie de página
-    current_y = sep_y
-
-    # Franja de fondo
-    footer_area_h = sep_y - footer_base + 6
-    c.setFillColor(colors.HexColor("#F4F6FA"))
-    c.rect(margin, footer_base, width - margin * 2, footer_area_h, fill=1, stroke=0)
-
-    # Línea separadora doble
-    c.setStrokeColor(COLOR_PRIMARY)
-    c.setLineWidth(1.5)
-    c.line(margin, sep_y, width - margin, sep_y)
-    c.setStrokeColor(COLOR_GOLD)
-    c.setLineWidth(0.8)
-    c.line(margin, sep_y - 3, width - margin, sep_y - 3)
-
-    # Etiqueta declaración
-    c.setFont("Helvetica-Bold", 7.5)
-    c.setFillColor(COLOR_PRIMARY)
-    c.drawString(margin, sep_y - 14, "DECLARACIÓN.")
-
-    # Texto declaración
-    decl_text = (
-        "Yo, el/la postulante, declaro que toda la información consignada "
-        "en el presente formulario es veraz, completa y fidedigna. Acepto que cualquier dato "
-        "falso, incompleto o alterado será motivo de inhabilitación automática e irrevocable "
-        "de mi postulación. Asimismo, manifiesto mi conformidad con la asignación de "
-        "recintos electorales de acuerdo a requerimiento del SERECI La Paz."
-    )
-    max_w = width - margin * 2 - 40
-    decl_lines = simpleSplit(decl_text, "Helvetica-Oblique", 8, max_w)
-    decl_line_h = 11
-    
-    decl_y = firma_space_y + (len(decl_lines) - 1) * decl_line_h
-    c.setFont("Helvetica-Oblique", 8)
-    c.setFillColor(COLOR_VALUE)
-    for line in decl_lines:
-        c.drawString(margin, decl_y, line)
-        decl_y -= decl_line_h
-
-    # Área de firma
-    firma_cx = width / 2
-    firma_half_w = 110
-    
-    c.setStrokeColor(COLOR_PRIMARY)
-    c.setLineWidth(0.8)
-    c.line(firma_cx - firma_half_w, firma_line_y,
-           firma_cx + firma_half_w, firma_line_y)
+    dibujar_capa('pie')
 
     c.setFont("Helvetica-Bold", 9)
     c.setFillColor(COLOR_VALUE)
-    c.drawCentredString(firma_cx, nombre_y, nombre_completo)
-
-    c.setFont("Helvetica", 7.5)
-    c.setFillColor(COLOR_LABEL)
-    c.drawCentredString(firma_cx, firma_label_y, "Firma del postulante")
+    c.drawCentredString(width / 2, NOMBRE_Y, nombre_completo)
 
     # ID de registro
     ts = int(datetime.now().timestamp() * 1000)
     c.setFont("Helvetica", 6.5)
     c.setFillColor(COLOR_LABEL)
-    c.drawString(margin, footer_base - 30,
+    c.drawString(margin, FOOTER_BASE - 30,
                  f"Nro. de registro: {postulante.cedula_identidad}-{ts}")
-    c.drawRightString(width - margin, footer_base - 30,
-                      "Documento generado electrónicamente")
 
     # ── Rótulo de observación diagonal AL FINAL ─────────────────────────
     if postulante.observacion and "NO ESTA DE ACUERDO CON DESIGNACION" in postulante.observacion.upper():
@@ -553,4 +720,5 @@ def generate_pdf(postulante):
         c.restoreState()
 
     c.save()
+    write_atomic(filepath, buffer.getvalue())
     return filename
\ No newline at end of file
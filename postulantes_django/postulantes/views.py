@@ -1,15 +1,36 @@
 import os
 import json
+import hashlib
+import hmac
+import math
 from datetime import datetime
 from django.conf import settings
-from django.http import FileResponse, Http404, HttpResponse
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags
 from django.shortcuts import get_object_or_404
+from django.db import IntegrityError
 from rest_framework import status, views, generics, permissions
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import Postulante, Recinto, UploadedFile, ConfiguracionSistema
+from .models import CupoCargo, Postulante, Recinto, UploadedFile, SubidaFragmentada
 from .serializers import PostulanteSerializer, RecintoSerializer, UploadedFileSerializer
-from .utils import generate_pdf
+from .comprobantes import obtener_comprobante, registrar_acceso, ruta_comprobante
+from .caching import (
+    configuracion_sistema, cupos_cargo, invalidar_configuracion,
+    payload_facetas_recintos, payload_recintos, respuesta_comprimida,
+)
+from .escritura import escritura
+from .geo import indice_recintos
+from .limpieza import barrido
+from .metricas import exponer, incrementar
+from .pagination import RecintoCursorPagination
+from .servir import servir_archivo
+from .subidas import (
+    ChecksumInvalido, buscar_por_contenido, completar_subida, crear_subida,
+    escribir_fragmento, registrar_archivo,
+)
+from .tasks import encolar_comprobante, estado_comprobante, pool, ESTADOS_EN_CURSO
 
 class FileUploadView(views.APIView):
     authentication_classes = []
@@ -21,7 +42,10 @@ class FileUploadView(views.APIView):
         if not file_obj:
             return Response({"success": False, "message": "No se subió ningún archivo."}, status=400)
         
-        uploaded_file = UploadedFile.objects.create(file=file_obj)
+        barrido.iniciar()
+        incrementar('sirepre_upload_bytes_total', file_obj.size, modo='multipart')
+        # Si ya se subió el mismo contenido se reutiliza el registro existente
+        uploaded_file, _ = registrar_archivo(file_obj.name, file_obj)
         return Response({
             "success": True,
             "id": uploaded_file.id,
@@ -29,11 +53,191 @@ class FileUploadView(views.APIView):
             "name": uploaded_file.file.name
         }, status=201)
 
+class SubidaSesionView(views.APIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        nombre = str(request.data.get('nombre') or '').strip()
+        sha256 = str(request.data.get('sha256') or '').strip()
+        try:
+            tamano = int(request.data.get('tamano'))
+        except (TypeError, ValueError):
+            tamano = 0
+        if not nombre or tamano <= 0 or not sha256:
+            return Response({"success": False, "message": "Se requieren nombre, tamano y sha256."}, status=400)
+        if tamano > settings.SUBIDA_TAMANO_MAX:
+            return Response({"success": False, "message": "El archivo excede el tamaño máximo permitido."}, status=413)
+        if len(sha256) != 64 or any(c not in '0123456789abcdefABCDEF' for c in sha256):
+            return Response({"success": False, "message": "sha256 inválido."}, status=400)
+
+        barrido.iniciar()
+        existente = buscar_por_contenido(sha256, tamano)
+        if existente:
+            # El contenido ya está en el servidor: no hace falta transferirlo
+            return Response({
+                "success": True,
+                "id": None,
+                "archivo": existente.id,
+                "name": existente.file.name,
+                "sha256": existente.sha256,
+            }, status=200)
+
+        subida = crear_subida(nombre, tamano, sha256)
+        return Response({
+            "success": True,
+            "id": str(subida.id),
+            "offset": 0,
+            "fragmento": settings.SUBIDA_FRAGMENTO_SUGERIDO,
+            "sha256": subida.sha256,
+        }, status=201)
+
+class SubidaFragmentoView(views.APIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    parser_classes = []  # El cuerpo se lee directamente del stream, sin parsear
+
+    def _estado(self, subida):
+        return {
+            "success": True,
+            "id": str(subida.id),
+            "offset": subida.recibido,
+            "tamano": subida.tamano,
+            "completa": subida.estado == 'COMPLETA',
+            "archivo": subida.archivo_id,
+            "sha256": subida.sha256,
+        }
+
+    def get(self, request, pk):
+        # Para reanudar: el cliente continúa desde el offset confirmado
+        subida = get_object_or_404(SubidaFragmentada, pk=pk)
+        return Response(self._estado(subida))
+
+    def put(self, request, pk):
+        subida = get_object_or_404(SubidaFragmentada, pk=pk)
+        if subida.estado != 'ABIERTA':
+            return Response({**self._estado(subida), "success": False, "message": "La subida ya fue completada."}, status=409)
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            longitud = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return Response({"success": False, "message": "Cabecera Upload-Offset inválida."}, status=400)
+        if offset != subida.recibido:
+            return Response({**self._estado(subida), "success": False, "message": "Offset incorrecto."}, status=409)
+        if longitud <= 0:
+            return Response({"success": False, "message": "Fragmento vacío."}, status=400)
+        if longitud > settings.SUBIDA_FRAGMENTO_MAX or offset + longitud > subida.tamano:
+            return Response({"success": False, "message": "Fragmento demasiado grande."}, status=413)
+
+        nuevo = escribir_fragmento(subida, offset, request.stream, longitud)
+        subida.refresh_from_db()
+        if nuevo is not None:
+            incrementar('sirepre_upload_bytes_total', nuevo - offset, modo='fragmentos')
+        if nuevo is None:
+            return Response({
+                **self._estado(subida), "success": False,
+                "message": "Offset incorrecto u otro fragmento en curso.",
+            }, status=409)
+        return Response(self._estado(subida))
+
+class SubidaCompletarView(views.APIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, pk):
+        subida = get_object_or_404(SubidaFragmentada, pk=pk)
+        if subida.estado == 'COMPLETA' and subida.archivo_id:
+            # Reintento de un "completar" cuya respuesta se perdió
+            return Response({
+                "success": True, "id": subida.archivo_id, "name": subida.archivo.file.name, "sha256": subida.sha256,
+            }, status=201)
+        if subida.recibido != subida.tamano:
+            return Response({
+                "success": False,
+                "message": "La subida está incompleta.",
+                "offset": subida.recibido,
+            }, status=409)
+
+        try:
+            uploaded = completar_subida(subida)
+        except ChecksumInvalido:
+            return Response({
+                "success": False,
+                "message": "El checksum no coincide; la subida debe reiniciarse.",
+                "offset": 0,
+            }, status=400)
+        if uploaded is None:
+            return Response({"success": False, "message": "La subida se está completando."}, status=409)
+        # El sha256 ya fue verificado contra el contenido recibido
+        return Response({"success": True, "id": uploaded.id, "name": uploaded.file.name, "sha256": subida.sha256}, status=201)
+
 class RecintoListView(generics.ListAPIView):
     permission_classes = [permissions.AllowAny]
     queryset = Recinto.objects.all()
     serializer_class = RecintoSerializer
-    pagination_class = None # Return all recintos for the map
+    pagination_class = RecintoCursorPagination
+    filtros = ('departamento', 'provincia', 'municipio', 'asiento', 'zona')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for campo in self.filtros:
+            valor = self.request.query_params.get(campo)
+            if valor:
+                queryset = queryset.filter(**{campo: valor})
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        parametros = set(request.query_params) & {*self.filtros, 'cursor', 'page_size'}
+        if not parametros:
+            # Sin filtros: lista completa para el mapa, ya serializada y comprimida
+            # (se invalida al cambiar un recinto)
+            return respuesta_comprimida(request, payload_recintos())
+        return super().list(request, *args, **kwargs)
+
+class RecintoFacetasView(views.APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return respuesta_comprimida(request, payload_facetas_recintos())
+
+class RecintoCercanosView(views.APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            lat = float(request.query_params.get('lat'))
+            lon = float(request.query_params.get('lon'))
+            k = int(request.query_params.get('k', 5))
+            radio_km = request.query_params.get('radio_km')
+            radio_km = float(radio_km) if radio_km else None
+        except (TypeError, ValueError):
+            return Response({"success": False, "error": "Parámetros lat, lon, k o radio_km inválidos."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # float() acepta "nan" e "inf": un radio así no es un filtro válido
+        if (not (-90 <= lat <= 90 and -180 <= lon <= 180) or k < 1
+                or (radio_km is not None and not (math.isfinite(radio_km) and radio_km > 0))):
+            return Response({"success": False, "error": "Parámetros fuera de rango."}, status=status.HTTP_400_BAD_REQUEST)
+
+        k = min(k, 50)
+        resultados = []
+        for distancia, recinto in indice_recintos().cercanos(lat, lon, k=k, radio_km=radio_km):
+            resultados.append({**recinto, "distancia_km": round(distancia, 3)})
+        return Response(resultados)
+
+class CupoAgotado(Exception):
+    pass
+
+def _mensaje_cerrado(config, ahora):
+    if config.sistema_activo and config.fecha_apertura and ahora < config.fecha_apertura:
+        apertura = timezone.localtime(config.fecha_apertura).strftime('%d/%m/%Y %H:%M')
+        return f"El sistema de postulación abrirá el {apertura}."
+    return config.mensaje or "El sistema de postulación se ha cerrado."
+
+def _respuesta_sin_cupo(cargo):
+    return Response({
+        "success": False,
+        "message": f"No quedan cupos disponibles para el cargo {cargo}."
+    }, status=status.HTTP_403_FORBIDDEN)
 
 class PostulanteCreateView(views.APIView):
     authentication_classes = []
@@ -41,12 +245,13 @@ class PostulanteCreateView(views.APIView):
     parser_classes = (MultiPartParser, FormParser)
 
     def post(self, request, *args, **kwargs):
-        # Verificar si el sistema está activo
-        config = ConfiguracionSistema.objects.first()
-        if config and not config.sistema_activo:
+        # Verificar si el sistema está activo (y dentro de la ventana programada)
+        config = configuracion_sistema()
+        ahora = timezone.now()
+        if not config.abierto(ahora):
             return Response({
                 "success": False,
-                "message": config.mensaje or "El sistema de postulación se ha cerrado."
+                "message": _mensaje_cerrado(config, ahora)
             }, status=status.HTTP_403_FORBIDDEN)
 
         data = request.data.copy()
@@ -140,32 +345,46 @@ class PostulanteCreateView(views.APIView):
         if 'observacion' in data:
             data['observacion'] = data['observacion']
 
-        # Check for existence
-        ci = data.get('cedula_identidad')
-        complemento = data.get('complemento')
-        if Postulante.objects.filter(cedula_identidad=ci, complemento=complemento).exists():
-            return Response({
-                "success": False,
-                "message": "Ya existe un postulante con esta cédula de identidad y complemento"
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # Sin complemento se guarda siempre como NULL
+        complemento = (data.get('complemento') or '').strip()
+        data['complemento'] = complemento or None
 
         serializer = PostulanteSerializer(data=data)
         if serializer.is_valid():
-            postulante = serializer.save()
-            
-            # Generate PDF
+            # La restricción única de (CI, complemento) decide los duplicados,
+            # incluso si llegan dos envíos simultáneos del mismo postulante
+            cargo = serializer.validated_data['cargo_postulacion']
+            cupo = cupos_cargo().get(cargo)
+            if cupo and cupo[1] >= cupo[0]:
+                return _respuesta_sin_cupo(cargo)
             try:
-                pdf_filename = generate_pdf(postulante)
-            except Exception as e:
-                print(f"Error generating PDF: {e}")
-                pdf_filename = None
+                with escritura():
+                    # El lugar se reserva en la misma transacción: si el registro
+                    # falla, el cupo vuelve a quedar libre
+                    if cupo and not CupoCargo.reservar(cargo):
+                        raise CupoAgotado(cargo)
+                    postulante = serializer.save()
+            except CupoAgotado:
+                # La copia en memoria estaba desactualizada: se relee para rechazar sin consultas
+                invalidar_configuracion()
+                return _respuesta_sin_cupo(cargo)
+            except IntegrityError:
+                return Response({
+                    "success": False,
+                    "message": "Ya existe un postulante con esta cédula de identidad y complemento"
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Encolar la generación del PDF (la realizan los workers en segundo plano)
+            tarea = encolar_comprobante(postulante)
 
             return Response({
                 "success": True,
                 "message": "Postulante registrado exitosamente",
                 "id": postulante.id,
                 "pdfUrl": f"/api/postulantes/pdf/{postulante.cedula_identidad}/",
-                "pdfFilename": pdf_filename,
+                "pdfEstadoUrl": f"/api/postulantes/pdf/{postulante.cedula_identidad}/estado/",
+                "pdfEstado": tarea.estado.lower(),
+                "pdfFilename": f"comprobante_{postulante.cedula_identidad}.pdf",
                 "nombreCompleto": f"{postulante.nombre} {postulante.apellido_paterno or ''} {postulante.apellido_materno or ''}"
             }, status=status.HTTP_201_CREATED)
         
@@ -188,43 +407,101 @@ class VerificarExistenciaView(views.APIView):
         if not complemento or complemento == 'null':
             complemento = None
 
-        exists = Postulante.objects.filter(cedula_identidad=ci, complemento=complemento).exists()
+        exists = Postulante.objects.por_ci(ci, complemento).exists()
         
         if exists:
             return Response({"success": True, "existe": True, "mensaje": "El postulante ya está registrado."})
         else:
             return Response({"success": True, "existe": False, "mensaje": "El postulante no está registrado."})
 
+def _respuesta_pendiente(ci):
+    # Si el proceso acaba de arrancar, asegurar que haya workers consumiendo la cola
+    pool.despertar()
+    response = Response({
+        "success": True,
+        "estado": "pendiente",
+        "mensaje": "El comprobante se está generando, intente nuevamente en unos segundos.",
+        "pdfUrl": f"/api/postulantes/pdf/{ci}/",
+    }, status=status.HTTP_202_ACCEPTED)
+    response['Retry-After'] = '2'
+    return response
+
 class ServirPDFView(views.APIView):
     def get(self, request, ci):
-        pdf_path = os.path.join(settings.MEDIA_ROOT, 'comprobantes', f'comprobante_{ci}.pdf')
-        
-        if not os.path.exists(pdf_path):
-            raise Http404("PDF no encontrado")
+        tarea = estado_comprobante(ci)
+        if tarea and tarea.estado in ESTADOS_EN_CURSO:
+            return _respuesta_pendiente(ci)
 
-        response = FileResponse(open(pdf_path, 'rb'), content_type='application/pdf')
-        response['Content-Disposition'] = f'inline; filename="comprobante_{ci}.pdf"'
-        response['Cache-Control'] = 'public, max-age=3600'
-        return response
+        for intento in range(2):
+            # Si el PDF falta (falló al registrarse o se expulsó de la caché) se genera ahora
+            pdf_path = obtener_comprobante(ci)
+            if pdf_path is None:
+                raise Http404("PDF no encontrado")
 
-class ConfiguracionSistemaView(views.APIView):
+            registrar_acceso(pdf_path)
+            try:
+                return servir_archivo(
+                    request, pdf_path,
+                    content_type='application/pdf',
+                    filename=f'comprobante_{ci}.pdf',
+                    cache_control='public, max-age=3600',
+                )
+            except Http404:
+                # podar_cache lo borró entre la verificación y el envío: se vuelve a generar
+                if intento:
+                    raise
+
+class EstadoPDFView(views.APIView):
     permission_classes = [permissions.AllowAny]
 
-    def get(self, request):
-        config = ConfiguracionSistema.objects.first()
-        if not config:
-            # Si no existe, crear una por defecto
-            config = ConfiguracionSistema.objects.create(
-                sistema_activo=True,
-                mensaje="El sistema de postulación se ha cerrado."
-            )
-        
+    def get(self, request, ci):
+        tarea = estado_comprobante(ci)
+
+        if tarea and tarea.estado in ESTADOS_EN_CURSO:
+            estado = "pendiente"
+        elif os.path.exists(ruta_comprobante(ci)) or Postulante.objects.filter(cedula_identidad=ci).exists():
+            # Sin archivo pero con postulante: la descarga lo genera al vuelo
+            estado = "listo"
+        else:
+            return Response({"success": False, "estado": "no_encontrado"}, status=status.HTTP_404_NOT_FOUND)
+
         return Response({
             "success": True,
-            "sistema_activo": config.sistema_activo,
-            "mensaje": config.mensaje
+            "estado": estado,
+            "pdfUrl": f"/api/postulantes/pdf/{ci}/",
         })
 
+class ConfiguracionSistemaView(views.APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        config = configuracion_sistema()
+        ahora = timezone.now()
+        abierto = config.abierto(ahora)
+        data = {
+            "success": True,
+            "sistema_activo": abierto,
+            "mensaje": config.mensaje if abierto else _mensaje_cerrado(config, ahora),
+            "fecha_apertura": config.fecha_apertura.isoformat() if config.fecha_apertura else None,
+            "fecha_cierre": config.fecha_cierre.isoformat() if config.fecha_cierre else None,
+            "cargos_sin_cupo": sorted(c for c, (limite, ocupados) in cupos_cargo().items() if ocupados >= limite),
+        }
+        etag = '"%s"' % hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+
+        # El front end consulta este endpoint periódicamente: revalidar cuesta un 304.
+        # La vigencia no pasa de la próxima apertura o cierre programado.
+        max_age = getattr(settings, "CONFIGURACION_CACHE_TTL", 5)
+        proximo = config.proximo_cambio(ahora)
+        if proximo:
+            max_age = max(0, min(max_age, int((proximo - ahora).total_seconds())))
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={max_age}'
+        return response
+
 def health_check(request):
     return HttpResponse(
         json.dumps({
@@ -235,3 +512,14 @@ def health_check(request):
         content_type="application/json",
         status=200
     )
+
+def metrics(request):
+    # Formato de texto de Prometheus; con METRICAS_TOKEN se exige "Authorization: Bearer <token>"
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=403)
+    abierto = configuracion_sistema().abierto(timezone.now())
+    return HttpResponse(
+        exponer({'sirepre_sistema_activo': int(abierto)}),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
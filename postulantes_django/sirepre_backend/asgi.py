@@ -14,3 +14,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sirepre_backend.settings')
 
 application = get_asgi_application()
+
+# Retoma los comprobantes y las imágenes que quedaron pendientes antes de reiniciar
+# el servidor, sin esperar a que una petición despierte a los workers
+from postulantes.imagenes import pool_imagenes  # noqa: E402
+from postulantes.tasks import pool  # noqa: E402
+
+pool.despertar()
+pool_imagenes.despertar()
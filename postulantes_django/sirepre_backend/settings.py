@@ -10,6 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
+import sys
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'postulantes.metricas.MetricasMiddleware',  # Primero, para medir la petición completa
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -76,13 +80,88 @@ WSGI_APPLICATION = 'sirepre_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# Perfil elegido por variables de entorno: DB_ENGINE=sqlite (por defecto) o
+# DB_ENGINE=postgresql para producción, donde los registros se escriben en
+# paralelo en vez de serializarse en un solo archivo.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DB_POOL = os.environ.get('DB_POOL', '1') == '1'  # Pool de psycopg 3 por proceso (requiere psycopg[pool])
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'sirepre'),
+            'USER': os.environ.get('DB_USER', 'sirepre'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Con pool las conexiones las reutiliza el pool; sin pool se mantienen
+            # abiertas CONN_MAX_AGE segundos y se verifican antes de reutilizarlas
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+            },
+        }
+    }
+    if DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX', '10')),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),  # Espera máxima por una conexión libre
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+
+# Modo de alta concurrencia para instalaciones que se quedan en SQLite (DB_SQLITE_CONCURRENCIA=1)
+SQLITE_OPCIONES_CONCURRENCIA = {
+    'transaction_mode': 'IMMEDIATE',  # Las transacciones toman el bloqueo de escritura al empezar, sin fallar al promoverse
+    'timeout': 20,                    # busy_timeout: segundos que una escritura espera el bloqueo antes de fallar
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'    # Las lecturas no esperan a los escritores
+        'PRAGMA synchronous=NORMAL;'  # Seguro con WAL; no sincroniza el disco en cada commit
+        'PRAGMA mmap_size=268435456;' # Lecturas por memoria mapeada (256 MB)
+    ),
+}
+SQLITE_CARRIL_ESCRITURA = DB_ENGINE != 'postgresql' and os.environ.get('DB_SQLITE_CONCURRENCIA', '0') == '1'
+if SQLITE_CARRIL_ESCRITURA:
+    DATABASES['default']['OPTIONS'] = SQLITE_OPCIONES_CONCURRENCIA
+
+# Pruebas: una segunda base SQLite en archivo con el perfil de concurrencia (la de
+# pruebas por defecto es en memoria, sin WAL). `manage.py test` la crea con las
+# migraciones y la borra al terminar
+if sys.argv[1:2] == ['test']:
+    _SQLITE_PRUEBAS = os.path.join(tempfile.gettempdir(), 'sirepre_test_concurrencia.sqlite3')
+    DATABASES['concurrencia'] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': _SQLITE_PRUEBAS,
+        'OPTIONS': SQLITE_OPCIONES_CONCURRENCIA,
+        'TEST': {'NAME': _SQLITE_PRUEBAS, 'DEPENDENCIES': []},
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Basada en archivos para que todos los procesos del servidor compartan la
+# versión de los datos cacheados (p. ej. la lista de recintos).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'sirepre_cache'),
     }
 }
 
+RECINTOS_CACHE_MAX_AGE = 60       # Cache-Control max-age (segundos) de /recintos/
+RECINTOS_CACHE_TIMEOUT = 60 * 60  # Vigencia máxima del payload cacheado en el servidor
+CONFIGURACION_CACHE_TTL = 5       # Segundos que cada proceso reutiliza ConfiguracionSistema (y max-age de /status/)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -142,3 +221,45 @@ CSRF_TRUSTED_ORIGINS = [
     'http://127.0.0.1:5000'
 ]
 
+
+# Generación de comprobantes PDF en segundo plano (cola en la tabla tareas_comprobante)
+COMPROBANTE_ASYNC = True          # False = generar el PDF dentro de la petición
+COMPROBANTE_WORKERS = 2           # Hilos por proceso; 0 para usar solo `manage.py procesar_comprobantes`
+COMPROBANTE_POLL = 5              # Segundos entre revisiones de la cola cuando está inactiva
+COMPROBANTE_TIMEOUT = 300         # Segundos tras los que una tarea en PROCESANDO se reintenta
+COMPROBANTE_MAX_INTENTOS = 3
+COMPROBANTE_CACHE_MAX_MB = 2048   # Tamaño máximo de media/comprobantes; se expulsan los menos usados (None = sin límite)
+COMPROBANTE_CACHE_INTERVALO = 60  # Segundos mínimos entre recorridos del directorio para la expulsión
+COMPROBANTE_VALIDO_DESDE = None   # datetime con zona: los PDF anteriores se regeneran al pedirlos (p. ej. tras cambiar el diseño)
+
+# Subidas por fragmentos (POST /api/postulantes/upload/sesiones/)
+SUBIDA_DIR = os.path.join(MEDIA_ROOT, 'subidas_parciales')  # Archivos parciales, fuera de temp_uploads
+SUBIDA_TAMANO_MAX = 50 * 1024 * 1024      # Tamaño máximo del archivo completo
+SUBIDA_FRAGMENTO_MAX = 8 * 1024 * 1024    # Tamaño máximo de cada PUT
+SUBIDA_FRAGMENTO_SUGERIDO = 1024 * 1024   # Tamaño de fragmento que se sugiere al cliente
+SUBIDA_TTL_HORAS = 48                     # Subidas no usadas por ningún postulante se purgan tras este plazo
+SUBIDA_PURGA_INTERVALO = 0                # Segundos entre barridos en segundo plano; 0 = solo `manage.py purge_uploads`
+
+# Optimización de fotos de documentos subidas (EXIF, orientación, tamaño, miniatura)
+IMAGEN_OPTIMIZAR = True
+IMAGEN_WORKERS = 1                        # Hilos por proceso que procesan la cola de imágenes
+IMAGEN_MAX_LADO = 2000                    # Píxeles del lado mayor de la versión optimizada
+IMAGEN_CALIDAD = 82                       # Calidad JPEG de la versión optimizada
+IMAGEN_MINIATURA_LADO = 320
+IMAGEN_TIMEOUT = 300                      # Segundos tras los que una imagen en PROCESANDO se reintenta
+IMAGEN_MAX_INTENTOS = 3
+
+# Vistas previas de documentos en el admin (caché de derivados por hash; se puede borrar sin riesgo)
+PREVIEW_DIR = os.path.join(tempfile.gettempdir(), 'sirepre_previews')
+PREVIEW_LADO = 480
+
+# Envío de archivos (comprobantes y media)
+SERVIR_MEDIA = DEBUG                      # Servir MEDIA_URL desde Django (con rangos y ETag)
+SERVIR_ARCHIVOS_MODO = 'python'           # 'python', 'x-accel' (nginx) o 'x-sendfile' (Apache/lighttpd)
+SERVIR_ACCEL_PREFIX = '/protected-media/' # Location `internal` de nginx que apunta a MEDIA_ROOT
+
+# Métricas para Prometheus (GET /api/metrics)
+METRICAS_ACTIVAS = True
+METRICAS_DIR = os.path.join(tempfile.gettempdir(), 'sirepre_metricas')  # Un archivo por proceso; vaciarlo al desplegar
+METRICAS_INTERVALO = 5                    # Segundos entre volcados del estado de cada proceso a METRICAS_DIR
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')  # Si se define, el endpoint exige "Authorization: Bearer <token>"
@@ -1,14 +1,17 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
-from postulantes.views import health_check
+from postulantes.servir import servir_media
+from postulantes.views import health_check, metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/postulantes/', include('postulantes.urls')),
     path('api/health/', health_check, name='health_check'),
+    path('api/metrics', metrics, name='metrics'),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.DEBUG or settings.SERVIR_MEDIA:
+    urlpatterns += [
+        re_path(rf'^{settings.MEDIA_URL.strip("/")}/(?P<path>.*)$', servir_media, name='media'),
+    ]